@@ -0,0 +1,109 @@
+"""
+Benchmark of the single precision mode
+======================================
+
+Compares the computation time and the peak memory of signal cleaning,
+resampling, smoothing, masking and mask reduction in double precision
+(default) and in single precision (nilearn.FLOAT_PRECISION = 'single'), and
+checks that the results agree within the documented tolerance.
+
+Run with::
+
+    python benchmarks/bench_float_precision.py
+
+Peak memory is measured with the tracemalloc module (Python >= 3.4).
+"""
+# License: simplified BSD
+from __future__ import print_function
+
+import time
+
+import numpy as np
+
+import nilearn as ni
+from nilearn import signal, image
+from nilearn.input_data import NiftiMasker, MultiNiftiMasker
+from nilearn.decomposition.base import mask_and_reduce
+from nilearn._utils.testing import generate_fake_fmri
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+
+def _measure(func, n_repeats=3):
+    """Return the best time, the peak memory (in MB) and the output of func.
+    """
+    times = []
+    for _ in range(n_repeats):
+        t0 = time.time()
+        output = func()
+        times.append(time.time() - t0)
+        del output
+    peak = np.nan
+    if tracemalloc is not None:
+        tracemalloc.start()
+        output = func()
+        peak = tracemalloc.get_traced_memory()[1] / 1024. ** 2
+        tracemalloc.stop()
+    else:
+        output = func()
+    return min(times), peak, output
+
+
+def _get_data(output):
+    if hasattr(output, 'get_data'):
+        return output.get_data()
+    return output
+
+
+def main(shape=(64, 64, 40), length=150):
+    fmri, mask = generate_fake_fmri(shape=shape, length=length,
+                                    rand_gen=np.random.RandomState(0))
+    # Data of scaled integer images is loaded by nibabel in double precision
+    fmri = image.new_img_like(fmri, fmri.get_data().astype(np.float64))
+    masker = NiftiMasker(mask_img=mask, detrend=True, standardize=True,
+                         high_pass=.01, low_pass=.1, t_r=2.).fit()
+    signals = masker.transform(fmri).astype(np.float64)
+    multi_masker = MultiNiftiMasker(mask_img=mask).fit()
+
+    benchmarks = [
+        ('signal.clean', lambda: signal.clean(
+            signals, detrend=True, standardize=True, low_pass=.1,
+            high_pass=.01, t_r=2.)),
+        ('resample_img', lambda: image.resample_img(
+            fmri, target_affine=np.diag((2, 2, 2)))),
+        ('smooth_img', lambda: image.smooth_img(fmri, fwhm=6)),
+        ('NiftiMasker.transform', lambda: masker.transform(fmri)),
+        ('mask_and_reduce', lambda: mask_and_reduce(
+            multi_masker, [fmri, fmri], n_components=20)),
+    ]
+
+    print('%-22s %10s %10s %10s %10s %10s' % (
+        'benchmark', 'time (s)', 'time (s)', 'mem (MB)', 'mem (MB)',
+        'max error'))
+    print('%-22s %10s %10s %10s %10s' % ('', 'double', 'single', 'double',
+                                         'single'))
+    for name, func in benchmarks:
+        results = {}
+        for precision in ('double', 'single'):
+            ni.FLOAT_PRECISION = precision
+            try:
+                results[precision] = _measure(func)
+            finally:
+                ni.FLOAT_PRECISION = 'double'
+        double, single = _get_data(results['double'][2]), \
+            _get_data(results['single'][2])
+        if name == 'mask_and_reduce':
+            # Reduced data is defined up to the sign of its components
+            double, single = np.abs(double), np.abs(single)
+        error = (np.abs(double - single).max() /
+                 max(np.abs(double).max(), 1e-12))
+        print('%-22s %10.3f %10.3f %10.1f %10.1f %10.1e' % (
+            name, results['double'][0], results['single'][0],
+            results['double'][1], results['single'][1], error))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark of the import time of nilearn
+=======================================
+
+Measures the cold start time of importing nilearn modules, each in a fresh
+Python process, and lists the heavy dependencies that they load.
+
+Run with::
+
+    python benchmarks/bench_import_time.py [module ...]
+
+The import time of the Python interpreter alone is reported as a baseline.
+"""
+# License: simplified BSD
+from __future__ import print_function
+
+import subprocess
+import sys
+
+import numpy as np
+
+
+MODULES = ['nilearn', 'nilearn.signal', 'nilearn.image',
+           'nilearn.input_data', 'nilearn.decoding', 'nilearn.plotting']
+
+HEAVY_DEPENDENCIES = ['scipy.signal', 'scipy.stats', 'sklearn.neighbors',
+                      'sklearn.svm', 'sklearn.linear_model', 'matplotlib']
+
+_SCRIPT = """
+import sys, time
+t0 = time.time()
+%s
+duration = time.time() - t0
+print(duration)
+print(' '.join(name for name in %r if name in sys.modules))
+"""
+
+
+def _import_time(module, n_repeats=5):
+    """Return the median import time of module in a new process, and the
+    heavy dependencies that it loads."""
+    statement = 'import %s' % module if module else 'pass'
+    times = []
+    for _ in range(n_repeats):
+        output = subprocess.check_output(
+            [sys.executable, '-c',
+             _SCRIPT % (statement, HEAVY_DEPENDENCIES)])
+        duration, dependencies = output.decode().split('\n')[:2]
+        times.append(float(duration))
+    return np.median(times), dependencies.split()
+
+
+def main(modules=None):
+    if not modules:
+        modules = MODULES
+    print('%-22s %10s   %s' % ('module', 'time (s)', 'heavy dependencies'))
+    for module in [''] + list(modules):
+        try:
+            duration, dependencies = _import_time(module)
+        except subprocess.CalledProcessError:
+            print('%-22s %10s' % (module, 'failed'))
+            continue
+        print('%-22s %10.3f   %s' % (module or '(python)', duration,
+                                     ', '.join(dependencies)))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,239 @@
+"""
+Benchmarks of the hot paths of nilearn
+======================================
+
+The benchmarks are written following the conventions of airspeed velocity
+(asv): each class has a ``setup`` method, ``params`` and ``param_names``
+attributes sweeping over data size and n_jobs, and ``time_*`` and
+``peakmem_*`` methods measuring respectively the computation time and the
+peak memory of a function.
+
+They can be run offline, without asv, with::
+
+    python benchmarks/run_benchmarks.py
+
+All data is generated with the functions of nilearn._utils.testing.
+"""
+# License: simplified BSD
+
+import numpy as np
+
+from nilearn import signal, image
+from nilearn.input_data import (NiftiMasker, MultiNiftiMasker,
+                                NiftiLabelsMasker, NiftiMapsMasker,
+                                NiftiSpheresMasker)
+from nilearn.mass_univariate import permuted_ols
+from nilearn.decoding import SearchLight
+from nilearn.decomposition import CanICA, DictLearning
+from nilearn.connectome import ConnectivityMeasure, group_sparse_covariance
+from nilearn._utils.testing import (generate_fake_fmri, generate_maps,
+                                    generate_labeled_regions,
+                                    generate_group_sparse_gaussian_graphs)
+
+
+# Shape of the 3D volumes and number of scans for each data size
+SIZES = {'small': ((20, 20, 20), 50),
+         'large': ((40, 40, 40), 100)}
+
+
+def _fake_fmri(size, n_subjects=1):
+    """Return a list of n_subjects fMRI images and their mask."""
+    shape, length = SIZES[size]
+    rand_gen = np.random.RandomState(0)
+    fmri_imgs = []
+    for _ in range(n_subjects):
+        fmri, mask = generate_fake_fmri(shape=shape, length=length,
+                                        rand_gen=rand_gen)
+        # Load the data once, so that it is not part of the measures
+        fmri.get_data()
+        fmri_imgs.append(fmri)
+    return fmri_imgs, mask
+
+
+class SignalClean(object):
+    params = [['small', 'large']]
+    param_names = ['size']
+
+    def setup(self, size):
+        shape, length = SIZES[size]
+        rand_gen = np.random.RandomState(0)
+        self.signals = rand_gen.randn(length, int(np.prod(shape)) // 10)
+
+    def time_clean(self, size):
+        signal.clean(self.signals, detrend=True, standardize=True,
+                     low_pass=.1, high_pass=.01, t_r=2.)
+
+    def peakmem_clean(self, size):
+        signal.clean(self.signals, detrend=True, standardize=True,
+                     low_pass=.1, high_pass=.01, t_r=2.)
+
+
+class ImageProcessing(object):
+    params = [['small', 'large']]
+    param_names = ['size']
+
+    def setup(self, size):
+        (self.fmri, ), _ = _fake_fmri(size)
+
+    def time_resample_img(self, size):
+        image.resample_img(self.fmri, target_affine=np.diag((2, 2, 2)))
+
+    def peakmem_resample_img(self, size):
+        image.resample_img(self.fmri, target_affine=np.diag((2, 2, 2)))
+
+    def time_smooth_img(self, size):
+        image.smooth_img(self.fmri, fwhm=6)
+
+    def peakmem_smooth_img(self, size):
+        image.smooth_img(self.fmri, fwhm=6)
+
+
+class Maskers(object):
+    params = [['small', 'large'], [1, 2]]
+    param_names = ['size', 'n_jobs']
+
+    def setup(self, size, n_jobs):
+        self.fmri_imgs, mask = _fake_fmri(size, n_subjects=2)
+        shape = mask.shape
+        affine = mask.get_affine()
+        self.nifti_masker = NiftiMasker(mask_img=mask, detrend=True,
+                                        standardize=True).fit()
+        self.multi_nifti_masker = MultiNiftiMasker(
+            mask_img=mask, detrend=True, standardize=True,
+            n_jobs=n_jobs).fit()
+        labels = generate_labeled_regions(shape, 10, affine=affine)
+        self.labels_masker = NiftiLabelsMasker(labels, detrend=True,
+                                               standardize=True).fit()
+        maps, _ = generate_maps(shape, 10, affine=affine)
+        self.maps_masker = NiftiMapsMasker(maps, detrend=True,
+                                           standardize=True).fit()
+        seeds = [tuple(np.dot(affine, [s // 2 for s in shape] + [1])[:3])]
+        self.spheres_masker = NiftiSpheresMasker(seeds, radius=4.,
+                                                 detrend=True,
+                                                 standardize=True).fit()
+
+    def time_nifti_masker(self, size, n_jobs):
+        self.nifti_masker.transform(self.fmri_imgs[0])
+
+    def peakmem_nifti_masker(self, size, n_jobs):
+        self.nifti_masker.transform(self.fmri_imgs[0])
+
+    def time_multi_nifti_masker(self, size, n_jobs):
+        self.multi_nifti_masker.transform(self.fmri_imgs)
+
+    def peakmem_multi_nifti_masker(self, size, n_jobs):
+        self.multi_nifti_masker.transform(self.fmri_imgs)
+
+    def time_labels_masker(self, size, n_jobs):
+        self.labels_masker.transform(self.fmri_imgs[0])
+
+    def peakmem_labels_masker(self, size, n_jobs):
+        self.labels_masker.transform(self.fmri_imgs[0])
+
+    def time_maps_masker(self, size, n_jobs):
+        self.maps_masker.transform(self.fmri_imgs[0])
+
+    def peakmem_maps_masker(self, size, n_jobs):
+        self.maps_masker.transform(self.fmri_imgs[0])
+
+    def time_spheres_masker(self, size, n_jobs):
+        self.spheres_masker.transform(self.fmri_imgs[0])
+
+    def peakmem_spheres_masker(self, size, n_jobs):
+        self.spheres_masker.transform(self.fmri_imgs[0])
+
+
+class PermutedOLS(object):
+    params = [['small', 'large'], [1, 2]]
+    param_names = ['size', 'n_jobs']
+
+    def setup(self, size, n_jobs):
+        shape, length = SIZES[size]
+        rand_gen = np.random.RandomState(0)
+        self.tested_vars = rand_gen.randn(length, 1)
+        self.target_vars = rand_gen.randn(length, int(np.prod(shape)) // 10)
+
+    def time_permuted_ols(self, size, n_jobs):
+        permuted_ols(self.tested_vars, self.target_vars, n_perm=100,
+                     random_state=0, n_jobs=n_jobs)
+
+    def peakmem_permuted_ols(self, size, n_jobs):
+        permuted_ols(self.tested_vars, self.target_vars, n_perm=100,
+                     random_state=0, n_jobs=n_jobs)
+
+
+class SearchLightFit(object):
+    params = [['small', 'large'], [1, 2]]
+    param_names = ['size', 'n_jobs']
+
+    def setup(self, size, n_jobs):
+        shape, length = SIZES[size]
+        self.fmri, mask, self.target = generate_fake_fmri(
+            shape=shape, length=length, n_blocks=4, block_size=4,
+            kind='step', rand_gen=np.random.RandomState(0))
+        # Restrict the process mask to a slab, to keep the benchmark short
+        process_mask = np.zeros(shape, dtype=bool)
+        process_mask[:, :, shape[2] // 2] = mask.get_data()[
+            :, :, shape[2] // 2]
+        self.process_mask = image.new_img_like(mask, process_mask)
+        self.mask = mask
+        self.n_jobs = n_jobs
+
+    def _fit(self):
+        SearchLight(self.mask, process_mask_img=self.process_mask,
+                    radius=2., n_jobs=self.n_jobs, cv=2).fit(
+                        self.fmri, self.target)
+
+    def time_searchlight(self, size, n_jobs):
+        self._fit()
+
+    def peakmem_searchlight(self, size, n_jobs):
+        self._fit()
+
+
+class Decompositions(object):
+    params = [['small', 'large'], [1, 2]]
+    param_names = ['size', 'n_jobs']
+
+    def setup(self, size, n_jobs):
+        self.fmri_imgs, self.mask = _fake_fmri(size, n_subjects=3)
+
+    def time_canica(self, size, n_jobs):
+        CanICA(mask=self.mask, n_components=5, n_init=1, random_state=0,
+               n_jobs=n_jobs).fit(self.fmri_imgs)
+
+    def peakmem_canica(self, size, n_jobs):
+        CanICA(mask=self.mask, n_components=5, n_init=1, random_state=0,
+               n_jobs=n_jobs).fit(self.fmri_imgs)
+
+    def time_dict_learning(self, size, n_jobs):
+        DictLearning(mask=self.mask, n_components=5, random_state=0,
+                     n_jobs=n_jobs).fit(self.fmri_imgs)
+
+    def peakmem_dict_learning(self, size, n_jobs):
+        DictLearning(mask=self.mask, n_components=5, random_state=0,
+                     n_jobs=n_jobs).fit(self.fmri_imgs)
+
+
+class Connectome(object):
+    params = [['small', 'large']]
+    param_names = ['size']
+
+    def setup(self, size):
+        n_features = {'small': 30, 'large': 100}[size]
+        self.signals, _, _ = generate_group_sparse_gaussian_graphs(
+            n_subjects=10, n_features=n_features, min_n_samples=100,
+            max_n_samples=150, density=0.1,
+            random_state=np.random.RandomState(0))
+
+    def time_connectivity_measure(self, size):
+        ConnectivityMeasure(kind='tangent').fit_transform(self.signals)
+
+    def peakmem_connectivity_measure(self, size):
+        ConnectivityMeasure(kind='tangent').fit_transform(self.signals)
+
+    def time_group_sparse_covariance(self, size):
+        group_sparse_covariance(self.signals, alpha=.1, max_iter=10)
+
+    def peakmem_group_sparse_covariance(self, size):
+        group_sparse_covariance(self.signals, alpha=.1, max_iter=10)
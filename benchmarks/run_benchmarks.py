@@ -0,0 +1,116 @@
+"""
+Offline runner of the benchmarks
+================================
+
+Runs the asv-style benchmarks defined in benchmarks.py without asv, for all
+their parameters, and prints the time (best of a few repeats) of the
+``time_*`` methods and the peak memory of the ``peakmem_*`` methods.
+
+Usage::
+
+    python benchmarks/run_benchmarks.py [pattern] [--repeat N] [--json FILE]
+
+Only the benchmarks whose name (``Class.method``) contains ``pattern`` are
+run. With ``--json``, results are also saved to FILE, so that they can be
+compared across versions of nilearn.
+
+Peak memory is measured with the tracemalloc module (Python >= 3.4), and
+only accounts for the memory allocated by the main process.
+"""
+# License: simplified BSD
+from __future__ import print_function
+
+import argparse
+import inspect
+import itertools
+import json
+import os
+import sys
+import time
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import benchmarks
+
+
+def _measure_time(method, params, n_repeats):
+    times = []
+    for _ in range(n_repeats):
+        t0 = time.time()
+        method(*params)
+        times.append(time.time() - t0)
+    return min(times)
+
+
+def _measure_peakmem(method, params):
+    if tracemalloc is None:
+        return float('nan')
+    tracemalloc.start()
+    try:
+        method(*params)
+        return tracemalloc.get_traced_memory()[1] / 1024. ** 2
+    finally:
+        tracemalloc.stop()
+
+
+def _iter_benchmarks(pattern=''):
+    """Yield the benchmark classes and the names of their methods."""
+    for class_name, klass in sorted(inspect.getmembers(benchmarks,
+                                                       inspect.isclass)):
+        if klass.__module__ != benchmarks.__name__:
+            continue
+        methods = [name for name in sorted(dir(klass))
+                   if name.startswith(('time_', 'peakmem_')) and
+                   pattern in '%s.%s' % (class_name, name)]
+        if methods:
+            yield class_name, klass, methods
+
+
+def run(pattern='', n_repeats=3):
+    """Run the benchmarks and return their results as a list of dicts."""
+    results = []
+    for class_name, klass, methods in _iter_benchmarks(pattern):
+        for params in itertools.product(*klass.params):
+            instance = klass()
+            instance.setup(*params)
+            for name in methods:
+                method = getattr(instance, name)
+                if name.startswith('time_'):
+                    value, unit = _measure_time(method, params,
+                                                n_repeats), 's'
+                else:
+                    value, unit = _measure_peakmem(method, params), 'MB'
+                result = dict(benchmark='%s.%s' % (class_name, name),
+                              params=dict(zip(klass.param_names, params)),
+                              value=value, unit=unit)
+                results.append(result)
+                print('%-45s %-25s %10.3f %s' % (
+                    result['benchmark'],
+                    ', '.join('%s=%s' % item
+                              for item in sorted(result['params'].items())),
+                    value, unit))
+                sys.stdout.flush()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('pattern', nargs='?', default='',
+                        help='run only the benchmarks matching this pattern')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='number of repeats of the time measures')
+    parser.add_argument('--json', help='file to save the results to')
+    args = parser.parse_args(argv)
+
+    results = run(args.pattern, n_repeats=args.repeat)
+    if args.json is not None:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=1)
+
+
+if __name__ == '__main__':
+    main()
@@ -58,3 +58,12 @@ EXPAND_PATH_WILDCARDS = True
 # structures
 # This  is used in nilearn._utils.cache_mixin
 CHECK_CACHE_VERSION = True
+
+# Precision of floating point computations, 'double' (default) or 'single'.
+# With 'single', signal cleaning, resampling, smoothing, maskers and
+# decomposition estimators produce and work on float32 arrays, which halves
+# their memory usage. Their results then match those obtained in double
+# precision within a relative tolerance of 1e-4 (1e-3 for decompositions,
+# whose components are defined up to the convergence of their solvers).
+# This is used in nilearn._utils.numpy_conversions
+FLOAT_PRECISION = 'double'
@@ -6,6 +6,6 @@ from .niimg import _repr_niimgs, copy_img, load_niimg
 
 from .numpy_conversions import as_ndarray
 
-from .cache_mixin import CacheMixin
+from .cache_mixin import CacheMixin, ManagedMemory
 
 from .logger import _compose_err_msg
@@ -8,15 +8,24 @@ import json
 import warnings
 import os
 import shutil
+import threading
+import time
+import functools
 from distutils.version import LooseVersion
 
+import numpy as np
 import nibabel
 from sklearn.externals.joblib import Memory
+from sklearn.externals.joblib import hashing
+from sklearn.externals.joblib.memory import MemorizedFunc
+from sklearn.externals.joblib.func_inspect import filter_args, get_func_name
 
 MEMORY_CLASSES = (Memory, )
+JoblibMemorizedFunc = None
 
 try:
     from joblib import Memory as JoblibMemory
+    from joblib.memory import MemorizedFunc as JoblibMemorizedFunc
     MEMORY_CLASSES = (Memory, JoblibMemory)
 except ImportError:
     pass
@@ -24,9 +33,146 @@ except ImportError:
 import nilearn
 
 from .compat import _basestring
+from .niimg import _get_unloaded_proxy
 
 __CACHE_CHECKED = dict()
 
+# Parameters of the maskers that do not change their output
+_MASKER_IGNORED_PARAMS = ('memory', 'memory_level', 'verbose', 'n_jobs')
+
+
+def _niimg_fingerprint(img):
+    """Return a fingerprint of an image whose data is in a file.
+
+    The fingerprint is made of the path, size and modification time of the
+    file, and of the digest of the header and affine of the image. It is
+    None if the data of the image has been loaded, as it may then have been
+    modified in memory.
+    """
+    if _get_unloaded_proxy(img) is None:
+        return None
+    try:
+        filename = img.get_filename()
+        stat = os.stat(filename)
+    except Exception:
+        return None
+    header = img.get_header()
+    header = getattr(header, 'binaryblock', repr(header))
+    return (os.path.abspath(filename), stat.st_size, stat.st_mtime,
+            hashing.hash((header, img.get_affine())))
+
+
+def _save_niimg(hasher, img):
+    """Hash an image: file-based images are hashed by their fingerprint,
+    other images by their content."""
+    fingerprint = _niimg_fingerprint(img)
+    if fingerprint is not None:
+        hasher.save(('nilearn.niimg_file', img.__class__.__name__,
+                     fingerprint))
+    else:
+        if _get_unloaded_proxy(img) is not None:
+            # Do not keep the data in the image
+            data = np.asarray(img.dataobj)
+        else:
+            data = img.get_data()
+        header = img.get_header()
+        hasher.save(('nilearn.niimg', img.__class__.__name__,
+                     getattr(header, 'binaryblock', repr(header)),
+                     img.get_affine(), data))
+
+
+def _save_masker(hasher, masker):
+    """Hash a masker by its parameters and fitted images."""
+    params = masker.get_params(deep=False)
+    for param in _MASKER_IGNORED_PARAMS:
+        params.pop(param, None)
+    fitted = dict((name, value) for name, value in vars(masker).items()
+                  if name.endswith('_') and not name.startswith('_'))
+    hasher.save(('nilearn.masker', masker.__class__.__name__, params,
+                 fitted))
+
+
+class _FingerprintHasher(hashing.NumpyHasher):
+    """joblib hasher that hashes images and maskers by their fingerprint.
+
+    joblib hashes the arguments of cached functions by pickling them: loaded
+    images and arrays are then hashed by their whole content. Images whose
+    data is in a file are instead hashed by a fingerprint of the file, and
+    maskers by their parameters and fitted images.
+    """
+    def hash(self, obj, return_digest=True):
+        from ..input_data.base_masker import BaseMasker  # circular imports
+        self._savers = ((nibabel.spatialimages.SpatialImage, _save_niimg),
+                        (BaseMasker, _save_masker))
+        return hashing.NumpyHasher.hash(self, obj,
+                                        return_digest=return_digest)
+
+    def save(self, obj):
+        for base_class, saver in self._savers:
+            if isinstance(obj, base_class):
+                saver(self, obj)
+                return
+        hashing.NumpyHasher.save(self, obj)
+
+
+def _hash(obj, coerce_mmap=False):
+    """Same as joblib.hash, with the fingerprints of images and maskers."""
+    return _FingerprintHasher(hash_name='md5',
+                              coerce_mmap=coerce_mmap).hash(obj)
+
+
+# The running call of a _ManagedFunc in each thread, with the hash of its
+# arguments
+_MANAGED_CALL = threading.local()
+
+
+def _argument_hash(memorized_func, args, kwargs):
+    """Return the hash of the arguments of a call of a joblib
+    MemorizedFunc, computed with _hash."""
+    return _hash(filter_args(memorized_func.func, memorized_func.ignore,
+                             args, kwargs),
+                 coerce_mmap=(memorized_func.mmap_mode is not None))
+
+
+class _FingerprintArguments(object):
+    """Mixin for joblib MemorizedFunc hashing the arguments with _hash.
+
+    During a call of a _ManagedFunc, the hash it has already computed is
+    used.
+    """
+    def _get_argument_hash(self, *args, **kwargs):
+        if getattr(_MANAGED_CALL, 'memorized_func', None) is self:
+            return _MANAGED_CALL.argument_hash
+        return _argument_hash(self, args, kwargs)
+
+    # Name of the method in recent versions of joblib
+    _get_args_id = _get_argument_hash
+
+
+class _FingerprintedFunc(_FingerprintArguments, MemorizedFunc):
+    pass
+
+
+_FINGERPRINTED_CLASSES = {MemorizedFunc: _FingerprintedFunc}
+
+if JoblibMemorizedFunc not in (None, MemorizedFunc):
+    class _JoblibFingerprintedFunc(_FingerprintArguments,
+                                   JoblibMemorizedFunc):
+        pass
+
+    _FINGERPRINTED_CLASSES[JoblibMemorizedFunc] = _JoblibFingerprintedFunc
+
+
+def _fingerprint_arguments(memorized_func):
+    """Make a joblib MemorizedFunc hash its arguments with _hash.
+
+    Only this function is affected: the joblib hashers are not modified.
+    """
+    fingerprinted_class = _FINGERPRINTED_CLASSES.get(type(memorized_func))
+    if fingerprinted_class is not None:
+        memorized_func.__class__ = fingerprinted_class
+    return memorized_func
+
 
 def _safe_cache(memory, func, **kwargs):
     """ A wrapper for mem.cache that flushes the cache if the version
@@ -90,6 +236,165 @@ def _safe_cache(memory, func, **kwargs):
     return memory.cache(func, **kwargs)
 
 
+# Statistics of the functions cached by ManagedMemory objects, indexed by
+# their cache directory. They are shared by the copies of a ManagedMemory
+# (eg in cloned estimators).
+_CACHE_STATS = dict()
+
+
+def _get_dir_size(path):
+    """Return the total size in bytes of the files in a directory."""
+    size = 0
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            try:
+                size += os.path.getsize(os.path.join(dirpath, filename))
+            except OSError:
+                # The file has been removed meanwhile
+                pass
+    return size
+
+
+class _ManagedFunc(object):
+    """Wrapper of a joblib MemorizedFunc that records cache statistics and
+    evicts the least recently used results above a size budget.
+    """
+    def __init__(self, memorized_func, cachedir, func_bytes_limit=None):
+        self.memorized_func = memorized_func
+        self.cachedir = cachedir
+        self.func_bytes_limit = func_bytes_limit
+        module, name = get_func_name(memorized_func.func)
+        self.func_dir = os.path.join(cachedir, *(module + [name]))
+        func_name = '.'.join(module + [name])
+        stats = _CACHE_STATS.setdefault(cachedir, dict())
+        if func_name not in stats:
+            # The size of the existing results is computed only once
+            stats[func_name] = dict(hits=0, misses=0, compute_time=0.,
+                                    size=_get_dir_size(self.func_dir),
+                                    evictions=0)
+        self.stats = stats[func_name]
+
+    def __getattr__(self, name):
+        if name == 'memorized_func':
+            # Not set yet, eg on a copy being built
+            raise AttributeError(name)
+        return getattr(self.memorized_func, name)
+
+    def __reduce__(self):
+        # Copies, eg sent to other processes, use the statistics of the
+        # cache directory in their process
+        return (self.__class__, (self.memorized_func, self.cachedir,
+                                 self.func_bytes_limit))
+
+    def __call__(self, *args, **kwargs):
+        memorized_func = self.memorized_func
+        # Same hash as the one computed by joblib to store the results. It
+        # is given to joblib, that does not compute it again.
+        argument_hash = _argument_hash(memorized_func, args, kwargs)
+        output_dir = os.path.join(self.func_dir, argument_hash)
+        hit = os.path.exists(output_dir)
+        t0 = time.time()
+        _MANAGED_CALL.memorized_func = memorized_func
+        _MANAGED_CALL.argument_hash = argument_hash
+        try:
+            output = memorized_func(*args, **kwargs)
+        finally:
+            _MANAGED_CALL.memorized_func = None
+        if hit:
+            self.stats['hits'] += 1
+            try:
+                # The modification time of the directory records the last
+                # use of the result
+                os.utime(output_dir, None)
+            except OSError:
+                pass
+        else:
+            self.stats['misses'] += 1
+            self.stats['compute_time'] += time.time() - t0
+            self._reduce_size(keep=argument_hash)
+        return output
+
+    def _reduce_size(self, keep=None):
+        """Remove the least recently used results until the size of the
+        cache of the function is within budget. The result keep is not
+        removed."""
+        if not os.path.isdir(self.func_dir):
+            return
+        entries = []
+        for entry in os.listdir(self.func_dir):
+            path = os.path.join(self.func_dir, entry)
+            if os.path.isdir(path):
+                try:
+                    entries.append((os.path.getmtime(path), entry,
+                                    _get_dir_size(path)))
+                except OSError:
+                    pass
+        size = sum(entry_size for _, _, entry_size in entries)
+        if self.func_bytes_limit is not None:
+            for _, entry, entry_size in sorted(entries):
+                if size <= self.func_bytes_limit:
+                    break
+                if entry == keep:
+                    continue
+                shutil.rmtree(os.path.join(self.func_dir, entry),
+                              ignore_errors=True)
+                size -= entry_size
+                self.stats['evictions'] += 1
+        self.stats['size'] = size
+
+
+class ManagedMemory(Memory):
+    """joblib.Memory with a size budget per function and cache statistics.
+
+    The results of each cached function are limited to func_bytes_limit
+    bytes on disk: above it, the least recently used results are removed.
+    Cache hits, misses, computation time and size are recorded for each
+    function. Can be given as the memory parameter of nilearn estimators.
+
+    Parameters
+    ----------
+    cachedir: string or None
+        Path of the cache directory. If None, no caching is done.
+
+    func_bytes_limit: int, optional
+        Maximum size in bytes of the results cached for each function. If
+        None, the size is not limited.
+
+    kwargs: keyword arguments
+        Passed to joblib.Memory.
+    """
+    def __init__(self, cachedir=None, func_bytes_limit=None, **kwargs):
+        Memory.__init__(self, cachedir=cachedir, **kwargs)
+        self.func_bytes_limit = func_bytes_limit
+
+    def cache(self, func=None, **kwargs):
+        if func is None:
+            return functools.partial(self.cache, **kwargs)
+        memorized_func = Memory.cache(self, func, **kwargs)
+        if self.cachedir is None:
+            # No caching
+            return memorized_func
+        return _ManagedFunc(_fingerprint_arguments(memorized_func), self.cachedir,
+                            func_bytes_limit=self.func_bytes_limit)
+
+    def cache_stats(self):
+        """Return the statistics of the cached functions.
+
+        Returns
+        -------
+        stats: dict
+            For each cached function (identified by its full name), a
+            dictionary with the number of cache hits and misses, the total
+            time spent computing results ('compute_time', in seconds), the
+            size of its cached results ('size', in bytes) and the number of
+            results removed to fit in the budget ('evictions').
+        """
+        if self.cachedir is None:
+            return dict()
+        return dict((name, dict(stats)) for name, stats in
+                    _CACHE_STATS.get(self.cachedir, dict()).items())
+
+
 def cache(func, memory, func_memory_level=None, memory_level=None,
           **kwargs):
     """ Return a joblib.Memory object.
@@ -106,7 +411,8 @@ def cache(func, memory, func_memory_level=None, memory_level=None,
         The function which output is to be cached.
 
     memory: instance of joblib.Memory or string
-        Used to cache the function call.
+        Used to cache the function call. A ManagedMemory limits the size of
+        the cache and records statistics.
 
     func_memory_level: int, optional
         The memory_level from which caching must be enabled for the wrapped
@@ -157,7 +463,7 @@ def cache(func, memory, func_memory_level=None, memory_level=None,
                           stacklevel=2)
     else:
         memory = Memory(cachedir=None, verbose=verbose)
-    return _safe_cache(memory, func, **kwargs)
+    return _fingerprint_arguments(_safe_cache(memory, func, **kwargs))
 
 
 class CacheMixin(object):
@@ -170,6 +476,9 @@ class CacheMixin(object):
     defined by this class. Caching is performed only if the user-specified
     cache level (self._memory_level) is greater than the value given as a
     parameter to self._cache(). See _cache() documentation for details.
+
+    self.memory can be a ManagedMemory, to bound the size of the cache of
+    each function and query cache statistics.
     """
     def _cache(self, func, func_memory_level=1, **kwargs):
         """Return a joblib.Memory object.
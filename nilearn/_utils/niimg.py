@@ -28,6 +28,51 @@ def _safe_get_data(img):
     return img.get_data()
 
 
+def _get_unloaded_proxy(img):
+    """Returns the array proxy of an image whose data has not been loaded
+    yet, None otherwise.
+    """
+    dataobj = getattr(img, 'dataobj', None)
+    if not getattr(dataobj, 'is_proxy', False):
+        return None
+    if getattr(img, '_data_cache', None) is not None:
+        return None
+    return dataobj
+
+
+def _is_compressed(img):
+    """Returns True if the data of the image is in a compressed file.
+    """
+    try:
+        filename = img.get_filename()
+    except Exception:
+        return False
+    return (isinstance(filename, _basestring)
+            and filename.endswith(('.gz', '.bz2')))
+
+
+def _get_volumes(img, index):
+    """Index the data of a 4D image in the fourth dimension.
+
+    If the data of the image has not been loaded yet, only the volumes
+    between the first and the last selected ones are read from the disk,
+    and the data is not kept in the image. For a compressed file, the
+    decompression stops after the last selected volume.
+    """
+    proxy = _get_unloaded_proxy(img)
+    if proxy is None:
+        return img.get_data()[:, :, :, index]
+    volumes = np.arange(img.shape[3])[index]
+    if volumes.size == 0:
+        return img.get_data()[:, :, :, index]
+    start, stop = volumes.min(), volumes.max() + 1
+    data = np.asarray(proxy[:, :, :, start:stop])
+    if volumes.ndim == 1 and np.all(np.diff(volumes) == 1):
+        # Contiguous volumes: no need for a copy
+        return data
+    return data[:, :, :, volumes - start]
+
+
 def _get_data_dtype(img):
     """Returns the dtype of an image.
     If the image is non standard (no get_data_dtype member), this function
@@ -111,6 +156,36 @@ def load_niimg(niimg, dtype=None):
     return niimg
 
 
+def _get_img_header_info(niimg):
+    """Get the shape, affine and data type of an image, without reading its
+    data.
+
+    Parameters
+    ----------
+    niimg: string or nibabel SpatialImage
+        Path to an image file, or image object. For a file, only its header
+        is read (nibabel loads data lazily).
+
+    Returns
+    -------
+    shape: tuple
+        Shape of the image.
+
+    affine: numpy.ndarray
+        Affine of the image.
+
+    dtype: numpy dtype
+        Data type of the image, as stored on disk.
+    """
+    if isinstance(niimg, _basestring):
+        niimg = nibabel.load(niimg)
+    elif not isinstance(niimg, nibabel.spatialimages.SpatialImage):
+        raise TypeError("Data given cannot be loaded because it is"
+                        " not compatible with nibabel format:\n"
+                        + short_repr(niimg))
+    return niimg.shape, niimg.get_affine(), _get_data_dtype(niimg)
+
+
 def copy_img(img):
     """Copy an image to a nibabel.Nifti1Image.
 
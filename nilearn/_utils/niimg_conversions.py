@@ -6,25 +6,87 @@ Conversion utilities.
 import warnings
 import os.path
 import glob
+import threading
+import collections
+try:
+    from queue import Queue
+except ImportError:
+    # Python 2
+    from Queue import Queue
 
 import nilearn as ni
 import numpy as np
 import itertools
+import nibabel
 from sklearn.externals.joblib import Memory
 
 from .cache_mixin import cache
-from .niimg import _safe_get_data, load_niimg
+from .niimg import (_safe_get_data, load_niimg, _get_img_header_info,
+                    _get_volumes, _get_unloaded_proxy, _is_compressed)
 from .compat import _basestring, izip
+from .numpy_conversions import _check_float_precision
 
 from .exceptions import DimensionError
 
+# Size of the reads when prefetching image files
+_PREFETCH_CHUNK_SIZE = 16 * 1024 ** 2
+
+
+def _is_single_img(niimg):
+    """Whether niimg is a single image (an image object, or the path to an
+    existing image file), whose header can be read on its own."""
+    if isinstance(niimg, nibabel.spatialimages.SpatialImage):
+        return True
+    if isinstance(niimg, _basestring):
+        if ni.EXPAND_PATH_WILDCARDS and glob.has_magic(niimg):
+            return False
+        return os.path.exists(niimg)
+    return False
+
+
+def _check_niimg_header(niimg, ensure_ndim=None):
+    """Check the dimensionality of a niimg and return its shape and affine.
+
+    For single images, only the header is read. Other Niimg-like objects
+    (eg lists of images) are loaded with check_niimg.
+
+    Parameters
+    ----------
+    niimg: Niimg-like object
+        See http://nilearn.github.io/manipulating_visualizing/manipulating_images.html#niimg.
+
+    ensure_ndim: integer {3, 4}, optional
+        Indicate the dimensionality of the expected niimg. An
+        error is raised if the niimg is of another dimensionality. As in
+        check_niimg, 4D images with a single scan are considered 3D.
+
+    Returns
+    -------
+    shape: tuple
+        Shape of the niimg, as check_niimg would return it.
+
+    affine: numpy.ndarray
+        Affine of the niimg.
+    """
+    if not _is_single_img(niimg):
+        niimg = check_niimg(niimg, ensure_ndim=ensure_ndim)
+        return niimg.shape, niimg.get_affine()
+
+    shape, affine, _ = _get_img_header_info(niimg)
+    if ensure_ndim == 3 and len(shape) == 4 and shape[3] == 1:
+        shape = shape[:3]
+    if ensure_ndim is not None and len(shape) != ensure_ndim:
+        raise DimensionError(len(shape), ensure_ndim)
+    return shape, affine
+
+
 def _check_fov(img, affine, shape):
     """ Return True if img's field of view correspond to given
         shape and affine, False elsewhere.
     """
-    img = check_niimg(img)
-    return (img.shape[:3] == shape and
-            np.allclose(img.get_affine(), affine))
+    img_shape, img_affine = _check_niimg_header(img)
+    return (img_shape[:3] == shape and
+            np.allclose(img_affine, affine))
 
 
 def _check_same_fov(*args, **kwargs):
@@ -71,15 +133,111 @@ def _index_img(img, index):
     from ..image import new_img_like  # avoid circular imports
 
     """Helper function for check_niimg_4d."""
+    # If the data is still on disk, only the required volumes are read
     return new_img_like(
-        img, img.get_data()[:, :, :, index], img.get_affine(),
+        img, _get_volumes(img, index), img.get_affine(),
         copy_header=True)
 
 
+def _is_img_file(niimg):
+    """Whether niimg is the path to a single image file."""
+    return isinstance(niimg, _basestring) and _is_single_img(niimg)
+
+
+def _read_niimg_file(filename):
+    """Load an image file in advance of its use.
+
+    The data of a compressed file is decompressed and loaded in the image.
+    An uncompressed file is only read from the disk: its data is not loaded
+    in the image, that reads it from the file when needed, now typically
+    from the cache of the operating system. It can thus still be hashed by
+    its file or masked by blocks.
+
+    Files that cannot be loaded are returned unchanged: the error is raised
+    later, by check_niimg.
+    """
+    try:
+        img = nibabel.load(filename)
+        if _is_compressed(img):
+            img.get_data()
+        else:
+            paths = set(file_holder.filename
+                        for file_holder in img.file_map.values())
+            for path in paths:
+                with open(path, 'rb') as img_file:
+                    while img_file.read(_PREFETCH_CHUNK_SIZE):
+                        pass
+    except Exception:
+        return filename
+    return img
+
+
+def _load_niimg_files(filenames, imgs):
+    """Load the image files put in the queue filenames, until None is put,
+    and put the images in the queue imgs."""
+    while True:
+        filename = filenames.get()
+        if filename is None:
+            return
+        imgs.put(_read_niimg_file(filename))
+
+
+def _prefetch_niimgs(niimgs, n_prefetch=1):
+    """Iterate over niimgs, loading the next image files in the background.
+
+    The next n_prefetch image files are loaded by a background thread while
+    the current image is processed, so that reading and decompressing
+    their data does not wait. niimgs is iterated over in the calling
+    thread, and the background thread is only started for the first image
+    file.
+
+    Parameters
+    ----------
+    niimgs: iterable of Niimg-like objects
+        Images to iterate over. Paths to image files are yielded as nibabel
+        images, loaded by _read_niimg_file. Other objects are yielded
+        unchanged.
+
+    n_prefetch: integer, optional
+        Maximum number of images read ahead of the current one.
+    """
+    filenames = Queue()
+    imgs = Queue(maxsize=n_prefetch + 1)
+    thread = None
+    # The niimgs read ahead, and whether they are being loaded
+    ahead = collections.deque()
+    niimgs = iter(niimgs)
+    try:
+        while True:
+            while len(ahead) <= n_prefetch:
+                try:
+                    niimg = next(niimgs)
+                except StopIteration:
+                    break
+                is_file = _is_img_file(niimg)
+                if is_file:
+                    if thread is None:
+                        thread = threading.Thread(target=_load_niimg_files,
+                                                  args=(filenames, imgs))
+                        thread.daemon = True
+                        thread.start()
+                    filenames.put(niimg)
+                ahead.append((niimg, is_file))
+            if not ahead:
+                return
+            niimg, is_file = ahead.popleft()
+            if is_file:
+                niimg = imgs.get()
+            yield niimg
+    finally:
+        if thread is not None:
+            filenames.put(None)
+
+
 def _iter_check_niimg(niimgs, ensure_ndim=None, atleast_4d=False,
                       target_fov=None, dtype=None,
                       memory=Memory(cachedir=None),
-                      memory_level=0, verbose=0):
+                      memory_level=0, verbose=0, n_prefetch=0):
     """Iterate over a list of niimgs and do sanity checks and resampling
 
     Parameters
@@ -103,6 +261,10 @@ def _iter_check_niimg(niimgs, ensure_ndim=None, atleast_4d=False,
         data will be converted to int32 if dtype is discrete and float32 if it
         is continuous.
 
+    n_prefetch: integer, optional
+        If positive, the next n_prefetch image files are loaded by a
+        background thread while the current image is processed.
+
     See also
     --------
         check_niimg, check_niimg_3d, check_niimg_4d
@@ -115,6 +277,9 @@ def _iter_check_niimg(niimgs, ensure_ndim=None, atleast_4d=False,
             raise ValueError("No files matching path: %s" % niimgs)
         niimgs = niimgs_list
 
+    if n_prefetch > 0:
+        niimgs = _prefetch_niimgs(niimgs, n_prefetch=n_prefetch)
+
     ref_fov = None
     resample_to_first_img = False
     ndim_minus_one = ensure_ndim - 1 if ensure_ndim is not None else None
@@ -143,7 +308,8 @@ def _iter_check_niimg(niimgs, ensure_ndim=None, atleast_4d=False,
                                   func_memory_level=2,
                                   memory_level=memory_level)(
                             niimg, target_affine=ref_fov[0],
-                            target_shape=ref_fov[1])
+                            target_shape=ref_fov[1],
+                            float_precision=_check_float_precision())
                 else:
                     raise ValueError(
                         "Field of view of image #%d is different from "
@@ -267,9 +433,12 @@ def check_niimg(niimg, ensure_ndim=None, atleast_4d=False, dtype=None,
 
     if ensure_ndim == 3 and len(niimg.shape) == 4 and niimg.shape[3] == 1:
         # "squeeze" the image.
-        data = _safe_get_data(niimg)
+        if _get_unloaded_proxy(niimg) is not None:
+            data = _get_volumes(niimg, 0)
+        else:
+            data = _safe_get_data(niimg)[:, :, :, 0]
         affine = niimg.get_affine()
-        niimg = new_img_like(niimg, data[:, :, :, 0], affine)
+        niimg = new_img_like(niimg, data, affine)
     if atleast_4d and len(niimg.shape) == 3:
         data = niimg.get_data().view()
         data.shape = data.shape + (1, )
@@ -279,6 +448,10 @@ def check_niimg(niimg, ensure_ndim=None, atleast_4d=False, dtype=None,
         raise DimensionError(len(niimg.shape), ensure_ndim)
 
     if return_iterator:
+        if _is_compressed(niimg):
+            # Reading volumes one at a time would decompress the file
+            # repeatedly: load all the data at once
+            niimg.get_data()
         return (_index_img(niimg, i) for i in range(niimg.shape[3]))
 
     return niimg
@@ -431,14 +604,16 @@ def concat_niimgs(niimgs, dtype=np.float32, ensure_ndim=None,
 
     lengths = [first_niimg.shape[-1] if ndim == 4 else 1]
     for niimg in literator:
-        # We check the dimensionality of the niimg
+        # We check the dimensionality of the niimg. Only the headers of
+        # image files are read here: their data is read once, when it is
+        # copied in the output array
         try:
-            niimg = check_niimg(niimg, ensure_ndim=ndim)
+            shape, _ = _check_niimg_header(niimg, ensure_ndim=ndim)
         except DimensionError as exc:
             # Keep track of the additional dimension in the error
             exc.increment_stack_counter()
             raise
-        lengths.append(niimg.shape[-1] if ndim == 4 else 1)
+        lengths.append(shape[-1] if ndim == 4 else 1)
 
     target_shape = first_niimg.shape[:3]
     data = np.ndarray(target_shape + (sum(lengths), ),
@@ -446,7 +621,7 @@ def concat_niimgs(niimgs, dtype=np.float32, ensure_ndim=None,
     cur_4d_index = 0
     for index, (size, niimg) in enumerate(izip(lengths, _iter_check_niimg(
             iterator, atleast_4d=True, target_fov=target_fov,
-            memory=memory, memory_level=memory_level))):
+            memory=memory, memory_level=memory_level, n_prefetch=2))):
 
         if verbose > 0:
             if isinstance(niimg, _basestring):
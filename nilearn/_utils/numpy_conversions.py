@@ -9,6 +9,51 @@ import numpy as np
 from .compat import _basestring
 
 
+def _check_float_precision(float_precision=None):
+    """Return the precision of the computations on floating point data.
+
+    Parameters
+    ----------
+    float_precision: {'single', 'double'}, optional
+        Precision to check. If None, nilearn.FLOAT_PRECISION is used.
+
+    Returns
+    -------
+    float_precision: {'single', 'double'}
+        The precision. It is given explicitly to cached functions, so that
+        it is part of the key of their results.
+    """
+    if float_precision is None:
+        import nilearn  # avoid circular imports
+        float_precision = nilearn.FLOAT_PRECISION
+    if float_precision not in ('single', 'double'):
+        raise ValueError("nilearn.FLOAT_PRECISION must be 'single' or "
+                         "'double', got %r" % float_precision)
+    return float_precision
+
+
+def _get_float_dtype(dtype=np.float64, float_precision=None):
+    """Return the floating point dtype to use for computations.
+
+    Parameters
+    ----------
+    dtype: numpy dtype, optional
+        dtype used in double precision mode.
+
+    float_precision: {'single', 'double'}, optional
+        Precision of the computations. If None, nilearn.FLOAT_PRECISION is
+        used.
+
+    Returns
+    -------
+    dtype: numpy dtype
+        float32 in single precision mode, dtype otherwise.
+    """
+    if _check_float_precision(float_precision) == 'single':
+        return np.dtype(np.float32)
+    return np.dtype(dtype)
+
+
 def _asarray(arr, dtype=None, order=None):
     # np.asarray does not take "K" and "A" orders in version 1.3.0
     if order in ("K", "A", None):
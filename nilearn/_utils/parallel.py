@@ -0,0 +1,33 @@
+"""
+Helpers to split computations in jobs with joblib
+"""
+# License: simplified BSD
+
+import numpy as np
+from sklearn.externals.joblib import cpu_count
+
+
+def _effective_n_jobs(n_jobs):
+    """Return the number of jobs to run for the n_jobs parameter.
+
+    As in joblib, negative values count from the number of CPUs: -1 means
+    all the CPUs, -2 all the CPUs but one, etc. At least one job is run.
+    """
+    if n_jobs < 0:
+        n_jobs = cpu_count() + 1 + n_jobs
+    return max(1, n_jobs)
+
+
+def _split_batches(n_items, n_jobs):
+    """Split the indices of n_items items in contiguous batches, one per
+    job, and no more than there are items.
+
+    Returns
+    -------
+    batches: list of numpy.ndarray
+        The indices of the items of each batch. There is no empty batch.
+    """
+    n_batches = min(_effective_n_jobs(n_jobs), n_items)
+    if n_batches == 0:
+        return []
+    return np.array_split(np.arange(n_items), n_batches)
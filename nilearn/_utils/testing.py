@@ -9,6 +9,7 @@ import os
 import re
 import sys
 import tempfile
+import threading
 import warnings
 
 import numpy as np
@@ -60,6 +61,54 @@ except ImportError:
         return output
 
 
+try:
+    from http.server import HTTPServer, SimpleHTTPRequestHandler
+except ImportError:
+    # Python 2
+    from BaseHTTPServer import HTTPServer
+    from SimpleHTTPServer import SimpleHTTPRequestHandler
+
+
+@contextlib.contextmanager
+def serve_directory(path):
+    """Context manager serving the files of a local directory over HTTP.
+
+    The server runs in a background thread, on a free port of localhost. It
+    is a stand-in for the remote servers of the dataset fetchers, so that
+    downloads can be tested (and timed) offline.
+
+    Parameters
+    ==========
+    path: string
+        Directory whose content is served.
+
+    Returns
+    =======
+    url: string
+        Base url of the server, eg 'http://127.0.0.1:35761/'.
+    """
+    path = os.path.abspath(path)
+
+    class Handler(SimpleHTTPRequestHandler):
+        def translate_path(self, url_path):
+            url_path = _urllib.parse.urlparse(url_path).path
+            return os.path.join(path, *url_path.split('/'))
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    try:
+        yield 'http://127.0.0.1:%d/' % server.server_address[1]
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
 class MockRequest(object):
     def __init__(self, url):
         self.url = url
@@ -9,7 +9,8 @@ import nibabel
 from sklearn.datasets.base import Bunch
 
 from .utils import (_get_dataset_dir, _fetch_files, _get_dataset_descr,
-                    _read_md5_sum_file, _tree, _filter_columns)
+                    _read_md5_sum_file, _tree, _filter_columns,
+                    _load_cached_table)
 
 from .._utils.compat import BytesIO, _basestring, _urllib
 
@@ -391,7 +392,7 @@ def fetch_nyu_rest(n_subjects=None, sessions=[1], data_dir=None, resume=True,
 
 
 def fetch_adhd(n_subjects=None, data_dir=None, url=None, resume=True,
-               verbose=1):
+               verbose=1, n_jobs=1):
     """Download and load the ADHD resting-state dataset.
 
     Parameters
@@ -408,6 +409,9 @@ def fetch_adhd(n_subjects=None, data_dir=None, url=None, resume=True,
         Override download URL. Used for test only (or if you setup a mirror of
         the data).
 
+    n_jobs: int, optional
+        Number of files downloaded simultaneously.
+
     Returns
     -------
     data: sklearn.datasets.base.Bunch
@@ -460,8 +464,9 @@ def fetch_adhd(n_subjects=None, data_dir=None, url=None, resume=True,
                               verbose=verbose)[0]
 
     ## Load the csv file
-    phenotypic = np.genfromtxt(phenotypic, names=True, delimiter=',',
-                               dtype=None)
+    phenotypic = _load_cached_table(
+        phenotypic, lambda path: np.genfromtxt(path, names=True,
+                                               delimiter=',', dtype=None))
 
     # Keep phenotypic information for selected subjects
     int_ids = np.asarray(ids, dtype=int)
@@ -478,11 +483,11 @@ def fetch_adhd(n_subjects=None, data_dir=None, url=None, resume=True,
 
     functionals = _fetch_files(
         data_dir, zip(functionals, archives, (opts,) * n_subjects),
-        resume=resume, verbose=verbose)
+        resume=resume, n_jobs=n_jobs, verbose=verbose)
 
     confounds = _fetch_files(
         data_dir, zip(confounds, archives, (opts,) * n_subjects),
-        resume=resume, verbose=verbose)
+        resume=resume, n_jobs=n_jobs, verbose=verbose)
 
     return Bunch(func=functionals, confounds=confounds,
                  phenotypic=phenotypic, description=fdescr)
@@ -618,7 +623,8 @@ def fetch_miyawaki2008(data_dir=None, url=None, resume=True, verbose=1):
 
 def fetch_localizer_contrasts(contrasts, n_subjects=None, get_tmaps=False,
                               get_masks=False, get_anats=False,
-                              data_dir=None, url=None, resume=True, verbose=1):
+                              data_dir=None, url=None, resume=True,
+                              verbose=1, n_jobs=1):
     """Download and load Brainomics Localizer dataset (94 subjects).
 
     "The Functional Localizer is a simple and fast acquisition
@@ -737,6 +743,9 @@ def fetch_localizer_contrasts(contrasts, n_subjects=None, get_tmaps=False,
     verbose: int
         Verbosity level (0 means no message).
 
+    n_jobs: int, optional
+        Number of files downloaded simultaneously.
+
     Returns
     -------
     data: Bunch
@@ -924,7 +933,7 @@ def fetch_localizer_contrasts(contrasts, n_subjects=None, get_tmaps=False,
     data_dir = _get_dataset_dir(dataset_name, data_dir=data_dir,
                                 verbose=verbose)
     fdescr = _get_dataset_descr(dataset_name)
-    files = _fetch_files(data_dir, filenames, verbose=verbose)
+    files = _fetch_files(data_dir, filenames, n_jobs=n_jobs, verbose=verbose)
     anats = None
     masks = None
     tmaps = None
@@ -995,10 +1004,31 @@ def fetch_localizer_calculation_task(n_subjects=None, data_dir=None, url=None,
     return data
 
 
+def _read_abide_phenotypic(path_csv):
+    """Parse the phenotypic CSV file of ABIDE into a record array"""
+    # Note: the phenotypic file contains string that contains comma which mess
+    # up numpy array csv loading. This is why I do a pass to remove the last
+    # field. This can be
+    # done simply with pandas but we don't want such dependency ATM
+    # pheno = pandas.read_csv(path_csv).to_records()
+    with open(path_csv, 'r') as pheno_f:
+        pheno = ['i' + pheno_f.readline()]
+
+        # This regexp replaces commas between double quotes
+        for line in pheno_f:
+            pheno.append(re.sub(r',(?=[^"]*"(?:[^"]*"[^"]*")*[^"]*$)', ";", line))
+
+    # bytes (encode()) needed for python 2/3 compat with numpy
+    pheno = '\n'.join(pheno).encode()
+    pheno = BytesIO(pheno)
+    return np.recfromcsv(pheno, comments='$', case_sensitive=True)
+
+
 def fetch_abide_pcp(data_dir=None, n_subjects=None, pipeline='cpac',
                     band_pass_filtering=False, global_signal_regression=False,
                     derivatives=['func_preproc'],
-                    quality_checked=True, url=None, verbose=1, **kwargs):
+                    quality_checked=True, url=None, verbose=1, n_jobs=1,
+                    **kwargs):
     """ Fetch ABIDE dataset
 
     Fetch the Autism Brain Imaging Data Exchange (ABIDE) dataset wrt criteria
@@ -1039,6 +1069,9 @@ def fetch_abide_pcp(data_dir=None, n_subjects=None, pipeline='cpac',
         if true (default), restrict the list of the subjects to the one that
         passed quality assessment for all raters.
 
+    n_jobs: int, optional
+        Number of files downloaded simultaneously.
+
     kwargs: parameter list, optional
         Any extra keyword argument will be used to filter downloaded subjects
         according to the CSV phenotypic file. Some examples of filters are
@@ -1117,22 +1150,9 @@ def fetch_abide_pcp(data_dir=None, n_subjects=None, pipeline='cpac',
     path_csv = _fetch_files(data_dir, [(csv, url + '/' + csv, {})],
                             verbose=verbose)[0]
 
-    # Note: the phenotypic file contains string that contains comma which mess
-    # up numpy array csv loading. This is why I do a pass to remove the last
-    # field. This can be
-    # done simply with pandas but we don't want such dependency ATM
-    # pheno = pandas.read_csv(path_csv).to_records()
-    with open(path_csv, 'r') as pheno_f:
-        pheno = ['i' + pheno_f.readline()]
-
-        # This regexp replaces commas between double quotes
-        for line in pheno_f:
-            pheno.append(re.sub(r',(?=[^"]*"(?:[^"]*"[^"]*")*[^"]*$)', ";", line))
-
-    # bytes (encode()) needed for python 2/3 compat with numpy
-    pheno = '\n'.join(pheno).encode()
-    pheno = BytesIO(pheno)
-    pheno = np.recfromcsv(pheno, comments='$', case_sensitive=True)
+    # The parsed CSV is cached in binary form next to it
+    pheno = _load_cached_table(path_csv, _read_abide_phenotypic)
+    pheno = pheno.view(np.recarray)
 
     # First, filter subjects with no filename
     pheno = pheno[pheno['FILE_ID'] != b'no_filename']
@@ -1158,7 +1178,7 @@ def fetch_abide_pcp(data_dir=None, n_subjects=None, pipeline='cpac',
         files = [(file_id + '_' + derivative + ext,
                   '/'.join([url, derivative, file_id + '_' + derivative + ext]),
                   {}) for file_id in file_ids]
-        files = _fetch_files(data_dir, files, verbose=verbose)
+        files = _fetch_files(data_dir, files, n_jobs=n_jobs, verbose=verbose)
         # Load derivatives if needed
         if ext == '.1D':
             files = [np.loadtxt(f) for f in files]
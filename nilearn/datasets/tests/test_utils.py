@@ -18,7 +18,8 @@ from nose.tools import assert_true, assert_false, assert_equal
 
 from nilearn import datasets
 from nilearn._utils.testing import (mock_request, wrap_chunk_read_,
-                                    FetchFilesMock, assert_raises_regex)
+                                    FetchFilesMock, assert_raises_regex,
+                                    assert_warns, serve_directory)
 
 
 currdir = os.path.dirname(os.path.abspath(__file__))
@@ -59,7 +60,7 @@ def teardown_mock(utils_mod=datasets.utils, dataset_mod=datasets.utils):
     utils_mod._urllib.request = original_url_request
 
     global original_chunk_read
-    utils_mod.chunk_read_ = original_chunk_read
+    utils_mod._chunk_read_ = original_chunk_read
 
     global original_fetch_files
     dataset_mod._fetch_files = original_fetch_files
@@ -271,6 +272,45 @@ def test_filter_columns():
     assert_equal(np.sum(f), 333)
 
 
+def test_filter_columns_many_values():
+    values = np.asarray(list(zip(np.arange(1000), np.arange(1000) % 7)),
+                        dtype=[('ID', int), ('SITE', int)])
+    ids = list(range(0, 1000, 3)) + [(990, None)]
+    f = datasets.utils._filter_columns(values, {'ID': ids})
+    expected = np.logical_or(values['ID'] % 3 == 0, values['ID'] >= 990)
+    np.testing.assert_array_equal(f, expected)
+
+    f = datasets.utils._filter_columns(values, {'ID': ids, 'SITE': [1, 2]})
+    np.testing.assert_array_equal(
+        f, np.logical_and(expected, np.in1d(values['SITE'], [1, 2])))
+
+
+@with_setup(setup_tmpdata, teardown_tmpdata)
+def test_load_cached_table():
+    csv = os.path.join(tmpdir, 'table.csv')
+    with open(csv, 'w') as f:
+        f.write('a,b\n1,x\n2,y\n')
+    calls = []
+
+    def loader(path):
+        calls.append(path)
+        return np.recfromcsv(path)
+
+    table = datasets.utils._load_cached_table(csv, loader)
+    assert_true(os.path.exists(os.path.join(tmpdir, 'table.npz')))
+    cached_table = datasets.utils._load_cached_table(csv, loader)
+    assert_equal(len(calls), 1)
+    np.testing.assert_array_equal(table, cached_table)
+    assert_equal(table.dtype, cached_table.dtype)
+
+    # The cache is invalidated if the CSV file changes
+    with open(csv, 'w') as f:
+        f.write('a,b\n1,x\n2,y\n3,z\n')
+    table = datasets.utils._load_cached_table(csv, loader)
+    assert_equal(len(calls), 2)
+    assert_equal(len(table), 3)
+
+
 def test_uncompress():
     # Create dummy file
     fd, temp = mkstemp()
@@ -292,6 +332,17 @@ def test_uncompress():
     assert(os.path.exists(os.path.join(dtemp, temp)))
     shutil.rmtree(dtemp)
 
+    dtemp = mkdtemp()
+    ztemp = os.path.join(dtemp, 'test.tar.gz')
+    with contextlib.closing(tarfile.open(ztemp, 'w:gz')) as tar:
+        tar.add(temp)
+    datasets.utils._uncompress_file(ztemp, verbose=0)
+    assert(os.path.exists(os.path.join(dtemp, temp)))
+    # No intermediate uncompressed tarball is left
+    assert_false(os.path.exists(os.path.join(dtemp, 'test.tar')))
+    assert_false(os.path.exists(ztemp))
+    shutil.rmtree(dtemp)
+
     dtemp = mkdtemp()
     ztemp = os.path.join(dtemp, 'test.gz')
     f = gzip.open(ztemp, 'wb')
@@ -367,3 +418,166 @@ def test_fetch_files_overwrite():
     assert_true(os.path.exists(fil[0]))
     with open(fil[0], 'r') as fp:
         assert_equal(fp.read(), '')
+
+
+@with_setup(setup_tmpdata, teardown_tmpdata)
+def test_fetch_files_concurrently():
+    # Serve some files locally and download them with several threads
+    served_dir = os.path.join(tmpdir, 'served')
+    os.makedirs(os.path.join(served_dir, 'sub'))
+    names = ['%i.txt' % i for i in range(10)]
+    for name in names:
+        with open(os.path.join(served_dir, 'sub', name), 'w') as fp:
+            fp.write(name * 100)
+    md5sums = [datasets.utils._md5_sum_file(
+        os.path.join(served_dir, 'sub', name)) for name in names]
+
+    data_dir = os.path.join(tmpdir, 'data')
+    with serve_directory(served_dir) as url:
+        files = [(name, url + 'sub/' + name, dict(md5sum=md5sum))
+                 for name, md5sum in zip(names, md5sums)]
+        files_ = datasets.utils._fetch_files(data_dir, files, n_jobs=4,
+                                             verbose=0)
+        assert_equal(files_, [os.path.join(data_dir, name)
+                              for name in names])
+        for name, fil in zip(names, files_):
+            with open(fil, 'r') as fp:
+                assert_equal(fp.read(), name * 100)
+        # No temporary directory must remain
+        assert_equal(sorted(os.listdir(data_dir)),
+                     sorted(names + [datasets.utils._MANIFEST_FILE,
+                                     datasets.utils._REQUESTS_DIR]))
+
+        # A missing file aborts the fetching
+        files.append(('missing.txt', url + 'sub/missing.txt', {}))
+        os.remove(files_[0])
+        assert_raises_regex(
+            Exception, '404', datasets.utils._fetch_files, data_dir, files,
+            n_jobs=4, verbose=0)
+
+
+@with_setup(setup_tmpdata, teardown_tmpdata)
+def test_fetch_file_md5sum():
+    served_dir = os.path.join(tmpdir, 'served')
+    os.makedirs(served_dir)
+    with open(os.path.join(served_dir, 'data.txt'), 'w') as fp:
+        fp.write('some content' * 1000)
+    md5sum = datasets.utils._md5_sum_file(
+        os.path.join(served_dir, 'data.txt'))
+    data_dir = os.path.join(tmpdir, 'data')
+
+    with serve_directory(served_dir) as url:
+        # The checksum is computed while downloading, and recorded
+        fil = datasets.utils._fetch_file(url + 'data.txt', data_dir,
+                                         md5sum=md5sum, verbose=0)
+        assert_true(datasets.utils._checksum_is_recorded(
+            data_dir, 'data.txt', md5sum))
+        assert_false(datasets.utils._checksum_is_recorded(
+            data_dir, 'data.txt', 'a' * 32))
+
+        # Resuming a partial download gives the same checksum
+        os.remove(fil)
+        with open(fil + '.part', 'w') as fp:
+            fp.write('some content' * 10)
+        fil = datasets.utils._fetch_file(url + 'data.txt', data_dir,
+                                         md5sum=md5sum, verbose=0)
+        assert_equal(datasets.utils._md5_sum_file(fil), md5sum)
+
+        # A modified file is detected and downloaded again
+        with open(fil, 'w') as fp:
+            fp.write('corrupted')
+        assert_false(datasets.utils._checksum_is_recorded(
+            data_dir, 'data.txt', md5sum))
+        fil = assert_warns(UserWarning, datasets.utils._fetch_file,
+                           url + 'data.txt', data_dir, md5sum=md5sum,
+                           verbose=0)
+        assert_equal(datasets.utils._md5_sum_file(fil), md5sum)
+
+        assert_raises_regex(ValueError, 'checksum verification',
+                            datasets.utils._fetch_file, url + 'data.txt',
+                            os.path.join(tmpdir, 'other'),
+                            md5sum='a' * 32, verbose=0)
+
+
+@with_setup(setup_tmpdata, teardown_tmpdata)
+def test_fetch_files_checksum_paths():
+    served_dir = os.path.join(tmpdir, 'served')
+    os.makedirs(served_dir)
+    with open(os.path.join(served_dir, 'data.txt'), 'w') as fp:
+        fp.write('some content')
+    with contextlib.closing(tarfile.open(
+            os.path.join(served_dir, 'archive.tar.gz'), 'w:gz')) as tar:
+        tar.add(os.path.join(served_dir, 'data.txt'), arcname='a.txt')
+    md5sums = [datasets.utils._md5_sum_file(os.path.join(served_dir, name))
+               for name in ('data.txt', 'archive.tar.gz')]
+    data_dir = os.path.join(tmpdir, 'data')
+
+    with serve_directory(served_dir) as url:
+        files = [('sub/renamed.txt', url + 'data.txt',
+                  dict(md5sum=md5sums[0], move='sub/renamed.txt')),
+                 ('a.txt', url + 'archive.tar.gz',
+                  dict(md5sum=md5sums[1], uncompress=True))]
+        datasets.utils._fetch_files(data_dir, files, verbose=0)
+    # Checksums are recorded under the final path of the files, and not
+    # for the deleted archive
+    manifest = datasets.utils._load_manifest(data_dir)
+    assert_equal(sorted(manifest.keys()), ['sub/renamed.txt'])
+    assert_equal(manifest['sub/renamed.txt']['md5sum'], md5sums[0])
+
+
+@with_setup(setup_tmpdata, teardown_tmpdata)
+def test_fetch_files_request_record():
+    data_dir = os.path.join(tmpdir, 'data')
+    os.makedirs(os.path.join(data_dir, 'sub'))
+    names = ['1.txt', os.path.join('sub', '2.txt')]
+    for name in names:
+        with open(os.path.join(data_dir, name), 'w') as fp:
+            fp.write(name)
+    files = [(name, 'http://foo/' + name, {}) for name in names]
+
+    # A request whose files are all present is recorded
+    assert_false(datasets.utils._request_is_recorded(data_dir, files))
+    files_ = datasets.utils._fetch_files(data_dir, files, verbose=0)
+    assert_true(datasets.utils._request_is_recorded(data_dir, files))
+    assert_equal(datasets.utils._fetch_files(data_dir, files, verbose=0),
+                 files_)
+
+    # Files requested from another url or with another md5 sum are not
+    # considered as fetched
+    assert_false(datasets.utils._request_is_recorded(
+        data_dir, [('1.txt', 'http://bar/1.txt', {})] + files[1:]))
+    assert_false(datasets.utils._request_is_recorded(
+        data_dir, [('1.txt', 'http://foo/1.txt', {'md5sum': 'a' * 32})] +
+        files[1:]))
+
+    # Nor are files removed from their directory
+    os.remove(files_[1])
+    assert_false(datasets.utils._request_is_recorded(data_dir, files))
+
+
+@with_setup(setup_tmpdata, teardown_tmpdata)
+def test_manifest_keys():
+    # The checksums of files with the same name in different directories
+    # do not overwrite each other, nor are they overwritten by the record
+    # of a request
+    data_dir = os.path.join(tmpdir, 'data')
+    os.makedirs(os.path.join(data_dir, 'sub'))
+    names = ['data.txt', os.path.join('sub', 'data.txt')]
+    md5sums = []
+    for name in names:
+        with open(os.path.join(data_dir, name), 'w') as fp:
+            fp.write(name)
+        md5sums.append(datasets.utils._md5_sum_file(
+            os.path.join(data_dir, name)))
+        datasets.utils._record_checksum(data_dir, name, md5sums[-1])
+    files = [(name, 'http://foo/' + name, dict(md5sum=md5sum))
+             for name, md5sum in zip(names, md5sums)]
+    datasets.utils._fetch_files(data_dir, files, verbose=0)
+    assert_true(datasets.utils._request_is_recorded(data_dir, files))
+    manifest = datasets.utils._load_manifest(data_dir)
+    assert_equal(sorted(manifest.keys()), ['data.txt', 'sub/data.txt'])
+    for name, md5sum in zip(names, md5sums):
+        assert_true(datasets.utils._checksum_is_recorded(data_dir, name,
+                                                         md5sum))
+    assert_false(datasets.utils._checksum_is_recorded(
+        data_dir, 'data.txt', md5sums[1]))
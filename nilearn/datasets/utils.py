@@ -8,10 +8,13 @@ import collections
 import contextlib
 import fnmatch
 import hashlib
+import json
+import numbers
 import shutil
 import time
 import sys
 import tarfile
+import threading
 import warnings
 import zipfile
 
@@ -38,6 +41,164 @@ def _md5_sum_file(path):
     return m.hexdigest()
 
 
+class _HashedFile(object):
+    """Write-only file object that updates a hash of the written content.
+
+    This allows to compute the checksum of a file while it is downloaded,
+    instead of reading it again afterwards.
+    """
+
+    def __init__(self, file_, hash_):
+        self.file_ = file_
+        self.hash_ = hash_
+
+    def write(self, data):
+        self.hash_.update(data)
+        self.file_.write(data)
+
+
+# Name of the file, in a data directory, listing the files of this
+# directory whose md5 sum has been verified, with their size and
+# modification time. Files are keyed by their path relative to the
+# directory, as given by _manifest_key.
+_MANIFEST_FILE = '.nilearn_manifest.json'
+_manifest_lock = threading.Lock()
+
+# Name of the directory, in a data directory, recording the calls of
+# _fetch_files that have found or fetched all their files
+_REQUESTS_DIR = '.nilearn_requests'
+
+
+def _manifest_key(file_):
+    """Key of a file, given relatively to the data directory, in a
+    manifest"""
+    return os.path.normpath(file_).replace(os.sep, '/')
+
+
+def _load_manifest(data_dir):
+    """Load the manifest of data_dir as a dictionary (empty if there is no
+    manifest, or if it is unreadable)"""
+    try:
+        with open(os.path.join(data_dir, _MANIFEST_FILE), 'r') as f:
+            manifest = json.load(f)
+    except (IOError, OSError, ValueError):
+        return {}
+    if not isinstance(manifest, dict):
+        return {}
+    return manifest
+
+
+def _save_json(path, obj):
+    """Write obj in the json file path. The file is replaced atomically so
+    that a concurrent reader never sees a partial file."""
+    temp_path = '%s.%i.%i' % (path, os.getpid(),
+                              threading.current_thread().ident)
+    with open(temp_path, 'w') as f:
+        json.dump(obj, f)
+    if os.name == 'nt' and os.path.exists(path):
+        # os.rename does not overwrite files on Windows
+        os.remove(path)
+    os.rename(temp_path, path)
+
+
+def _save_manifest(data_dir, manifest):
+    """Write the manifest of data_dir."""
+    _save_json(os.path.join(data_dir, _MANIFEST_FILE), manifest)
+
+
+def _record_checksum(data_dir, file_, md5sum):
+    """Record in the manifest of data_dir that file_, given relatively to
+    data_dir, has been verified to have the given md5sum. The size and
+    modification time of the file are stored too, to detect later
+    modifications."""
+    stat = os.stat(os.path.join(data_dir, file_))
+    with _manifest_lock:
+        manifest = _load_manifest(data_dir)
+        manifest[_manifest_key(file_)] = dict(
+            md5sum=md5sum, size=stat.st_size, mtime=stat.st_mtime)
+        _save_manifest(data_dir, manifest)
+
+
+def _checksum_is_recorded(data_dir, file_, md5sum):
+    """Whether file_, given relatively to data_dir, has been verified to
+    have the given md5sum, and has not been modified since"""
+    entry = _load_manifest(data_dir).get(_manifest_key(file_))
+    if entry is None or entry.get('md5sum') != md5sum:
+        return False
+    try:
+        stat = os.stat(os.path.join(data_dir, file_))
+    except OSError:
+        return False
+    return (entry.get('size') == stat.st_size and
+            entry.get('mtime') == stat.st_mtime)
+
+
+def _move_manifest_entry(data_dir, file_, new_file=None):
+    """Move the manifest entry of file_, given relatively to data_dir, to
+    new_file, after the file has been moved. The entry is removed if
+    new_file is None."""
+    with _manifest_lock:
+        manifest = _load_manifest(data_dir)
+        entry = manifest.pop(_manifest_key(file_), None)
+        if entry is None:
+            return
+        if new_file is not None:
+            manifest[_manifest_key(new_file)] = entry
+        _save_manifest(data_dir, manifest)
+
+
+def _request_path(data_dir, files):
+    """Path of the record of a call of _fetch_files in data_dir, given by
+    the digest of the requested files, urls and md5 sums"""
+    request = json.dumps([(_manifest_key(file_), url, opts.get('md5sum'))
+                          for file_, url, opts in files])
+    return os.path.join(data_dir, _REQUESTS_DIR,
+                        hashlib.md5(request.encode('utf-8')).hexdigest())
+
+
+def _get_dir_mtimes(data_dir, files):
+    """Return the modification times of the directories of the files, as
+    a dictionary"""
+    dirs = set(os.path.dirname(_manifest_key(file_)) for file_, _, _ in files)
+    return dict((dir_, os.stat(os.path.join(data_dir, dir_)).st_mtime)
+                for dir_ in dirs)
+
+
+def _record_request(data_dir, files):
+    """Record that all the given files, as given to _fetch_files, are in
+    data_dir, with the modification times of their directories. These
+    change when a file is added, removed or renamed in them.
+
+    Failures are silently ignored: the dataset may be in a read-only
+    shared directory, and the record is only an optimization.
+    """
+    try:
+        path = _request_path(data_dir, files)
+        if not os.path.exists(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        # The directory of the records is not one of the directories of
+        # the files: writing the record does not change their times
+        _save_json(path, _get_dir_mtimes(data_dir, files))
+    except (IOError, OSError):
+        pass
+
+
+def _request_is_recorded(data_dir, files):
+    """Whether all the given files, as given to _fetch_files, have been
+    found or fetched in data_dir, with the same urls and md5 sums, and no
+    file has been added to or removed from their directories since.
+
+    Only the record of this request is read, and only the directories of
+    the files are checked, not each file.
+    """
+    try:
+        with open(_request_path(data_dir, files), 'r') as f:
+            dir_mtimes = json.load(f)
+        return dir_mtimes == _get_dir_mtimes(data_dir, files)
+    except (IOError, OSError, ValueError):
+        return False
+
+
 def _read_md5_sum_file(path):
     """ Reads a MD5 checksum file and returns hashes as a dictionary.
     """
@@ -295,6 +456,13 @@ def _uncompress_file(file_, delete_archive=True, verbose=1):
             z.extractall(data_dir)
             z.close()
             processed = True
+        elif tarfile.is_tarfile(file_):
+            # Compressed (.tar.gz, .tgz, .tar.bz2) or not, tarballs are
+            # extracted in one sequential pass over the archive, without
+            # writing an intermediate uncompressed .tar on disk
+            with contextlib.closing(tarfile.open(file_, "r|*")) as tar:
+                tar.extractall(path=data_dir)
+            processed = True
         elif ext == '.gz' or header.startswith(b'\x1f\x8b'):
             import gzip
             gz = gzip.open(file_)
@@ -310,10 +478,6 @@ def _uncompress_file(file_, delete_archive=True, verbose=1):
             file_ = filename
             filename, ext = os.path.splitext(file_)
             processed = True
-        if tarfile.is_tarfile(file_):
-            with contextlib.closing(tarfile.open(file_, "r")) as tar:
-                tar.extractall(path=data_dir)
-            processed = True
         if not processed:
             raise IOError(
                     "[Uncompress] unknown archive file format: %s" % file_)
@@ -356,7 +520,15 @@ def _filter_column(array, col, criteria):
         not isinstance(criteria, tuple) and
             isinstance(criteria, collections.Iterable)):
 
+        criteria = list(criteria)
         filter = np.zeros(array.shape[0], dtype=np.bool)
+        # Numerical values are all matched at once
+        values = [criterion for criterion in criteria
+                  if isinstance(criterion, numbers.Number)]
+        if values and array[col].dtype.kind in 'biuf':
+            filter = np.in1d(array[col], values)
+            criteria = [criterion for criterion in criteria
+                        if not isinstance(criterion, numbers.Number)]
         for criterion in criteria:
             filter = np.logical_or(filter,
                                    _filter_column(array, col, criterion))
@@ -405,6 +577,63 @@ def _filter_columns(array, filters, combination='and'):
     return mask
 
 
+def _get_file_name_from_url(url):
+    """Name of the local file in which _fetch_file stores a given url"""
+    parse = _urllib.parse.urlparse(url)
+    file_name = os.path.basename(parse.path)
+    if file_name == '':
+        file_name = md5_hash(parse.path)
+    return file_name
+
+
+def _load_cached_table(path, loader):
+    """Load a table parsed from a text file, caching the result on disk.
+
+    Parsing CSV files with numpy is slow. The parsed table is stored in a
+    binary .npz file next to the text file, and loaded from there by later
+    calls, as long as the text file has not changed.
+
+    Parameters
+    ----------
+    path: string
+        Path of the text (eg CSV) file.
+
+    loader: callable
+        Function parsing the file at path into a numpy (record) array.
+
+    Returns
+    -------
+    table: numpy array
+        Output of loader(path). When loaded from the cache, record arrays
+        are returned as plain structured arrays.
+    """
+    cache_path = os.path.splitext(path)[0] + '.npz'
+    stat = os.stat(path)
+    source = np.array([stat.st_size, stat.st_mtime])
+    if os.path.exists(cache_path):
+        try:
+            with contextlib.closing(np.load(cache_path)) as cache:
+                if np.all(cache['source'] == source):
+                    return cache['table']
+        except Exception:
+            # Corrupted or incompatible cache: parse the file again
+            pass
+
+    table = loader(path)
+    temp_cache_path = '%s.%i.%i.npz' % (
+        cache_path, os.getpid(), threading.current_thread().ident)
+    try:
+        np.savez(temp_cache_path, table=table, source=source)
+        if os.name == 'nt' and os.path.exists(cache_path):
+            os.remove(cache_path)
+        os.rename(temp_cache_path, cache_path)
+    except (IOError, OSError):
+        # The dataset may be in a read-only directory
+        if os.path.exists(temp_cache_path):
+            os.remove(temp_cache_path)
+    return table
+
+
 def _fetch_file(url, data_dir, resume=True, overwrite=False,
                 md5sum=None, username=None, password=None, handlers=[],
                 verbose=1):
@@ -456,10 +685,7 @@ def _fetch_file(url, data_dir, resume=True, overwrite=False,
         os.makedirs(data_dir)
 
     # Determine filename using URL
-    parse = _urllib.parse.urlparse(url)
-    file_name = os.path.basename(parse.path)
-    if file_name == '':
-        file_name = md5_hash(parse.path)
+    file_name = _get_file_name_from_url(url)
 
     temp_file_name = file_name + ".part"
     full_name = os.path.join(data_dir, file_name)
@@ -467,14 +693,25 @@ def _fetch_file(url, data_dir, resume=True, overwrite=False,
     if os.path.exists(full_name):
         if overwrite:
             os.remove(full_name)
-        else:
+        elif (md5sum is None or
+                _checksum_is_recorded(data_dir, file_name, md5sum)):
             return full_name
+        elif _md5_sum_file(full_name) == md5sum:
+            _record_checksum(data_dir, file_name, md5sum)
+            return full_name
+        else:
+            # The file is corrupted: download it again
+            warnings.warn('File %s does not have the expected md5 sum: it '
+                          'is deleted and downloaded again.' % full_name)
+            os.remove(full_name)
     if os.path.exists(temp_full_name):
         if overwrite:
             os.remove(temp_full_name)
     t0 = time.time()
     local_file = None
     initial_size = 0
+    # The md5 sum is computed on the fly, while the file is downloaded
+    md5_hash_ = hashlib.md5() if md5sum is not None else None
 
     try:
         # Download data
@@ -519,10 +756,17 @@ def _fetch_file(url, data_dir, resume=True, overwrite=False,
                     handlers=handlers, verbose=verbose)
             local_file = open(temp_full_name, "ab")
             initial_size = local_file_size
+            if md5_hash_ is not None:
+                # Only the beginning of the file has to be read again
+                with open(temp_full_name, "rb") as partial_file:
+                    for chunk in iter(lambda: partial_file.read(8192), b''):
+                        md5_hash_.update(chunk)
         else:
             data = url_opener.open(request)
             local_file = open(temp_full_name, "wb")
-        _chunk_read_(data, local_file, report_hook=(verbose > 0),
+        _chunk_read_(data, local_file if md5_hash_ is None
+                     else _HashedFile(local_file, md5_hash_),
+                     report_hook=(verbose > 0),
                      initial_size=initial_size, verbose=verbose)
         # temp file must be closed prior to the move
         if not local_file.closed:
@@ -533,25 +777,137 @@ def _fetch_file(url, data_dir, resume=True, overwrite=False,
             # Complete the reporting hook
             sys.stderr.write(' ...done. (%i seconds, %i min)\n' % (dt, dt // 60))
     except (_urllib.error.HTTPError, _urllib.error.URLError) as e:
-        if 'Error while fetching' not in str(e):
-            # For some odd reason, the error message gets doubled up
-            #   (possibly from the re-raise), so only add extra info
-            #   if it's not already there.
-            e.reason = ("%s| Error while fetching file %s; "
-                          "dataset fetching aborted." % (
-                            str(e.reason), file_name))
-        raise
+        if 'Error while fetching' in str(e):
+            # The error of a nested call (eg without resuming) already
+            # gives the file
+            raise
+        # The reason of an error cannot be set in Python 3: an error with
+        # the name of the file is raised instead
+        reason = ("%s| Error while fetching file %s; "
+                  "dataset fetching aborted." % (str(e.reason), file_name))
+        if isinstance(e, _urllib.error.HTTPError):
+            error = _urllib.error.HTTPError(e.filename, e.code, reason,
+                                            e.hdrs, e.fp)
+        else:
+            error = _urllib.error.URLError(reason)
+        raise error
     finally:
         if local_file is not None:
             if not local_file.closed:
                 local_file.close()
     if md5sum is not None:
-        if (_md5_sum_file(full_name) != md5sum):
+        if md5_hash_.hexdigest() != md5sum:
             raise ValueError("File %s checksum verification has failed."
-                             " Dataset fetching aborted." % local_file)
+                             " Dataset fetching aborted." % full_name)
+        _record_checksum(data_dir, file_name, md5sum)
     return full_name
 
 
+def _fetch_file_with_retries(url, data_dir, n_retries=2, resume=True,
+                             overwrite=False, **kwargs):
+    """Same as _fetch_file, but retries if a network error occurs.
+
+    Parameters
+    ----------
+    n_retries: int, optional
+        Number of additional attempts made after a failed download. If
+        resume is True, each new attempt resumes the partially downloaded
+        file.
+
+    Other parameters are passed to _fetch_file.
+    """
+    for attempt in range(n_retries + 1):
+        try:
+            return _fetch_file(url, data_dir, resume=resume,
+                               overwrite=overwrite, **kwargs)
+        except (_urllib.error.URLError, IOError) as e:
+            # Client errors (404, 403...) will not go away by retrying
+            if (attempt == n_retries or
+                    (isinstance(e, _urllib.error.HTTPError) and
+                     400 <= e.code < 500)):
+                raise
+            # Keep the partial download of the failed attempt
+            overwrite = False
+            if kwargs.get('verbose', 1) > 0:
+                print('Download of %s failed (%s), retrying...' % (url, e))
+
+
+def _fetch_files_concurrently(downloads, data_dir, n_jobs, resume=True,
+                              verbose=1):
+    """Download several files at once, using a pool of threads.
+
+    Parameters
+    ----------
+    downloads: list of (string, dict)
+        Urls to download, with the options of the corresponding entry of
+        _fetch_files ('md5sum', 'username', 'password', 'handlers' and
+        'overwrite' are used).
+
+    data_dir: string
+        Directory in which the files are downloaded.
+
+    n_jobs: int
+        Maximal number of simultaneous downloads.
+
+    resume: bool, optional
+        If true, try resuming download if possible
+
+    verbose: int, optional
+        verbosity level (0 means no message).
+
+    Returns
+    -------
+    files: list of string
+        Absolute paths of downloaded files, in the same order as downloads.
+
+    Notes
+    -----
+    Downloads are I/O bound, so threads are used rather than processes.
+    Progress is reported globally, in number of files, rather than per file.
+    """
+    from multiprocessing.pool import ThreadPool
+
+    def download(i_url_opts):
+        i, (url, opts) = i_url_opts
+        try:
+            dl_file = _fetch_file_with_retries(
+                url, data_dir, resume=resume, verbose=max(verbose - 1, 0),
+                md5sum=opts.get('md5sum', None),
+                username=opts.get('username', None),
+                password=opts.get('password', None),
+                handlers=opts.get('handlers', []),
+                overwrite=opts.get('overwrite', False))
+        except Exception as e:
+            return i, None, e
+        return i, dl_file, None
+
+    n_files = len(downloads)
+    files = [None] * n_files
+    errors = []
+    t0 = time.time()
+    if verbose > 0:
+        print('Downloading %d files from %s ...' % (
+            n_files, _urllib.parse.urlparse(downloads[0][0]).netloc))
+    pool = ThreadPool(min(n_jobs, n_files))
+    try:
+        for n_done, (i, dl_file, error) in enumerate(
+                pool.imap_unordered(download, enumerate(downloads))):
+            files[i] = dl_file
+            if error is not None:
+                errors.append(error)
+            if verbose > 0:
+                sys.stderr.write('\rDownloaded %d of %d files (%s)' % (
+                    n_done + 1, n_files, _format_time(time.time() - t0)))
+    finally:
+        pool.close()
+        pool.join()
+    if verbose > 0:
+        sys.stderr.write(' ...done.\n')
+    if errors:
+        raise errors[0]
+    return files
+
+
 def _get_dataset_descr(ds_name):
     module_path = os.path.dirname(os.path.abspath(__file__))
 
@@ -584,7 +940,14 @@ def movetree(src, dst):
         srcname = os.path.join(src, name)
         dstname = os.path.join(dst, name)
         try:
-            if os.path.isdir(srcname) and os.path.isdir(dstname):
+            if name == _MANIFEST_FILE and os.path.exists(dstname):
+                # Merge the checksums verified in both directories
+                with _manifest_lock:
+                    manifest = _load_manifest(dst)
+                    manifest.update(_load_manifest(src))
+                    _save_manifest(dst, manifest)
+                os.remove(srcname)
+            elif os.path.isdir(srcname) and os.path.isdir(dstname):
                 movetree(srcname, dstname)
                 os.rmdir(srcname)
             else:
@@ -599,7 +962,8 @@ def movetree(src, dst):
         raise Exception(errors)
 
 
-def _fetch_files(data_dir, files, resume=True, mock=False, verbose=1):
+def _fetch_files(data_dir, files, resume=True, mock=False, n_jobs=1,
+                 verbose=1):
     """Load requested dataset, downloading it if needed or requested.
 
     This function retrieves files from the hard drive or download them from
@@ -633,6 +997,11 @@ def _fetch_files(data_dir, files, resume=True, mock=False, verbose=1):
         If true, create empty files if the file cannot be downloaded. Test use
         only.
 
+    n_jobs: int, optional
+        Number of files downloaded simultaneously. If greater than 1, all
+        the missing files are first downloaded concurrently (with retries
+        on network errors), and then moved and uncompressed one by one.
+
     verbose: int, optional
         verbosity level (0 means no message).
 
@@ -640,6 +1009,15 @@ def _fetch_files(data_dir, files, resume=True, mock=False, verbose=1):
     -------
     files: list of string
         Absolute paths of downloaded files on disk
+
+    Notes
+    -----
+    When all the requested files are found or fetched, the request (files,
+    urls and md5 sums) is recorded in data_dir, with the modification times
+    of the directories of the files. The same request is then answered
+    right away, as long as no file has been added to or removed from these
+    directories. Files modified in place are not detected: use 'overwrite'
+    to fetch them again.
     """
     # There are two working directories here:
     # - data_dir is the destination directory of the dataset
@@ -648,6 +1026,16 @@ def _fetch_files(data_dir, files, resume=True, mock=False, verbose=1):
     #   file is found, or a file is missing, this working directory will be
     #   deleted.
     files = list(files)
+
+    # Fast path: if the same request has already been answered and the
+    # directories of the files have not changed since, there is no need to
+    # look for each file (which is slow for large datasets, especially on
+    # network file systems)
+    if not mock and not any(opts.get('overwrite', False)
+                            for _, _, opts in files):
+        if _request_is_recorded(data_dir, files):
+            return [os.path.join(data_dir, file_) for file_, _, _ in files]
+
     files_pickle = cPickle.dumps([(file_, url) for file_, url, _ in files])
     files_md5 = hashlib.md5(files_pickle).hexdigest()
     temp_dir = os.path.join(data_dir, files_md5)
@@ -659,6 +1047,13 @@ def _fetch_files(data_dir, files, resume=True, mock=False, verbose=1):
     # Abortion flag, in case of error
     abort = None
 
+    # Urls that have already been downloaded by the concurrent pass
+    prefetched = set()
+    if n_jobs > 1 and not mock:
+        prefetched = _prefetch_files(data_dir, temp_dir, files,
+                                     resume=resume, n_jobs=n_jobs,
+                                     verbose=verbose)
+
     files_ = []
     for file_, url, opts in files:
         # 3 possibilities:
@@ -692,7 +1087,8 @@ def _fetch_files(data_dir, files, resume=True, mock=False, verbose=1):
                                   username=opts.get('username', None),
                                   password=opts.get('password', None),
                                   handlers=opts.get('handlers', []),
-                                  overwrite=overwrite)
+                                  overwrite=(overwrite and
+                                             url not in prefetched))
             if 'move' in opts:
                 # XXX: here, move is supposed to be a dir, it can be a name
                 move = os.path.join(temp_dir, opts['move'])
@@ -700,6 +1096,10 @@ def _fetch_files(data_dir, files, resume=True, mock=False, verbose=1):
                 if not os.path.exists(move_dir):
                     os.makedirs(move_dir)
                 shutil.move(dl_file, move)
+                # The checksum is recorded under the final path of the file
+                _move_manifest_entry(temp_dir,
+                                     os.path.relpath(dl_file, temp_dir),
+                                     opts['move'])
                 dl_file = move
             if 'uncompress' in opts:
                 try:
@@ -707,6 +1107,10 @@ def _fetch_files(data_dir, files, resume=True, mock=False, verbose=1):
                         _uncompress_file(dl_file, verbose=verbose)
                     else:
                         os.remove(dl_file)
+                    if not os.path.exists(dl_file):
+                        # The archive has been deleted
+                        _move_manifest_entry(
+                            temp_dir, os.path.relpath(dl_file, temp_dir))
                 except Exception as e:
                     abort = str(e)
 
@@ -733,9 +1137,59 @@ def _fetch_files(data_dir, files, resume=True, mock=False, verbose=1):
         # XXX Movetree can go wrong
         movetree(temp_dir, data_dir)
         shutil.rmtree(temp_dir)
+    if not mock:
+        _record_request(data_dir, files)
     return files_
 
 
+def _prefetch_files(data_dir, temp_dir, files, resume=True, n_jobs=1,
+                    verbose=1):
+    """Concurrently download into temp_dir the files missing in data_dir.
+
+    This is the first pass of _fetch_files when n_jobs > 1. The files that
+    _fetch_files would download are downloaded at once (each url only
+    once). The sequential pass then finds them in temp_dir, and only has to
+    move and uncompress them.
+
+    Returns
+    -------
+    prefetched: set of string
+        Urls that have been downloaded.
+    """
+    downloads = []
+    urls = set()
+    file_names = []
+    for file_, url, opts in files:
+        target_file = os.path.join(data_dir, file_)
+        temp_target_file = os.path.join(temp_dir, file_)
+        if url in urls:
+            continue
+        if (opts.get('overwrite', False) or
+                (not os.path.exists(target_file) and
+                 not os.path.exists(temp_target_file))):
+            urls.add(url)
+            downloads.append((url, opts))
+            file_names.append(_get_file_name_from_url(url))
+
+    # Different urls that would be stored in the same file must be fetched
+    # one after the other, by the sequential pass
+    downloads = [download for download, file_name in zip(downloads,
+                                                          file_names)
+                 if file_names.count(file_name) == 1]
+    if len(downloads) < 2:
+        return set()
+
+    if not os.access(data_dir, os.W_OK):
+        raise ValueError('Dataset files are missing but dataset'
+                         ' repository is read-only. Contact your data'
+                         ' administrator to solve the problem')
+    if not os.path.exists(temp_dir):
+        os.mkdir(temp_dir)
+    _fetch_files_concurrently(downloads, temp_dir, n_jobs, resume=resume,
+                              verbose=verbose)
+    return set(url for url, _ in downloads)
+
+
 def _tree(path, pattern=None, dictionary=False):
     """ Return a directory tree under the form of a dictionaries and list
 
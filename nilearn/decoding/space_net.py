@@ -109,8 +109,44 @@ def _crop_mask(mask):
     return mask[i_min:i_max + 1, j_min:j_max + 1, k_min:k_max + 1]
 
 
+def _smooth_screening_design(X, mask, smoothing_fwhm=2.):
+    """Smooths each row of the design matrix X before univariate screening.
+
+    The result only depends on X and the mask (not on the target), so it
+    can be computed once and shared between the different one-vs-rest
+    problems (and folds) of a multi-class fit.
+
+    Parameters
+    ----------
+    X : ndarray, shape (n_samples, n_features)
+        Design matrix.
+
+    mask: ndarray or booleans, shape (nx, ny, nz)
+        Mask definining brain Rois.
+
+    smoothing_fwhm : float, optional (default 2.)
+        FWHM for isotropically smoothing the data X. A value of zero
+        means "don't smooth".
+
+    Returns
+    -------
+    sX : ndarray, shape (n_samples, n_features)
+        Smoothed design matrix. This is X itself if smoothing_fwhm is 0.
+    """
+    if smoothing_fwhm <= 0.:
+        return X
+    sX = np.empty(X.shape)
+    for sample in range(sX.shape[0]):
+        sX[sample] = ndimage.gaussian_filter(
+            _unmask(X[sample].copy(),  # avoid modifying X
+                    mask), (smoothing_fwhm, smoothing_fwhm,
+                            smoothing_fwhm))[mask]
+    return sX
+
+
 def _univariate_feature_screening(
-        X, y, mask, is_classif, screening_percentile, smoothing_fwhm=2.):
+        X, y, mask, is_classif, screening_percentile, smoothing_fwhm=2.,
+        smoothed_X=None):
     """
     Selects the most import features, via a univariate test
 
@@ -136,6 +172,10 @@ def _univariate_feature_screening(
         FWHM for isotropically smoothing the data X before F-testing. A value
         of zero means "don't smooth".
 
+    smoothed_X : ndarray, shape (n_samples, n_features), optional
+        Precomputed output of `_smooth_screening_design(X, mask,
+        smoothing_fwhm)`. If given, the smoothing step is skipped.
+
     Returns
     -------
     X_: ndarray, shape (n_samples, n_features_)
@@ -151,15 +191,10 @@ def _univariate_feature_screening(
         original mask.
     """
     # smooth the data (with isotropic Gaussian kernel) before screening
-    if smoothing_fwhm > 0.:
-        sX = np.empty(X.shape)
-        for sample in range(sX.shape[0]):
-            sX[sample] = ndimage.gaussian_filter(
-                _unmask(X[sample].copy(),  # avoid modifying X
-                        mask), (smoothing_fwhm, smoothing_fwhm,
-                                smoothing_fwhm))[mask]
+    if smoothed_X is None:
+        sX = _smooth_screening_design(X, mask, smoothing_fwhm=smoothing_fwhm)
     else:
-        sX = X
+        sX = smoothed_X
 
     # do feature screening proper
     selector = SelectPercentile(f_classif if is_classif else f_regression,
@@ -334,7 +369,7 @@ class _EarlyStoppingCallback(object):
 def path_scores(solver, X, y, mask, alphas, l1_ratios, train, test,
                 solver_params, is_classif=False, n_alphas=10, eps=1E-3,
                 key=None, debias=False, Xmean=None,
-                screening_percentile=20., verbose=1):
+                screening_percentile=20., smoothed_X=None, verbose=1):
     """Function to compute scores of different alphas in regression and
     classification used by CV objects
 
@@ -375,6 +410,12 @@ def path_scores(solver, X, y, mask, alphas, l1_ratios, train, test,
 
     solver_params: dict
        Dictionary of param-value pairs to be passed to solver.
+
+    smoothed_X : 2D array of shape (n_samples, n_features), optional
+        Smoothed design matrix used for univariate feature screening, as
+        returned by `_smooth_screening_design`. Passing it avoids
+        recomputing it when the same X is shared by several problems
+        (e.g one-vs-rest classes).
     """
     if l1_ratios is None:
         raise ValueError("l1_ratios must be specified!")
@@ -389,7 +430,8 @@ def path_scores(solver, X, y, mask, alphas, l1_ratios, train, test,
     do_screening = (n_features > 100) and screening_percentile < 100.
     if do_screening:
         X, mask, support = _univariate_feature_screening(
-            X, y, mask, is_classif, screening_percentile)
+            X, y, mask, is_classif, screening_percentile,
+            smoothed_X=smoothed_X)
 
     # crop the mask to have a tighter bounding box
     mask = _crop_mask(mask)
@@ -841,6 +883,15 @@ class BaseSpaceNet(LinearModel, RegressorMixin, CacheMixin):
                 self.screening_percentile, self.mask_img_,
                 verbose=self.verbose)
 
+        # in the multi-class case, all the one-vs-rest problems share the
+        # same design matrix X and the same folds: the smoothing done for
+        # univariate screening only depends on X, so compute it only once
+        smoothed_X = None
+        if (n_problems > 1 and X.shape[1] > 100 and
+                self.screening_percentile_ < 100.):
+            smoothed_X = self._cache(_smooth_screening_design,
+                                     func_memory_level=2)(X, self.mask_)
+
         # main loop: loop on classes and folds
         solver_params = dict(tol=self.tol, max_iter=self.max_iter)
         self.best_model_params_ = []
@@ -855,6 +906,7 @@ class BaseSpaceNet(LinearModel, RegressorMixin, CacheMixin):
                 is_classif=self.loss == "logistic", key=(cls, fold),
                 debias=self.debias, verbose=self.verbose,
                 screening_percentile=self.screening_percentile_,
+                smoothed_X=smoothed_X,
                 ) for cls in range(n_problems) for fold in range(n_folds)):
             self.best_model_params_.append((best_alpha, best_l1_ratio))
             self.alpha_grids_.append(alphas)
@@ -17,8 +17,8 @@ from nilearn._utils.testing import assert_raises_regex, assert_warns
 from nilearn.decoding.space_net import (
     _EarlyStoppingCallback, _space_net_alpha_grid, MNI152_BRAIN_VOLUME,
     path_scores, BaseSpaceNet, _crop_mask, _univariate_feature_screening,
-    _get_mask_volume, SpaceNetClassifier, SpaceNetRegressor,
-    _adjust_screening_percentile)
+    _smooth_screening_design, _get_mask_volume, SpaceNetClassifier,
+    SpaceNetRegressor, _adjust_screening_percentile)
 from nilearn.decoding.space_net_solvers import (_graph_net_logistic,
                                                 _graph_net_squared_loss)
 
@@ -283,6 +283,27 @@ def test_univariate_feature_screening(dim=(11, 12, 13), n_samples=10):
         assert_true(n_features_ <= n_features)
 
 
+def test_univariate_feature_screening_shared_smoothing(dim=(11, 12, 13),
+                                                       n_samples=10):
+    # screening with a precomputed smoothed design (as done for multi-class
+    # problems) must give the same result as smoothing on the fly
+    rng = np.random.RandomState(42)
+    mask = rng.rand(*dim) > 100. / np.prod(dim)
+    n_features = mask.sum()
+    X = rng.randn(n_samples, n_features)
+    y = np.sign(rng.randn(n_samples))
+    smoothed_X = _smooth_screening_design(X, mask)
+    assert_equal(smoothed_X.shape, X.shape)
+    for is_classif in [True, False]:
+        X_, mask_, support_ = _univariate_feature_screening(
+            X, y, mask, is_classif, 20.)
+        X_s, mask_s, support_s = _univariate_feature_screening(
+            X, y, mask, is_classif, 20., smoothed_X=smoothed_X)
+        np.testing.assert_array_equal(X_, X_s)
+        np.testing.assert_array_equal(mask_, mask_s)
+        np.testing.assert_array_equal(support_, support_s)
+
+
 def test_get_mask_volume():
     # Test that hard-coded standard mask volume can be corrected computed
     if os.path.isfile(mni152_brain_mask):
@@ -3,6 +3,7 @@ Base class for decomposition estimators, utilities for masking and dimension
 reduction of group data
 """
 from __future__ import division
+from functools import partial
 from math import ceil
 
 import itertools
@@ -10,11 +11,13 @@ import numpy as np
 from scipy import linalg
 from sklearn.base import BaseEstimator
 from sklearn.externals.joblib import Memory, Parallel, delayed
-from sklearn.linear_model import LinearRegression
 from sklearn.utils import check_random_state
 from sklearn.utils.extmath import randomized_svd
 from .._utils.cache_mixin import CacheMixin, cache
 from .._utils.niimg import _safe_get_data
+from .._utils.numpy_conversions import _get_float_dtype
+from .._utils.niimg_conversions import _prefetch_niimgs
+from .._utils.parallel import _split_batches
 from ..input_data import NiftiMapsMasker
 from ..input_data.masker_validation import check_embedded_nifti_masker
 
@@ -90,6 +93,11 @@ def mask_and_reduce(masker, imgs,
     if confounds is None:
         confounds = itertools.repeat(confounds)
 
+    if n_jobs == 1:
+        # Load the next image in the background while the current one is
+        # masked and reduced
+        imgs = _prefetch_niimgs(imgs)
+
     if reduction_ratio == 'auto':
         n_samples = n_components
         reduction_ratio = None
@@ -115,7 +123,7 @@ def mask_and_reduce(masker, imgs,
     n_samples = np.sum(subject_n_samples)
     n_voxels = np.sum(_safe_get_data(masker.mask_img_))
     data = np.empty((n_samples, n_voxels), order='F',
-                    dtype='float64')
+                    dtype=_get_float_dtype(np.float64))
 
     current_position = 0
     for i, next_position in enumerate(np.cumsum(subject_n_samples)):
@@ -312,6 +320,8 @@ class BaseDecomposition(BaseEstimator, CacheMixin):
         else:
             self.masker_.fit()
         self.mask_img_ = self.masker_.mask_img_
+        # The maps masker of the components is built after fitting them
+        self._maps_masker_ = None
 
         return self
 
@@ -349,17 +359,13 @@ class BaseDecomposition(BaseEstimator, CacheMixin):
 
         """
 
-        self._check_components_()
-        components_img_ = self.masker_.inverse_transform(self.components_)
-        nifti_maps_masker = NiftiMapsMasker(
-            components_img_, self.masker_.mask_img_,
-            resampling_target='maps')
-        nifti_maps_masker.fit()
+        nifti_maps_masker = self._get_maps_masker()
         # XXX: dealing properly with 4D/ list of 4D data?
+        imgs = list(imgs)
         if confounds is None:
             confounds = [None] * len(imgs)
-        return [nifti_maps_masker.transform(img, confounds=confound)
-                for img, confound in zip(imgs, confounds)]
+        return list(itertools.chain(*self._map_batches(
+            _transform_batch, nifti_maps_masker, imgs, confounds)))
 
     def inverse_transform(self, loadings):
         """Use provided loadings to compute corresponding linear component
@@ -381,14 +387,45 @@ class BaseDecomposition(BaseEstimator, CacheMixin):
                        'because fit has not been called or because'
                        '_DecompositionEstimator has direcly been used')
         self._check_components_()
-        components_img_ = self.masker_.inverse_transform(self.components_)
-        nifti_maps_masker = NiftiMapsMasker(
-            components_img_, self.masker_.mask_img_,
-            resampling_target='maps')
-        nifti_maps_masker.fit()
         # XXX: dealing properly with 2D/ list of 2D data?
-        return [nifti_maps_masker.inverse_transform(loading)
-                for loading in loadings]
+        # As the inverse transform of a NiftiMapsMasker of the components,
+        # the voxels where no component is positive are left to zero. The
+        # images are unmasked in a single call.
+        components = self.components_ * np.any(self.components_ > 0, axis=0)
+        return self.masker_.inverse_transform(
+            [np.dot(loading, components) for loading in loadings])
+
+    def _get_maps_masker(self):
+        """Return the NiftiMapsMasker of the components, fitted once for
+        given components_. It keeps the pseudo-inverse of the components.
+        """
+        self._check_components_()
+        cached = getattr(self, '_maps_masker_', None)
+        # components_ may be modified in place: the masker is kept with a
+        # copy of the components it was fitted on
+        if cached is None or not np.array_equal(cached[0], self.components_):
+            components_img_ = self.masker_.inverse_transform(
+                self.components_)
+            nifti_maps_masker = NiftiMapsMasker(
+                components_img_, self.masker_.mask_img_,
+                resampling_target='maps')
+            nifti_maps_masker.fit()
+            # The projector is built before the masker is sent to the jobs,
+            # that would otherwise each compute it
+            nifti_maps_masker._get_maps_projector()
+            cached = (self.components_.copy(), nifti_maps_masker)
+            self._maps_masker_ = cached
+        return cached[1]
+
+    def _map_batches(self, func, masker, imgs, confounds):
+        """Apply func to batches of subjects, one batch per job. Returns
+        the list of the outputs of func.
+        """
+        batches = _split_batches(len(imgs), self.n_jobs)
+        return Parallel(n_jobs=max(1, len(batches)), verbose=self.verbose)(
+            delayed(func)(masker, [imgs[i] for i in batch],
+                          [confounds[i] for i in batch])
+            for batch in batches)
 
     def _sort_by_score(self, data):
         """Sort components on the explained variance over data of estimator
@@ -424,12 +461,151 @@ class BaseDecomposition(BaseEstimator, CacheMixin):
             if per_component is True. First dimension
             is squeezed if the number of subjects is one
         """
-        data = mask_and_reduce(self.masker_, imgs, confounds,
-                               reduction_ratio=1.)
-        return self._raw_score(data, per_component=False)
+        self._check_components_()
+        if not hasattr(imgs, '__iter__'):
+            imgs = [imgs]
+        imgs = list(imgs)
+        if confounds is None:
+            confounds = [None] * len(imgs)
+        # The subjects are streamed: only the statistics of their data, as
+        # given by mask_and_reduce, are kept
+        stats = None
+        for batch_stats in self._map_batches(
+                partial(_score_batch, components=self.components_),
+                self.masker_, imgs, confounds):
+            stats = _merge_explained_variance_stats(stats, batch_stats)
+        return _explained_variance_from_stats(stats, per_component=False)
+
+
+def _transform_batch(nifti_maps_masker, imgs, confounds):
+    """Project a batch of subjects on the components"""
+    return [nifti_maps_masker.transform(img, confounds=confound)
+            for img, confound in zip(_prefetch_niimgs(imgs), confounds)]
+
+
+def _score_batch(masker, imgs, confounds, components):
+    """Return the statistics of explained_variance on a batch of
+    subjects, for the global set of components"""
+    components = _normalize_components(components)
+    regression_terms = _regression_terms(components)
+    stats = None
+    for img, confound in zip(_prefetch_niimgs(imgs), confounds):
+        # The data of each subject goes through the same (non reducing)
+        # SVD as in mask_and_reduce: it changes the mean of the data that
+        # is not centered by the masker, and thus the score
+        data = _mask_and_reduce_single(masker, img, confound,
+                                       reduction_ratio=1.)
+        stats = _merge_explained_variance_stats(
+            stats, _explained_variance_stats(
+                data, components, per_component=False,
+                regression_terms=regression_terms))
+    return stats
+
+
+def _normalize_components(components):
+    """Return the components scaled to unit norm (null ones are kept)."""
+    S = np.sqrt(np.sum(components ** 2, axis=1))
+    S[S == 0] = 1
+    return components / S[:, np.newaxis]
+
+
+def _regression_terms(components):
+    """Return what is needed to regress samples on the components with an
+    intercept: the mean of each component, the pseudo-inverse of the Gram
+    matrix of the centered components, and the Gram matrix of the
+    components.
+    """
+    means = components.mean(axis=1)
+    centered = components - means[:, np.newaxis]
+    return (means, linalg.pinv(centered.dot(centered.T)),
+            components.dot(components.T))
 
 
-def explained_variance(X, components, per_component=True):
+def _explained_variance_stats(X, components, per_component=True,
+                              regression_terms=None):
+    """Statistics of a block of samples needed by explained_variance.
+
+    The statistics of several blocks are merged with
+    _merge_explained_variance_stats, so that samples can be processed by
+    blocks, or subject by subject.
+
+    Parameters
+    ----------
+    X: ndarray
+        Block of samples, shape (n_samples, n_voxels).
+
+    components: ndarray
+        The normalized components, shape (n_components, n_voxels).
+
+    per_component: boolean
+        Whether the residuals of each component are needed, or of the
+        regression on all the components.
+
+    regression_terms: tuple, optional
+        The output of _regression_terms(components), required if
+        per_component is False.
+
+    Returns
+    -------
+    stats: tuple
+        The number of values in X; the means and the sums of squared
+        deviations from the mean of X and, if per_component, of the
+        residuals X - outer(X.dot(c), c) for each component c; and the sum
+        of squares of the residuals of the regression if per_component is
+        False. The residuals are not built: all these are computed from
+        the projections of X on the components.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    n_values = X.size
+    mean = X.mean()
+    sq_norm = np.sum((X - mean) ** 2)
+    projected = X.dot(components.T)
+    if per_component:
+        c_sums = components.sum(axis=1)
+        c_sq_norms = np.sum(components ** 2, axis=1)
+        p_sums = projected.sum(axis=0)
+        p_sq_norms = np.sum(projected ** 2, axis=0)
+        res_means = mean - p_sums * c_sums / n_values
+        res_sq_norms = (sq_norm - p_sq_norms * (2 - c_sq_norms) +
+                        2 * mean * p_sums * c_sums -
+                        (p_sums * c_sums) ** 2 / n_values)
+        return (n_values, np.hstack([mean, res_means]),
+                np.hstack([sq_norm, res_sq_norms]), 0.)
+    c_means, centered_gram_pinv, gram = regression_terms
+    # The intercept is estimated but, as in the regression residuals
+    # historically used, not removed from the residuals
+    coef = (projected - np.outer(X.sum(axis=1), c_means)).dot(
+        centered_gram_pinv)
+    res_sq_norm = (np.sum(X ** 2) - 2 * np.sum(coef * projected) +
+                   np.sum(coef.dot(gram) * coef))
+    return n_values, np.array([mean]), np.array([sq_norm]), res_sq_norm
+
+
+def _merge_explained_variance_stats(stats1, stats2):
+    """Merge the statistics of two blocks of samples."""
+    if stats1 is None:
+        return stats2
+    n1, means1, sq_norms1, res1 = stats1
+    n2, means2, sq_norms2, res2 = stats2
+    n_values = n1 + n2
+    delta = means2 - means1
+    return (n_values, means1 + delta * n2 / n_values,
+            sq_norms1 + sq_norms2 + delta ** 2 * n1 * n2 / n_values,
+            res1 + res2)
+
+
+def _explained_variance_from_stats(stats, per_component=True):
+    n_values, _, sq_norms, res_sq_norm = stats
+    full_var = sq_norms[0] / n_values
+    if per_component:
+        res_var = sq_norms[1:] / n_values
+    else:
+        res_var = res_sq_norm
+    return np.maximum(0., 1. - res_var / full_var)
+
+
+def explained_variance(X, components, per_component=True,
+                       block_size=100 * 1024 ** 2):
     """Score function based on explained variance
 
         Parameters
@@ -441,29 +617,26 @@ def explained_variance(X, components, per_component=True):
             Specify whether the explained variance ratio is desired for each
             map or for the global set of components_
 
+        block_size: integer, optional
+            The samples are processed by blocks of about block_size bytes,
+            which bounds the memory used.
+
         Returns
         -------
         score: ndarray,
             Holds the score for each subjects. score is two dimensional if
             per_component = True
         """
-    full_var = np.var(X)
-    n_components = components.shape[0]
-    S = np.sqrt(np.sum(components ** 2, axis=1))
-    S[S == 0] = 1
-    components = components / S[:, np.newaxis]
-    projected_data = components.dot(X.T)
-    if per_component:
-        res_var = np.zeros(n_components)
-        for i in range(n_components):
-            res = X - np.outer(projected_data[i],
-                               components[i])
-            res_var[i] = np.var(res)
-        return np.maximum(0., 1. - res_var / full_var)
-    else:
-        lr = LinearRegression(fit_intercept=True)
-        lr.fit(components.T, X.T)
-        res_var = X - lr.coef_.dot(components)
-        res_var **= 2
-        res_var = np.sum(res_var)
-        return np.maximum(0., 1. - res_var / full_var)
+    components = _normalize_components(components)
+    regression_terms = None
+    if not per_component:
+        regression_terms = _regression_terms(components)
+    n_samples = max(1, int(block_size // (8 * X.shape[1])))
+    stats = None
+    for start in range(0, X.shape[0], n_samples):
+        stats = _merge_explained_variance_stats(
+            stats, _explained_variance_stats(
+                X[start:start + n_samples], components,
+                per_component=per_component,
+                regression_terms=regression_terms))
+    return _explained_variance_from_stats(stats, per_component)
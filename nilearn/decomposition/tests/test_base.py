@@ -2,9 +2,12 @@ import numpy as np
 from nose.tools import assert_true
 import nibabel
 from numpy.testing import assert_equal, assert_array_almost_equal
+import nilearn
 from nilearn._utils.testing import assert_raises_regex
-from nilearn.input_data import MultiNiftiMasker
-from nilearn.decomposition.base import BaseDecomposition, mask_and_reduce
+from sklearn.linear_model import LinearRegression
+from nilearn.input_data import MultiNiftiMasker, NiftiMapsMasker
+from nilearn.decomposition.base import (BaseDecomposition, mask_and_reduce,
+                                        explained_variance)
 
 def test_mask_reducer():
     shape = (6, 8, 10, 5)
@@ -97,4 +100,132 @@ def test_base_decomposition():
                         base_decomposition.fit, [])
 
 
+def test_explained_variance():
+    rng = np.random.RandomState(0)
+    components = rng.randn(4, 50)
+    components[-1] = 0
+    for offset in (0, 10):
+        X = rng.randn(20, 50) + offset
+        full_var = np.var(X)
+        normalized = components.copy()
+        normalized[:-1] /= np.sqrt(np.sum(components[:-1] ** 2,
+                                          axis=1))[:, np.newaxis]
+        res_var = [np.var(X - np.outer(X.dot(c), c)) for c in normalized]
+        expected = np.maximum(0, 1 - np.array(res_var) / full_var)
+        lr = LinearRegression(fit_intercept=True).fit(normalized.T, X.T)
+        res_sq_norm = np.sum((X - lr.coef_.dot(normalized)) ** 2)
+        expected_global = max(0, 1 - res_sq_norm / full_var)
+        # The samples are processed in one or several blocks
+        for block_size in (8 * 50 * 30, 8 * 50 * 3, 1):
+            assert_array_almost_equal(
+                explained_variance(X, components, block_size=block_size),
+                expected)
+            assert_array_almost_equal(
+                explained_variance(X, components, per_component=False,
+                                   block_size=block_size), expected_global)
+    # Perfect reconstruction
+    _, _, v = np.linalg.svd(X, full_matrices=False)
+    assert_array_almost_equal(explained_variance(X, v, per_component=False),
+                              1.)
+
+
+def test_base_decomposition_projection():
+    shape = (6, 8, 10, 5)
+    affine = np.eye(4)
+    rng = np.random.RandomState(0)
+    imgs = [nibabel.Nifti1Image(rng.normal(size=shape), affine)
+            for _ in range(5)]
+    mask = np.zeros(shape[:3], dtype=np.int8)
+    mask[1:-1, 1:-1, 1:-1] = 1
+    mask_img = nibabel.Nifti1Image(mask, affine)
+    decomposition = BaseDecomposition(mask=mask_img, n_components=3)
+    decomposition.fit(imgs)
+    decomposition.components_ = rng.randn(3, mask.sum())
+
+    components_img = decomposition.masker_.inverse_transform(
+        decomposition.components_)
+    maps_masker = NiftiMapsMasker(components_img, mask_img,
+                                  resampling_target='maps').fit()
+    expected = [maps_masker.transform(img) for img in imgs]
+    for n_jobs in (1, 2):
+        decomposition.n_jobs = n_jobs
+        loadings = decomposition.transform(imgs)
+        assert_equal(len(loadings), len(imgs))
+        for this_loadings, this_expected in zip(loadings, expected):
+            assert_array_almost_equal(this_loadings, this_expected)
+    # The maps masker of the components is kept, until they change
+    decomposition.n_jobs = 1
+    nifti_maps_masker = decomposition._get_maps_masker()
+    decomposition.transform(imgs[:1])
+    assert_true(decomposition._get_maps_masker() is nifti_maps_masker)
+    decomposition.components_ = decomposition.components_[::-1]
+    assert_true(decomposition._get_maps_masker() is not nifti_maps_masker)
+    decomposition.components_ = decomposition.components_[::-1]
+    # including in place
+    nifti_maps_masker = decomposition._get_maps_masker()
+    decomposition.components_ *= 2
+    this_loadings = decomposition.transform(imgs[:1])[0]
+    assert_true(decomposition._get_maps_masker() is not nifti_maps_masker)
+    assert_array_almost_equal(this_loadings, expected[0] / 2)
+    decomposition.components_ /= 2
+
+    # Inverse transform, with voxels where no component is positive
+    decomposition.components_[:, :10] = - abs(
+        decomposition.components_[:, :10])
+    maps_masker = NiftiMapsMasker(
+        decomposition.masker_.inverse_transform(decomposition.components_),
+        mask_img, resampling_target='maps').fit()
+    reconstructed = decomposition.inverse_transform(loadings[:2])
+    for img, this_loadings in zip(reconstructed, loadings[:2]):
+        assert_array_almost_equal(
+            img.get_data(),
+            maps_masker.inverse_transform(this_loadings).get_data())
+
+    # The score, computed subject by subject, is that of the data given by
+    # mask_and_reduce, also when the masker does not center the data
+    components = 1 + rng.randn(3, mask.sum())
+    imgs = [decomposition.masker_.inverse_transform(
+        (1 + rng.randn(shape[3], 3)).dot(components) +
+        1e-3 * rng.randn(shape[3], mask.sum())) for _ in range(5)]
+    decomposition.set_params(standardize=False, detrend=False)
+    decomposition.fit(imgs)
+    decomposition.components_ = components
+    expected = explained_variance(
+        mask_and_reduce(decomposition.masker_, imgs, reduction_ratio=1.),
+        components, per_component=False)
+    assert_true(expected > 0.5)
+    for n_jobs in (1, 2):
+        decomposition.n_jobs = n_jobs
+        assert_array_almost_equal(decomposition.score(imgs), expected)
+
+
 # Score is tested in multi_pca
+
+
+def test_mask_and_reduce_single_precision():
+    shape = (6, 8, 10, 5)
+    affine = np.eye(4)
+    rng = np.random.RandomState(0)
+    imgs = []
+    for i in range(4):
+        this_img = rng.normal(size=shape)
+        this_img[2:4, 2:4, 2:4, :] += 10
+        imgs.append(nibabel.Nifti1Image(this_img, affine))
+    mask_img = nibabel.Nifti1Image(np.ones(shape[:3], dtype=np.int8), affine)
+    masker = MultiNiftiMasker(mask_img=mask_img).fit()
+
+    for n_components in (None, 3):
+        data_double = mask_and_reduce(masker, imgs, n_components=n_components,
+                                      random_state=0)
+        nilearn.FLOAT_PRECISION = 'single'
+        try:
+            data_single = mask_and_reduce(masker, imgs,
+                                          n_components=n_components,
+                                          random_state=0)
+        finally:
+            nilearn.FLOAT_PRECISION = 'double'
+        assert_true(data_double.dtype == np.float64)
+        assert_true(data_single.dtype == np.float32)
+        # Documented tolerance of the single precision mode
+        np.testing.assert_allclose(data_single, data_double, rtol=1e-4,
+                                   atol=1e-4)
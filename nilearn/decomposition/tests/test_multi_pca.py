@@ -7,6 +7,7 @@ from nose.tools import assert_raises, assert_true
 import nibabel
 from numpy.testing import assert_almost_equal, assert_equal
 
+import nilearn
 from nilearn.decomposition.multi_pca import MultiPCA
 from nilearn.input_data import MultiNiftiMasker, NiftiMasker
 from nilearn._utils.testing import assert_raises_regex
@@ -115,3 +116,27 @@ def test_multi_pca_score():
     assert_equal(s.shape, (5,))
     assert_true(np.all(s <= 1))
     assert_true(np.all(0 <= s))
+
+
+def test_multi_pca_single_precision():
+    shape = (6, 8, 10, 5)
+    affine = np.eye(4)
+    rng = np.random.RandomState(0)
+    data = []
+    for i in range(4):
+        this_data = rng.normal(size=shape)
+        this_data[2:4, 2:4, 2:4, :] += 10
+        data.append(nibabel.Nifti1Image(this_data, affine))
+    mask_img = nibabel.Nifti1Image(np.ones(shape[:3], dtype=np.int8), affine)
+    multi_pca = MultiPCA(mask=mask_img, n_components=3, random_state=0)
+
+    components_double = multi_pca.fit(data).components_
+    nilearn.FLOAT_PRECISION = 'single'
+    try:
+        components_single = multi_pca.fit(data).components_
+    finally:
+        nilearn.FLOAT_PRECISION = 'double'
+    assert_true(components_single.dtype == np.float32)
+    # Documented tolerance of the single precision mode for decompositions
+    np.testing.assert_allclose(components_single, components_double,
+                               rtol=1e-3, atol=1e-3)
@@ -21,6 +21,7 @@ from .._utils import (check_niimg_4d, check_niimg_3d, check_niimg, as_ndarray,
                       _repr_niimgs)
 from .._utils.niimg_conversions import _index_img
 from .._utils.niimg import _safe_get_data
+from .._utils.numpy_conversions import _get_float_dtype
 from .._utils.compat import _basestring
 
 
@@ -186,10 +187,13 @@ def _smooth_array(arr, affine, fwhm=None, ensure_finite=True, copy=True):
 
     if arr.dtype.kind == 'i':
         if arr.dtype == np.int64:
-            arr = arr.astype(np.float64)
+            arr = arr.astype(_get_float_dtype(np.float64))
         else:
             # We don't need crazy precision
             arr = arr.astype(np.float32)
+    elif arr.dtype.kind == 'f' and _get_float_dtype(arr.dtype) != arr.dtype:
+        # Single precision mode
+        arr = arr.astype(np.float32)
     if copy:
         arr = arr.copy()
 
@@ -14,6 +14,7 @@ from scipy import ndimage, linalg
 
 from .. import _utils
 from .._utils.compat import _basestring
+from .._utils.numpy_conversions import _get_float_dtype
 
 ###############################################################################
 # Affine utils
@@ -269,7 +270,8 @@ def _resample_one_img(data, A, A_inv, b, target_shape,
 
 
 def resample_img(img, target_affine=None, target_shape=None,
-                 interpolation='continuous', copy=True, order="F"):
+                 interpolation='continuous', copy=True, order="F",
+                 float_precision=None):
     """Resample a Niimg-like object
 
     Parameters
@@ -300,6 +302,10 @@ def resample_img(img, target_affine=None, target_shape=None,
         Data ordering in output array. This function is slightly faster with
         Fortran ordering.
 
+    float_precision: {'single', 'double'}, optional
+        Precision of the continuous interpolation. If 'single', the output
+        is float32. Defaults to nilearn.FLOAT_PRECISION.
+
     Returns
     =======
     resampled: nibabel.Nifti1Image
@@ -461,7 +467,9 @@ def resample_img(img, target_affine=None, target_shape=None,
         if aux in ["float8", "float16"]:
             aux = "float32"
         warnings.warn("Casting data from %s to %s" % (data.dtype.name, aux))
-        resampled_data_dtype = np.dtype(aux)
+        resampled_data_dtype = _get_float_dtype(aux, float_precision)
+    elif interpolation == 'continuous' and data.dtype.kind == 'f':
+        resampled_data_dtype = _get_float_dtype(data.dtype, float_precision)
     else:
         resampled_data_dtype = data.dtype
 
@@ -484,6 +492,25 @@ def resample_img(img, target_affine=None, target_shape=None,
     return new_img_like(img, resampled_data, target_affine)
 
 
+def _get_reordered_grid(affine, shape):
+    """Return the affine and the shape of the grid on which reorder_img
+    resamples an image whose affine contains rotations.
+    """
+    # Identify the voxel size using a QR decomposition of the affine
+    Q, R = np.linalg.qr(affine[:3, :3])
+    target_affine = np.eye(4)
+    target_affine[:3, :3] = np.diag(np.abs(np.diag(R))[
+                                    np.abs(Q).argmax(axis=1)])
+    # Smallest bounding box of the data, as computed by resample_img
+    (xmin, xmax), (ymin, ymax), (zmin, zmax) = get_bounds(
+        shape[:3], np.linalg.inv(target_affine).dot(affine))
+    target_affine[:3, 3] = target_affine[:3, :3].dot([xmin, ymin, zmin])
+    target_shape = (int(np.ceil(xmax - xmin)) + 1,
+                    int(np.ceil(ymax - ymin)) + 1,
+                    int(np.ceil(zmax - zmin)) + 1)
+    return target_affine, target_shape
+
+
 def reorder_img(img, resample=None):
     """Returns an image with the affine diagonal (by permuting axes).
     The orientation of the new image will be RAS (Right, Anterior, Superior).
@@ -518,12 +545,10 @@ def reorder_img(img, resample=None):
             raise ValueError('Cannot reorder the axes: '
                              'the image affine contains rotations')
         else:
-            # Identify the voxel size using a QR decomposition of the
-            # affine
-            Q, R = np.linalg.qr(affine[:3, :3])
-            target_affine = np.diag(np.abs(np.diag(R))[
-                                                np.abs(Q).argmax(axis=1)])
+            target_affine, target_shape = _get_reordered_grid(affine,
+                                                              img.shape)
             return resample_img(img, target_affine=target_affine,
+                                target_shape=target_shape,
                                 interpolation=resample)
 
     axis_numbers = np.argmax(np.abs(A), axis=0)
@@ -7,14 +7,17 @@ from nose import SkipTest
 
 import platform
 import os
+import tempfile
 import nibabel
 import numpy as np
 from numpy.testing import assert_array_equal, assert_allclose
 
+import nilearn as ni
 from nilearn.image import image
 from nilearn.image import resampling
 from nilearn.image import concat_imgs
 from nilearn._utils import testing, niimg_conversions
+from nilearn._utils.niimg import _get_unloaded_proxy
 from nilearn.image import new_img_like
 
 X64 = (platform.architecture()[0] == '64bit')
@@ -297,6 +300,28 @@ def test_concat_imgs():
     assert_true(concat_imgs is niimg_conversions.concat_niimgs)
 
 
+def test_smooth_and_resample_single_precision():
+    img, _ = testing.generate_fake_fmri(length=3)
+    img = nibabel.Nifti1Image(img.get_data().astype(np.float64),
+                              img.get_affine())
+    smoothed_double = image.smooth_img(img, fwhm=3).get_data()
+    resampled_double = resampling.resample_img(
+        img, target_affine=2 * np.eye(3)).get_data()
+    ni.FLOAT_PRECISION = 'single'
+    try:
+        smoothed_single = image.smooth_img(img, fwhm=3).get_data()
+        resampled_single = resampling.resample_img(
+            img, target_affine=2 * np.eye(3)).get_data()
+    finally:
+        ni.FLOAT_PRECISION = 'double'
+    assert_true(smoothed_double.dtype == np.float64)
+    assert_true(smoothed_single.dtype == np.float32)
+    assert_true(resampled_single.dtype == np.float32)
+    assert_allclose(smoothed_single, smoothed_double, rtol=1e-4, atol=1e-4)
+    assert_allclose(resampled_single, resampled_double, rtol=1e-4,
+                    atol=1e-4)
+
+
 def test_index_img():
     img_3d = nibabel.Nifti1Image(np.ones((3, 4, 5)), np.eye(4))
     testing.assert_raises_regex(TypeError, '4D Niimg-like',
@@ -329,6 +354,29 @@ def test_index_img():
             image.index_img, img_4d, i)
 
 
+def test_index_img_from_file():
+    # Only the selected volumes of image files are read
+    img_4d, _ = testing.generate_fake_fmri(length=10)
+    tested_indices = [0, -1, slice(2, 8, 2), slice(3, 6), [1, 2, 3, 2],
+                      (np.arange(10) % 3) == 1]
+    for suffix in ('.nii', '.nii.gz'):
+        filename = tempfile.mktemp(suffix=suffix)
+        try:
+            nibabel.save(img_4d, filename)
+            img = nibabel.load(filename)
+            for i in tested_indices:
+                this_img = image.index_img(img, i)
+                assert_array_equal(this_img.get_data(),
+                                   img_4d.get_data()[..., i])
+            # The whole data has not been loaded in the image
+            assert_true(_get_unloaded_proxy(img) is not None)
+            for i, this_img in enumerate(image.iter_img(img)):
+                assert_array_equal(this_img.get_data(),
+                                   img_4d.get_data()[..., i])
+        finally:
+            os.remove(filename)
+
+
 def test_iter_img():
     img_3d = nibabel.Nifti1Image(np.ones((3, 4, 5)), np.eye(4))
     testing.assert_raises_regex(TypeError, '4D Niimg-like',
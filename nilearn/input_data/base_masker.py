@@ -6,6 +6,8 @@ Transformer used to apply basic transformations on MRI data.
 
 import warnings
 import abc
+import time
+from contextlib import contextmanager
 
 import numpy as np
 
@@ -19,6 +21,95 @@ from .. import _utils
 from .._utils.cache_mixin import CacheMixin, cache
 from .._utils.class_inspect import enclosing_scope_name
 from .._utils.compat import _basestring
+from .._utils.niimg import _get_data_dtype
+from .._utils.numpy_conversions import _check_float_precision
+
+
+# Functions called with the record of each stage of filter_and_extract,
+# see record_stages
+_STAGE_CALLBACKS = []
+
+
+@contextmanager
+def record_stages(callback=None):
+    """Context manager recording the stages of the transformations of
+    maskers.
+
+    Within this context, the transformations of all maskers (NiftiMasker,
+    MultiNiftiMasker, NiftiLabelsMasker, NiftiMapsMasker and
+    NiftiSpheresMasker) record, for each of their stages, a dictionary
+    with the following keys:
+
+    - 'masker': name of the masker and of its method
+    - 'stage': 'load', 'sample_mask', 'resample', 'smooth', 'extract' or
+      'clean'
+    - 'time': duration of the stage, in seconds
+    - 'shape' and 'nbytes': shape and size in bytes of the output of the
+      stage
+    - 'cache_hit': whether the output was loaded from the cache. It is
+      None if the stage is not cached, or if the memory of the masker does
+      not record statistics (see nilearn._utils.ManagedMemory).
+
+    Stages run in other processes (n_jobs > 1) are not recorded, nor are
+    those of transformations whose whole output is loaded from the cache.
+
+    Parameters
+    ----------
+    callback: callable, optional
+        Called with each record, as soon as the stage is done.
+
+    Returns
+    -------
+    records: list
+        The list of records, filled as the stages are run.
+
+    Examples
+    --------
+    >>> from nilearn.input_data import record_stages
+    >>> with record_stages() as records:  # doctest: +SKIP
+    ...     signals = masker.transform(img)
+    >>> sum(record['time'] for record in records)  # doctest: +SKIP
+    """
+    records = []
+
+    def record_stage(record):
+        records.append(record)
+        if callback is not None:
+            callback(record)
+
+    _STAGE_CALLBACKS.append(record_stage)
+    try:
+        yield records
+    finally:
+        _STAGE_CALLBACKS.remove(record_stage)
+
+
+def _run_stage(stage, class_name, func, *args, **kwargs):
+    """Run a stage of filter_and_extract, recording it if needed."""
+    if len(_STAGE_CALLBACKS) == 0:
+        return func(*args, **kwargs)
+
+    # Statistics of functions cached with a ManagedMemory
+    stats = getattr(func, 'stats', None)
+    hits = stats['hits'] if stats is not None else None
+    t0 = time.time()
+    output = func(*args, **kwargs)
+    duration = time.time() - t0
+
+    result = output[0] if isinstance(output, tuple) else output
+    shape = getattr(result, 'shape', None)
+    if hasattr(result, 'get_affine'):
+        # Do not load the data of images
+        nbytes = int(np.prod(shape)) * _get_data_dtype(result).itemsize
+    else:
+        nbytes = getattr(result, 'nbytes', None)
+    record = dict(masker=class_name, stage=stage, time=duration,
+                  shape=shape, nbytes=nbytes,
+                  cache_hit=(stats['hits'] > hits
+                             if stats is not None else None))
+    for callback in list(_STAGE_CALLBACKS):
+        callback(record)
+    return output
 
 
 def filter_and_extract(imgs, extraction_function,
@@ -26,7 +117,8 @@ def filter_and_extract(imgs, extraction_function,
                        memory_level=0, memory=Memory(cachedir=None),
                        verbose=0,
                        confounds=None,
-                       copy=True):
+                       copy=True,
+                       float_precision=None):
     """Extract representative time series using given function.
 
     Parameters
@@ -42,6 +134,10 @@ def filter_and_extract(imgs, extraction_function,
         If any other parameter is needed, a functor or a partial
         function must be provided.
 
+    float_precision: {'single', 'double'}, optional
+        Precision of the computations. Defaults to nilearn.FLOAT_PRECISION.
+        Maskers give it explicitly, so that it is part of the cache key.
+
     For all other parameters refer to NiftiMasker documentation
 
     Returns
@@ -51,9 +147,12 @@ def filter_and_extract(imgs, extraction_function,
         friendly 2D array with shape n_samples x n_features.
     """
     # Since the calling class can be any *Nifti*Masker, we look for exact type
-    if verbose > 0:
+    class_name = None
+    if verbose > 0 or len(_STAGE_CALLBACKS) > 0:
         class_name = enclosing_scope_name(stack_level=10)
 
+    float_precision = _check_float_precision(float_precision)
+
     # If we have a string (filename), we won't need to copy, as
     # there will be no side effect
     if isinstance(imgs, _basestring):
@@ -63,39 +162,45 @@ def filter_and_extract(imgs, extraction_function,
         print("[%s] Loading data from %s" % (
             class_name,
             _utils._repr_niimgs(imgs)[:200]))
-    imgs = _utils.check_niimg(imgs, atleast_4d=True, ensure_ndim=4)
+    imgs = _run_stage('load', class_name, _utils.check_niimg,
+                      imgs, atleast_4d=True, ensure_ndim=4)
 
     sample_mask = parameters.get('sample_mask')
     if sample_mask is not None:
-        imgs = image.index_img(imgs, sample_mask)
+        imgs = _run_stage('sample_mask', class_name, image.index_img,
+                          imgs, sample_mask)
 
     target_shape = parameters.get('target_shape')
     target_affine = parameters.get('target_affine')
     if target_shape is not None or target_affine is not None:
         if verbose > 0:
             print("[%s] Resampling images" % class_name)
-        imgs = cache(
-            image.resample_img, memory, func_memory_level=2,
-            memory_level=memory_level, ignore=['copy'])(
-                imgs, interpolation="continuous",
-                target_shape=target_shape,
-                target_affine=target_affine,
-                copy=copy)
+        imgs = _run_stage(
+            'resample', class_name,
+            cache(image.resample_img, memory, func_memory_level=2,
+                  memory_level=memory_level, ignore=['copy']),
+            imgs, interpolation="continuous",
+            target_shape=target_shape,
+            target_affine=target_affine,
+            copy=copy, float_precision=float_precision)
 
     smoothing_fwhm = parameters.get('smoothing_fwhm')
     if smoothing_fwhm is not None:
         if verbose > 0:
             print("[%s] Smoothing images" % class_name)
-        imgs = cache(
-            image.smooth_img, memory, func_memory_level=2,
-            memory_level=memory_level)(
-                imgs, parameters['smoothing_fwhm'])
+        imgs = _run_stage(
+            'smooth', class_name,
+            cache(image.smooth_img, memory, func_memory_level=2,
+                  memory_level=memory_level),
+            imgs, parameters['smoothing_fwhm'])
 
     if verbose > 0:
         print("[%s] Extracting region signals" % class_name)
-    region_signals, aux = cache(extraction_function, memory,
-                                func_memory_level=2,
-                                memory_level=memory_level)(imgs)
+    region_signals, aux = _run_stage(
+        'extract', class_name,
+        cache(extraction_function, memory, func_memory_level=2,
+              memory_level=memory_level),
+        imgs)
 
     # Temporal
     # ========
@@ -107,17 +212,19 @@ def filter_and_extract(imgs, extraction_function,
     if verbose > 0:
         print("[%s] Cleaning extracted signals" % class_name)
     sessions = parameters.get('sessions')
-    region_signals = cache(
-        signal.clean, memory=memory, func_memory_level=2,
-        memory_level=memory_level)(
-            region_signals,
-            detrend=parameters['detrend'],
-            standardize=parameters['standardize'],
-            t_r=parameters['t_r'],
-            low_pass=parameters['low_pass'],
-            high_pass=parameters['high_pass'],
-            confounds=confounds,
-            sessions=sessions)
+    region_signals = _run_stage(
+        'clean', class_name,
+        cache(signal.clean, memory=memory, func_memory_level=2,
+              memory_level=memory_level),
+        region_signals,
+        detrend=parameters['detrend'],
+        standardize=parameters['standardize'],
+        t_r=parameters['t_r'],
+        low_pass=parameters['low_pass'],
+        high_pass=parameters['high_pass'],
+        confounds=confounds,
+        sessions=sessions,
+        float_precision=float_precision)
 
     return region_signals, aux
 
@@ -219,15 +326,30 @@ class BaseMasker(BaseEstimator, TransformerMixin, CacheMixin):
     def inverse_transform(self, X):
         """ Transform the 2D data matrix back to an image in brain space.
         """
-        img = self._cache(masking.unmask)(X, self.mask_img_)
+        mask, indices = self._get_unmask_indices()
+        img = self._cache(masking._unmask_from_indices)(X, self.mask_img_,
+                                                        mask, indices)
         # Be robust again memmapping that will create read-only arrays in
         # internal structures of the header: remove the memmaped array
-        try:
-            img._header._structarr = np.array(img._header._structarr).copy()
-        except:
-            pass
+        for this_img in (img if isinstance(img, list) else [img]):
+            try:
+                this_img._header._structarr = np.array(
+                    this_img._header._structarr).copy()
+            except:
+                pass
         return img
 
+    def _get_unmask_indices(self):
+        """Return the boolean mask and the flat indices of its voxels, used
+        to unmask data. They are computed once for each fitted mask.
+        """
+        cached = getattr(self, '_unmask_indices_', None)
+        if cached is None or cached[0] is not self.mask_img_:
+            mask, _ = masking._load_mask_img(self.mask_img_)
+            cached = (self.mask_img_, mask, masking._unmask_indices(mask))
+            self._unmask_indices_ = cached
+        return cached[1:]
+
     def _check_fitted(self):
         if not hasattr(self, "mask_img_"):
             raise ValueError('It seems that %s has not been fitted. '
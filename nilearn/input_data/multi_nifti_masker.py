@@ -18,6 +18,7 @@ from .nifti_masker import NiftiMasker, filter_and_mask
 from .._utils.compat import _basestring, izip
 from .._utils.niimg_conversions import _iter_check_niimg
 from .._utils.class_inspect import get_params
+from .._utils.numpy_conversions import _check_float_precision
 
 
 class MultiNiftiMasker(NiftiMasker, CacheMixin):
@@ -249,12 +250,15 @@ class MultiNiftiMasker(NiftiMasker, CacheMixin):
             # Force resampling on first image
             target_fov = 'first'
 
+        # With a single job, the next image is loaded in the background
+        # while the current one is processed
         niimg_iter = _iter_check_niimg(imgs_list, ensure_ndim=None,
                                        atleast_4d=False,
                                        target_fov=target_fov,
                                        memory=self.memory,
                                        memory_level=self.memory_level,
-                                       verbose=self.verbose)
+                                       verbose=self.verbose,
+                                       n_prefetch=int(n_jobs == 1))
 
         if confounds is None:
             confounds = itertools.repeat(None, len(imgs_list))
@@ -274,7 +278,8 @@ class MultiNiftiMasker(NiftiMasker, CacheMixin):
                            memory=self.memory,
                            verbose=self.verbose,
                            confounds=cfs,
-                           copy=copy)
+                           copy=copy,
+                           float_precision=_check_float_precision())
             for imgs, cfs in izip(niimg_iter, confounds))
         return [d[0] for d in data]
 
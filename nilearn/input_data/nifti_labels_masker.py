@@ -9,6 +9,7 @@ from sklearn.externals.joblib import Memory
 from .. import _utils
 from .._utils import logger, CacheMixin, _compose_err_msg
 from .._utils.class_inspect import get_params
+from .._utils.numpy_conversions import _check_float_precision
 from .._utils.niimg_conversions import _check_same_fov
 from .. import region
 from .. import masking
@@ -255,7 +256,8 @@ class NiftiLabelsMasker(BaseMasker, CacheMixin):
             # Caching
             memory=self.memory,
             memory_level=self.memory_level,
-            verbose=self.verbose)
+            verbose=self.verbose,
+            float_precision=_check_float_precision())
 
         self.labels_ = labels_
 
@@ -9,6 +9,7 @@ from .. import _utils
 from .._utils import logger, CacheMixin
 from .._utils.niimg import _get_data_dtype
 from .._utils.class_inspect import get_params
+from .._utils.numpy_conversions import _check_float_precision
 from .._utils.niimg_conversions import _check_same_fov
 from .. import region
 from .. import image
@@ -19,14 +20,23 @@ class _ExtractionFunctor(object):
 
     func_name = 'nifti_maps_masker_extractor'
 
-    def __init__(self, _resampled_maps_img_, _resampled_mask_img_):
+    def __init__(self, _resampled_maps_img_, _resampled_mask_img_,
+                 _maps_projector_=None):
         self._resampled_maps_img_ = _resampled_maps_img_
         self._resampled_mask_img_ = _resampled_mask_img_
+        self._maps_projector_ = _maps_projector_
+
+    def __reduce__(self):
+        # The projector is computed from the maps and mask: it is left out
+        # of the pickled state, and thus of the hash of cached calls
+        return (self.__class__, (self._resampled_maps_img_,
+                                 self._resampled_mask_img_))
 
     def __call__(self, imgs):
             return region.img_to_signals_maps(
                 imgs, self._resampled_maps_img_,
-                mask_img=self._resampled_mask_img_)
+                mask_img=self._resampled_mask_img_,
+                projector=self._maps_projector_)
 
 
 class NiftiMapsMasker(BaseMasker, CacheMixin):
@@ -193,8 +203,31 @@ class NiftiMapsMasker(BaseMasker, CacheMixin):
                 interpolation="nearest",
                 copy=True)
 
+        # Images used for the extraction until transform resamples them
+        self._resampled_maps_img_ = self.maps_img_
+        self._resampled_mask_img_ = self.mask_img_
+        # The projector on the maps is computed at the first transform
+        self._maps_projector_ = None
         return self
 
+    def _get_maps_projector(self):
+        """Return the projector of voxel signals on the resampled maps.
+
+        It is computed once for given resampled maps and mask images.
+        """
+        cached = getattr(self, '_maps_projector_', None)
+        if (cached is None or cached[0] is not self._resampled_maps_img_ or
+                cached[1] is not self._resampled_mask_img_):
+            mask_data = None
+            if self._resampled_mask_img_ is not None:
+                mask_data = self._resampled_mask_img_.get_data()
+            projector = region._MapsProjector(
+                self._resampled_maps_img_.get_data(), mask_data)
+            cached = (self._resampled_maps_img_, self._resampled_mask_img_,
+                      projector)
+            self._maps_projector_ = cached
+        return cached[2]
+
     def _check_fitted(self):
         if not hasattr(self, "maps_img_"):
             raise ValueError('It seems that %s has not been fitted. '
@@ -259,7 +292,8 @@ class NiftiMapsMasker(BaseMasker, CacheMixin):
                 self._resampled_maps_img_ = self._cache(image.resample_img)(
                         self.maps_img_, interpolation="continuous",
                         target_shape=ref_img.shape[:3],
-                        target_affine=ref_img.get_affine())
+                        target_affine=ref_img.get_affine(),
+                        float_precision=_check_float_precision())
 
             if (self.mask_img_ is not None and
                     not _check_same_fov(ref_img, self.mask_img_)):
@@ -302,7 +336,8 @@ class NiftiMapsMasker(BaseMasker, CacheMixin):
             filter_and_extract, ignore=['verbose', 'memory', 'memory_level'])(
                 # Images
                 imgs, _ExtractionFunctor(self._resampled_maps_img_,
-                                         self._resampled_mask_img_),
+                                         self._resampled_mask_img_,
+                                         self._get_maps_projector()),
                 # Pre-treatments
                 params,
                 confounds=confounds,
@@ -310,7 +345,8 @@ class NiftiMapsMasker(BaseMasker, CacheMixin):
                 memory=self.memory,
                 memory_level=self.memory_level,
                 # kwargs
-                verbose=self.verbose)
+                verbose=self.verbose,
+                float_precision=_check_float_precision())
         self.labels_ = labels_
 
         return region_signals
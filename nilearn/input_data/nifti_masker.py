@@ -5,6 +5,8 @@ Transformer used to apply basic transformations on MRI data.
 # License: simplified BSD
 
 from copy import copy as copy_object
+
+import numpy as np
 from sklearn.externals.joblib import Memory
 
 from .. import masking
@@ -12,6 +14,7 @@ from .. import image
 from .. import _utils
 from .._utils import CacheMixin
 from .._utils.class_inspect import get_params
+from .._utils.numpy_conversions import _check_float_precision
 from .base_masker import BaseMasker, filter_and_extract
 from nilearn._utils.niimg_conversions import _check_same_fov
 
@@ -20,19 +23,24 @@ class _ExtractionFunctor(object):
 
     func_name = 'nifti_masker_extractor'
 
-    def __init__(self, mask_img_):
+    def __init__(self, mask_img_, float_precision='double'):
         self.mask_img_ = mask_img_
+        self.float_precision = float_precision
 
     def __call__(self, imgs):
-        return masking.apply_mask(imgs, self.mask_img_), imgs.get_affine()
+        dtype = np.float32 if self.float_precision == 'single' else 'f'
+        return (masking.apply_mask(imgs, self.mask_img_, dtype=dtype),
+                imgs.get_affine())
 
 
 def filter_and_mask(imgs, mask_img_, parameters,
                     memory_level=0, memory=Memory(cachedir=None),
                     verbose=0,
                     confounds=None,
-                    copy=True):
+                    copy=True,
+                    float_precision=None):
 
+    float_precision = _check_float_precision(float_precision)
     imgs = _utils.check_niimg(imgs, atleast_4d=True, ensure_ndim=4)
 
     # Check whether resampling is truly necessary. If so, crop mask
@@ -45,12 +53,15 @@ def filter_and_mask(imgs, mask_img_, parameters,
         parameters['target_shape'] = mask_img_.shape
         parameters['target_affine'] = mask_img_.get_affine()
 
-    data, affine = filter_and_extract(imgs, _ExtractionFunctor(mask_img_),
+    data, affine = filter_and_extract(imgs,
+                                      _ExtractionFunctor(mask_img_,
+                                                         float_precision),
                                       parameters,
                                       memory_level=memory_level,
                                       memory=memory,
                                       verbose=verbose,
-                                      confounds=confounds, copy=copy)
+                                      confounds=confounds, copy=copy,
+                                      float_precision=float_precision)
 
     # For _later_: missing value removal or imputing of missing data
     # (i.e. we want to get rid of NaNs, if smoothing must be done
@@ -286,6 +297,7 @@ class NiftiMasker(BaseMasker, CacheMixin):
                                     memory=self.memory,
                                     verbose=self.verbose,
                                     confounds=confounds,
-                                    copy=copy
+                                    copy=copy,
+                                    float_precision=_check_float_precision()
         )
         return data
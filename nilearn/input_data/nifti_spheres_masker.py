@@ -5,7 +5,6 @@ Mask nifti images by spherical volumes for seed-region analyses
 """
 import numpy as np
 import sklearn
-from sklearn import neighbors
 from sklearn.externals.joblib import Memory
 from distutils.version import LooseVersion
 
@@ -13,6 +12,7 @@ from ..image.resampling import coord_transform
 from .._utils import CacheMixin
 from .._utils.niimg_conversions import check_niimg_4d, check_niimg_3d
 from .._utils.class_inspect import get_params
+from .._utils.numpy_conversions import _check_float_precision
 from .. import image
 from .. import masking
 from .base_masker import filter_and_extract, BaseMasker
@@ -48,6 +48,7 @@ def _apply_mask_and_get_affinity(seeds, niimg, radius, allow_overlap,
         # https://github.com/scikit-learn/scikit-learn/issues/4072
         radius += 1e-6
 
+    from sklearn import neighbors  # slow to import
     clf = neighbors.NearestNeighbors(radius=radius)
     A = clf.fit(mask_coords).radius_neighbors_graph(seeds)
     A = A.tolil()
@@ -301,6 +302,7 @@ class NiftiSpheresMasker(BaseMasker, CacheMixin):
             memory=self.memory,
             memory_level=self.memory_level,
             # kwargs
-            verbose=self.verbose)
+            verbose=self.verbose,
+            float_precision=_check_float_precision())
 
         return signals
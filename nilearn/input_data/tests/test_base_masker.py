@@ -6,8 +6,12 @@ import numpy as np
 from numpy.testing import assert_array_almost_equal
 import nibabel
 
+from nose.tools import assert_equal, assert_true
+
 from nilearn.input_data.nifti_masker import filter_and_mask
+from nilearn.input_data import NiftiMasker, NiftiLabelsMasker, record_stages
 from nilearn import image
+from nilearn._utils.testing import generate_fake_fmri, generate_labeled_regions
 
 
 def test_cropping_code_paths():
@@ -49,3 +53,31 @@ def test_cropping_code_paths():
                                                        parameters)
 
     assert_array_almost_equal(out_data_cropped, out_data_uncropped)
+
+
+def test_record_stages():
+    fmri, mask = generate_fake_fmri(shape=(7, 8, 9), length=10)
+    labels = generate_labeled_regions((7, 8, 9), 3, affine=fmri.get_affine())
+    callback_records = []
+
+    masker = NiftiMasker(mask_img=mask, smoothing_fwhm=4, detrend=True).fit()
+    # No record outside of the context
+    masker.transform(fmri)
+    with record_stages(callback_records.append) as records:
+        signals = masker.transform(fmri)
+    assert_equal([r['stage'] for r in records],
+                 ['load', 'smooth', 'extract', 'clean'])
+    assert_equal(callback_records, records)
+    assert_true(all(r['masker'].startswith('NiftiMasker') for r in records))
+    assert_equal(records[0]['shape'], fmri.shape)
+    assert_equal(records[-1]['shape'], signals.shape)
+    assert_equal(records[-1]['nbytes'], signals.nbytes)
+    assert_true(all(r['time'] >= 0 for r in records))
+    assert_true(all(r['cache_hit'] is None for r in records))
+
+    labels_masker = NiftiLabelsMasker(labels).fit()
+    with record_stages() as records:
+        signals = labels_masker.transform(fmri)
+    assert_equal([r['stage'] for r in records], ['load', 'extract', 'clean'])
+    assert_true(records[0]['masker'].startswith('NiftiLabelsMasker'))
+    assert_equal(records[-1]['shape'], signals.shape)
@@ -5,12 +5,16 @@ non_overlappingt the underlying functions (clean(), img_to_signals_labels(), etc
 test_masking.py and test_signal.py for details.
 """
 
-from nose.tools import assert_raises, assert_equal
+from nose.tools import assert_raises, assert_equal, assert_true
 import numpy as np
 
 import nibabel
 
-from nilearn.input_data.nifti_maps_masker import NiftiMapsMasker
+from sklearn.externals.joblib import hash
+
+from nilearn.input_data.nifti_maps_masker import (NiftiMapsMasker,
+                                                  _ExtractionFunctor)
+from nilearn import region
 from nilearn._utils import testing, as_ndarray
 from nilearn._utils.exceptions import DimensionError
 from nilearn._utils.testing import assert_less, assert_raises_regex
@@ -270,3 +274,40 @@ def test_nifti_maps_masker_overlap():
                                              allow_overlap=False)
     assert_raises_regex(ValueError, 'Overlap detected',
                         non_overlapping_masker.fit_transform, fmri_img)
+
+
+def test_nifti_maps_masker_projector():
+    shape = (9, 10, 11)
+    length = 5
+    fmri_img, mask_img = generate_random_img(shape, length=length)
+    maps_img, _ = testing.generate_maps(shape, 4)
+    expected, _ = region.img_to_signals_maps(fmri_img, maps_img,
+                                             mask_img=mask_img)
+
+    masker = NiftiMapsMasker(maps_img, mask_img=mask_img).fit()
+    np.testing.assert_almost_equal(masker.transform(fmri_img), expected)
+    # The projector is computed once for the fitted maps
+    projector = masker._get_maps_projector()
+    masker.transform(fmri_img)
+    assert_true(masker._get_maps_projector() is projector)
+    # and again after a new fit
+    masker.fit()
+    assert_true(masker._get_maps_projector() is not projector)
+
+    # The projector is not hashed with the extraction functor
+    functor = _ExtractionFunctor(masker._resampled_maps_img_,
+                                 masker._resampled_mask_img_)
+    assert_equal(hash(functor),
+                 hash(_ExtractionFunctor(masker._resampled_maps_img_,
+                                         masker._resampled_mask_img_,
+                                         masker._get_maps_projector())))
+
+    # Resampling to the data
+    fmri_img2, _ = generate_random_img((7, 8, 9), length=length,
+                                       affine=2 * np.eye(4))
+    masker = NiftiMapsMasker(maps_img, resampling_target='data').fit()
+    masker.transform(fmri_img)
+    projector = masker._get_maps_projector()
+    signals = masker.transform(fmri_img2)
+    assert_equal(signals.shape, (length, 4))
+    assert_true(masker._get_maps_projector() is not projector)
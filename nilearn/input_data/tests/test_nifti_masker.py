@@ -20,6 +20,7 @@ from numpy.testing import assert_array_equal
 from nibabel import Nifti1Image
 import nibabel
 
+import nilearn
 from nilearn.input_data.nifti_masker import NiftiMasker, filter_and_mask
 from nilearn._utils import testing
 from nilearn._utils.exceptions import DimensionError
@@ -119,6 +120,28 @@ def test_matrix_orientation():
     np.testing.assert_array_almost_equal(recovered.get_data(), fmri.get_data())
 
 
+def test_inverse_transform_unmask_indices():
+    fmri, mask = testing.generate_fake_fmri(shape=(10, 11, 12), length=5)
+    masker = NiftiMasker(mask_img=mask).fit()
+    timeseries = masker.transform(fmri)
+    recovered = masker.inverse_transform(timeseries)
+    assert_array_equal(recovered.get_data(),
+                       fmri.get_data() * mask.get_data()[..., np.newaxis])
+    # The indices are computed once for a fitted mask
+    _, indices = masker._get_unmask_indices()
+    assert_true(masker._get_unmask_indices()[1] is indices)
+    # Lists are unmasked with the same indices
+    recovered = masker.inverse_transform([timeseries, timeseries[0]])
+    assert_array_equal(recovered[1].get_data(),
+                       fmri.get_data()[..., 0] * mask.get_data())
+    # and refitting recomputes them
+    mask_data = mask.get_data().copy()
+    mask_data[:5] = 0
+    masker.set_params(mask_img=Nifti1Image(mask_data, mask.get_affine()))
+    masker.fit()
+    assert_true(masker._get_unmask_indices()[1].shape[0] < indices.shape[0])
+
+
 def test_mask_3d():
     # Dummy mask
     data = np.zeros((40, 40, 40, 2))
@@ -315,3 +338,37 @@ def test_filter_and_mask():
 
     assert_raises_regex(DimensionError, "Data must be a 3D", filter_and_mask,
                          data_img, mask_img, params)
+
+
+def test_nifti_masker_single_precision():
+    data_img, mask_img = testing.generate_fake_fmri(length=10)
+    data_img = nibabel.Nifti1Image(data_img.get_data().astype(np.float64),
+                                   data_img.get_affine())
+    masker = NiftiMasker(mask_img=mask_img, smoothing_fwhm=3,
+                         standardize=True, detrend=True)
+    signals_double = masker.fit_transform(data_img)
+    nilearn.FLOAT_PRECISION = 'single'
+    try:
+        signals_single = masker.fit_transform(data_img)
+    finally:
+        nilearn.FLOAT_PRECISION = 'double'
+    assert_true(signals_double.dtype == np.float64)
+    assert_true(signals_single.dtype == np.float32)
+    # Documented tolerance of the single precision mode
+    np.testing.assert_allclose(signals_single, signals_double, rtol=1e-4,
+                               atol=1e-4)
+
+    # The precision is part of the key of the cached results
+    cachedir = mkdtemp()
+    try:
+        masker = NiftiMasker(mask_img=mask_img, smoothing_fwhm=3,
+                             standardize=True, detrend=True,
+                             memory=cachedir, memory_level=2)
+        assert_true(masker.fit_transform(data_img).dtype == np.float64)
+        nilearn.FLOAT_PRECISION = 'single'
+        try:
+            assert_true(masker.fit_transform(data_img).dtype == np.float32)
+        finally:
+            nilearn.FLOAT_PRECISION = 'double'
+    finally:
+        shutil.rmtree(cachedir, ignore_errors=True)
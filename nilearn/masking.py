@@ -13,7 +13,9 @@ from . import _utils
 from .image import new_img_like
 from ._utils.cache_mixin import cache
 from ._utils.ndimage import largest_connected_component, get_border_data
-from ._utils.niimg import _safe_get_data
+from ._utils.niimg import (_safe_get_data, _get_unloaded_proxy,
+                           _is_compressed)
+from ._utils.numpy_conversions import _get_float_dtype
 
 
 class MaskWarning(UserWarning):
@@ -592,6 +594,14 @@ def _apply_mask_fmri(imgs, mask_img, dtype='f',
         raise ValueError('Mask shape: %s is different from img shape:%s'
                          % (str(mask_data.shape), str(imgs_img.shape[:3])))
 
+    if (smoothing_fwhm is None and len(imgs_img.shape) == 4 and
+            _get_unloaded_proxy(imgs_img) is not None and
+            not _is_compressed(imgs_img)):
+        # The data is still in an uncompressed file: read it by blocks of
+        # volumes, keeping only the voxels in the mask
+        return _apply_mask_fmri_by_blocks(imgs_img, mask_data, dtype=dtype,
+                                          ensure_finite=ensure_finite)
+
     # All the following has been optimized for C order.
     # Time that may be lost in conversion here is regained multiple times
     # afterward, especially if smoothing is applied.
@@ -599,7 +609,7 @@ def _apply_mask_fmri(imgs, mask_img, dtype='f',
 
     if dtype == 'f':
         if series.dtype.kind == 'f':
-            dtype = series.dtype
+            dtype = _get_float_dtype(series.dtype)
         else:
             dtype = np.float32
     series = _utils.as_ndarray(series, dtype=dtype, order="C",
@@ -608,12 +618,81 @@ def _apply_mask_fmri(imgs, mask_img, dtype='f',
 
     # Delayed import to avoid circular imports
     from .image.image import _smooth_array
-    _smooth_array(series, affine, fwhm=smoothing_fwhm,
-                  ensure_finite=ensure_finite, copy=False)
+    series = _smooth_array(series, affine, fwhm=smoothing_fwhm,
+                           ensure_finite=ensure_finite, copy=False)
     return series[mask_data].T
 
 
-def _unmask_3d(X, mask, order="C"):
+def _apply_mask_fmri_by_blocks(imgs_img, mask_data, dtype='f',
+                               ensure_finite=True,
+                               block_size=100 * 1024 ** 2):
+    """Apply a mask to a 4D image whose data has not been loaded.
+
+    The data is read from the file by blocks of volumes of approximately
+    block_size bytes, and converted to dtype. Only the masked data is kept
+    in memory: the memory used is proportional to the size of the output.
+    """
+    proxy = _get_unloaded_proxy(imgs_img)
+    n_scans = imgs_img.shape[3]
+    volume_size = mask_data.size * imgs_img.get_data_dtype().itemsize
+    n_volumes = max(1, int(block_size // volume_size))
+
+    series = None
+    for start in range(0, n_scans, n_volumes):
+        stop = min(start + n_volumes, n_scans)
+        block = np.asarray(proxy[:, :, :, start:stop])
+        if series is None:
+            if dtype == 'f':
+                if block.dtype.kind == 'f':
+                    dtype = _get_float_dtype(block.dtype)
+                else:
+                    dtype = np.float32
+            elif dtype is None:
+                # Keep the dtype of the data, as _apply_mask_fmri does
+                dtype = block.dtype
+            series = np.empty((mask_data.sum(), n_scans), dtype=dtype)
+        block = block[mask_data].astype(dtype)
+        if ensure_finite and block.dtype.kind == 'f':
+            block[np.logical_not(np.isfinite(block))] = 0
+        series[:, start:stop] = block
+        del block
+    return series.T
+
+
+def _unmask_indices(mask, order="F"):
+    """Return the flat indices of the voxels of a mask.
+
+    Parameters
+    ==========
+    mask: numpy.ndarray
+        3D boolean mask.
+
+    order: "F" or "C"
+        Memory order of the arrays the indices are computed for.
+
+    Returns
+    =======
+    indices: numpy.ndarray
+        The index of each voxel of the mask in an array of the shape of
+        mask flattened in the given order, sorted as the masked data (ie
+        in C order).
+    """
+    return np.ravel_multi_index(np.nonzero(mask), mask.shape, order=order)
+
+
+def _check_unmask_output(out, shape, order):
+    """Check that out, if not None, can receive the unmasked data."""
+    if out is None:
+        return None
+    if out.shape != shape:
+        raise ValueError('out must be of shape %s, got %s'
+                         % (shape, out.shape))
+    if not out.flags['%s_CONTIGUOUS' % order]:
+        raise ValueError('out must be a %s-contiguous array' % order)
+    return out
+
+
+def _unmask_3d(X, mask, order="C", indices=None, out=None):
     """Take masked data and bring them back to 3D (space only).
 
     Parameters
@@ -624,24 +703,38 @@ def _unmask_3d(X, mask, order="C"):
     mask: Niimg-like object
         See http://nilearn.github.io/manipulating_visualizing/manipulating_images.html#niimg.
         Mask. mask.ndim must be equal to 3, and dtype *must* be bool.
+
+    indices: numpy.ndarray, optional
+        The flat indices of the voxels of the mask, as returned by
+        _unmask_indices(mask, order). Computed if not given.
+
+    out: numpy.ndarray, optional
+        Array in which to write the unmasked data. It must have the
+        shape of the mask, and the given memory order. Only the voxels of
+        the mask are written: the other values are left unchanged, and
+        should be zero.
     """
 
     if mask.dtype != np.bool:
         raise TypeError("mask must be a boolean array")
     if X.ndim != 1:
         raise TypeError("X must be a 1-dimensional array")
-    n_features = mask.sum()
+    if indices is None:
+        indices = _unmask_indices(mask, order=order)
+    n_features = indices.shape[0]
     if X.shape[0] != n_features:
         raise TypeError('X must be of shape (samples, %d).' % n_features)
 
-    data = np.zeros(
-        (mask.shape[0], mask.shape[1], mask.shape[2]),
-        dtype=X.dtype, order=order)
-    data[mask] = X
+    data = _check_unmask_output(out, mask.shape, order)
+    if data is None:
+        data = np.zeros(mask.shape, dtype=X.dtype, order=order)
+    # For a F-ordered array, the flat indices of the transposed array are
+    # those of the array in F order
+    np.put(data.T if order == "F" else data, indices, X)
     return data
 
 
-def _unmask_4d(X, mask, order="C"):
+def _unmask_4d(X, mask, order="C", indices=None, out=None):
     """Take masked data and bring them back to 4D.
 
     Parameters
@@ -652,6 +745,16 @@ def _unmask_4d(X, mask, order="C"):
     mask: numpy.ndarray
         Mask. mask.ndim must be equal to 4, and dtype *must* be bool.
 
+    indices: numpy.ndarray, optional
+        The flat indices of the voxels of the mask, as returned by
+        _unmask_indices(mask, order). Computed if not given.
+
+    out: numpy.ndarray, optional
+        Array in which to write the unmasked data, of the shape of the
+        result and with the given memory order. Only the voxels of the
+        mask are written: the other values are left unchanged, and should
+        be zero.
+
     Returns
     =======
     data: numpy.ndarray
@@ -663,19 +766,58 @@ def _unmask_4d(X, mask, order="C"):
         raise TypeError("mask must be a boolean array")
     if X.ndim != 2:
         raise TypeError("X must be a 2-dimensional array")
-    n_features = mask.sum()
+    if indices is None:
+        indices = _unmask_indices(mask, order=order)
+    n_features = indices.shape[0]
     if X.shape[1] != n_features:
         raise TypeError('X must be of shape (samples, %d).' % n_features)
 
-    data = np.zeros(mask.shape + (X.shape[0],), dtype=X.dtype, order=order)
-    data[mask, :] = X.T
+    shape = mask.shape + (X.shape[0],)
+    data = _check_unmask_output(out, shape, order)
+    if data is None:
+        data = np.zeros(shape, dtype=X.dtype, order=order)
+    if order == "F":
+        # Each volume is contiguous: scatter the samples one by one
+        volumes = data.T
+        for volume, x in zip(volumes, X):
+            np.put(volume, indices, x)
+    else:
+        # Each voxel is contiguous: scatter the time series as rows
+        data.reshape((-1, X.shape[0]))[indices] = X.T
     return data
 
 
-def unmask(X, mask_img, order="F"):
+def _unmask_from_indices(X, mask_img, mask, indices, order="F", out=None):
+    """Unmask X, with the mask of mask_img already loaded in mask, and
+    its flat indices computed with _unmask_indices(mask, order).
+
+    See unmask for the parameters.
+    """
+    if isinstance(X, list):
+        if out is None:
+            out = [None] * len(X)
+        return [_unmask_from_indices(x, mask_img, mask, indices,
+                                     order=order, out=this_out)
+                for x, this_out in zip(X, out)]
+
+    if X.ndim == 2:
+        unmasked = _unmask_4d(X, mask, order=order, indices=indices,
+                              out=out)
+    elif X.ndim == 1:
+        unmasked = _unmask_3d(X, mask, order=order, indices=indices,
+                              out=out)
+    else:
+        raise TypeError("Masked data X must be 2D or 1D array; "
+                        "got shape: %s" % str(X.shape))
+
+    return new_img_like(mask_img, unmasked, mask_img.get_affine())
+
+
+def unmask(X, mask_img, order="F", out=None):
     """Take masked data and bring them back into 3D/4D
 
-    This function can be applied to a list of masked data.
+    This function can be applied to a list of masked data: the mask is
+    then loaded only once.
 
     Parameters
     ==========
@@ -685,6 +827,15 @@ def unmask(X, mask_img, order="F"):
     mask_img: niimg: Niimg-like object
         See http://nilearn.github.io/manipulating_visualizing/manipulating_images.html#niimg.
         Must be 3-dimensional.
+    order: "F" or "C", optional
+        Memory order of the unmasked data.
+    out: numpy.ndarray (or list of), optional
+        Preallocated array in which to write the unmasked data, with the
+        shape of the result and the memory order given by order. Only the
+        voxels of the mask are written: the other values must be zero, as
+        in an array returned by a previous call with the same mask. The
+        returned image then holds out as its data. If X is a list, out
+        must be a list of the same length.
 
     Returns
     =======
@@ -697,22 +848,12 @@ def unmask(X, mask_img, order="F"):
         - X.ndim == 1:
           Shape: (mask.shape[0], mask.shape[1], mask.shape[2])
     """
-
-    if isinstance(X, list):
-        ret = []
-        for x in X:
-            ret.append(unmask(x, mask_img, order=order))  # 1-level recursion
-        return ret
+    if isinstance(X, list) and out is not None and len(out) != len(X):
+        raise ValueError('out must be a list of the same length as X: '
+                         'got %i arrays for %i' % (len(out), len(X)))
 
     mask_img = _utils.check_niimg_3d(mask_img)
-    mask, affine = _load_mask_img(mask_img)
-
-    if X.ndim == 2:
-        unmasked = _unmask_4d(X, mask, order=order)
-    elif X.ndim == 1:
-        unmasked = _unmask_3d(X, mask, order=order)
-    else:
-        raise TypeError("Masked data X must be 2D or 1D array; "
-                        "got shape: %s" % str(X.shape))
-
-    return new_img_like(mask_img, unmasked, affine)
+    mask, _ = _load_mask_img(mask_img)
+    indices = _unmask_indices(mask, order=order)
+    return _unmask_from_indices(X, mask_img, mask, indices, order=order,
+                                out=out)
@@ -36,8 +36,9 @@ from .img_plotting import plot_img, plot_anat, plot_epi, \
     plot_roi, plot_stat_map, plot_glass_brain, plot_connectome, \
     plot_prob_atlas, show
 from .find_cuts import find_xyz_cut_coords
+from .batch_plotting import plot_batch
 
 __all__ = ['cm', 'plot_img', 'plot_anat', 'plot_epi',
            'plot_roi', 'plot_stat_map', 'plot_glass_brain',
-           'plot_connectome', 'plot_prob_atlas',
+           'plot_connectome', 'plot_prob_atlas', 'plot_batch',
            'find_xyz_cut_coords', 'show']
@@ -0,0 +1,224 @@
+"""
+Plotting of many images to files, reusing the displays and their
+backgrounds.
+"""
+
+# License: BSD
+
+import numbers
+import time
+
+import numpy as np
+
+from sklearn.externals.joblib import Parallel, delayed
+
+from .. import _utils
+from .._utils.parallel import _split_batches
+from .displays import get_slicer, SLICERS
+from .img_plotting import (plot_img, plot_roi, plot_stat_map,
+                           plot_glass_brain, _load_anat, _plot_img_with_bg,
+                           MNI152TEMPLATE)
+
+
+# Defaults of the parameters used to draw the background, for the
+# functions supported by plot_batch
+_DEFAULTS = {
+    plot_img: dict(bg_img=None, dim=False, black_bg=False, colorbar=False,
+                   threshold=None),
+    plot_roi: dict(bg_img=MNI152TEMPLATE, dim=True, black_bg='auto',
+                   colorbar=False, threshold=.5),
+    plot_stat_map: dict(bg_img=MNI152TEMPLATE, dim=True, black_bg='auto',
+                        colorbar=True, threshold=1e-6),
+    plot_glass_brain: dict(black_bg=False, colorbar=False, alpha=.7,
+                           plot_abs=True),
+}
+
+
+def _make_display_template(plot_func, display_mode, cut_coords, kwargs):
+    """Create the display, with its background, shared by all the images.
+
+    Returns the display, and the keyword arguments to pass to plot_func to
+    plot an image on it.
+    """
+    defaults = _DEFAULTS[plot_func]
+    params = dict((name, kwargs.pop(name, default))
+                  for name, default in defaults.items())
+    if plot_func is plot_glass_brain:
+        # The glass brain schematics are drawn when creating the display
+        display = plot_glass_brain(None, display_mode=display_mode,
+                                   colorbar=params['colorbar'],
+                                   black_bg=params['black_bg'],
+                                   alpha=params['alpha'],
+                                   plot_abs=params['plot_abs'],
+                                   annotate=False)
+        kwargs.update(params)
+    else:
+        bg_img, black_bg, bg_vmin, bg_vmax = _load_anat(
+            params['bg_img'], dim=params['dim'], black_bg=params['black_bg'])
+        display = _plot_img_with_bg(None, bg_img=bg_img,
+                                    cut_coords=cut_coords,
+                                    display_mode=display_mode,
+                                    colorbar=params['colorbar'],
+                                    black_bg=black_bg,
+                                    bg_vmin=bg_vmin, bg_vmax=bg_vmax,
+                                    annotate=False, draw_cross=False)
+        # The background is already drawn
+        kwargs.update(bg_img=None, black_bg=black_bg,
+                      colorbar=params['colorbar'],
+                      threshold=params['threshold'])
+        if plot_func is plot_roi:
+            # plot_roi has no threshold parameter
+            kwargs.pop('threshold')
+    return display, kwargs
+
+
+def _get_display_state(display):
+    """Return what is needed to remove what is plotted on a display."""
+    figure = display.frame_axes.figure
+    return dict(
+        children=dict((ax, set(ax.get_children())) for ax in figure.axes),
+        limits=dict((ax, ax.axis()) for ax in figure.axes),
+        object_bounds=dict((direction, list(display_ax._object_bounds))
+                           for direction, display_ax in
+                           display.axes.items()),
+        attributes=display.__dict__.copy())
+
+
+def _restore_display_state(display, state):
+    """Remove from a display what was plotted since state was taken."""
+    figure = display.frame_axes.figure
+    for ax in list(figure.axes):
+        if ax not in state['children']:
+            # eg the axes of a colorbar
+            figure.delaxes(ax)
+            continue
+        for artist in ax.get_children():
+            if artist not in state['children'][ax]:
+                artist.remove()
+        ax.axis(state['limits'][ax])
+    for direction, display_ax in display.axes.items():
+        display_ax._object_bounds[:] = state['object_bounds'][direction]
+    display.__dict__.clear()
+    display.__dict__.update(state['attributes'])
+
+
+def _plot_batch(plot_func, imgs, output_files, titles, display_mode,
+                cut_coords, dpi, kwargs):
+    """Plot a list of images on the same display. Returns the time taken
+    by each image.
+    """
+    display, kwargs = _make_display_template(plot_func, display_mode,
+                                             cut_coords, kwargs.copy())
+    state = _get_display_state(display)
+    timings = []
+    try:
+        for img, output_file, title in zip(imgs, output_files, titles):
+            t0 = time.time()
+            plot_func(img, display=display, title=title, **kwargs)
+            display.savefig(output_file, dpi=dpi)
+            _restore_display_state(display, state)
+            timings.append(time.time() - t0)
+    finally:
+        display.close()
+    return timings
+
+
+def plot_batch(imgs, output_files, plot_func=plot_stat_map, titles=None,
+               display_mode='ortho', cut_coords=None, dpi=None, n_jobs=1,
+               verbose=0, **kwargs):
+    """Plot many images to files, reusing the same display.
+
+    The display, with its background image (or glass brain schematics), is
+    created once per job, and only the images are plotted for each file.
+    This is much faster than calling plot_func on each image.
+
+    Parameters
+    ----------
+    imgs: list of Niimg-like objects
+        See http://nilearn.github.io/manipulating_visualizing/manipulating_images.html#niimg.
+        The 3D images to plot.
+
+    output_files: list of strings
+        The names of the files to save the plots to, one per image, eg
+        '.png' files.
+
+    plot_func: function, optional
+        The plotting function: plot_stat_map (default), plot_roi,
+        plot_glass_brain or plot_img.
+
+    titles: list of strings, optional
+        The title of each plot.
+
+    display_mode: string, optional
+        The display mode, see plot_func.
+
+    cut_coords: None, a tuple of floats, or an integer, optional
+        The coordinates of the cuts, see plot_func. All the images are
+        cut at the same coordinates: if None is given, they are computed
+        on the first image.
+
+    dpi: None or scalar, optional
+        The resolution of the saved figures, in dots per inch.
+
+    n_jobs: int, optional
+        The number of processes plotting the images. -1 means all CPUs,
+        -2 all CPUs but one, etc.
+
+    verbose: int, optional
+        Verbosity level.
+
+    kwargs:
+        Extra keyword arguments are passed to plot_func. figure, axes and
+        output_file are not supported.
+
+    Returns
+    -------
+    timings: numpy.ndarray
+        The time, in seconds, taken to plot and save each image. The time
+        to create the displays is not included.
+
+    See Also
+    --------
+    nilearn.plotting.plot_stat_map, nilearn.plotting.plot_roi,
+    nilearn.plotting.plot_glass_brain, nilearn.plotting.plot_img
+    """
+    if plot_func not in _DEFAULTS:
+        raise ValueError('plot_batch does not support the plotting '
+                         'function %r' % plot_func)
+    for name in ('figure', 'axes', 'output_file'):
+        if name in kwargs:
+            raise ValueError('plot_batch does not accept a "%s" argument'
+                             % name)
+    imgs = list(imgs)
+    output_files = list(output_files)
+    if len(imgs) != len(output_files):
+        raise ValueError('%i images but %i output files were given'
+                         % (len(imgs), len(output_files)))
+    if titles is None:
+        titles = [None] * len(imgs)
+    if len(imgs) == 0:
+        return np.array([])
+
+    if cut_coords is None and plot_func is not plot_glass_brain:
+        # Same cuts for all the images, and all the jobs
+        threshold = kwargs.get('threshold',
+                               _DEFAULTS[plot_func].get('threshold'))
+        if not isinstance(threshold, numbers.Number):
+            threshold = None
+        get_slicer(display_mode)  # check display_mode
+        cut_coords = SLICERS[display_mode].find_cut_coords(
+            _utils.check_niimg_3d(imgs[0]), threshold, None)
+
+    batches = _split_batches(len(imgs), n_jobs)
+    timings = Parallel(n_jobs=len(batches), verbose=verbose)(
+        delayed(_plot_batch)(plot_func,
+                             [imgs[i] for i in batch],
+                             [output_files[i] for i in batch],
+                             [titles[i] for i in batch],
+                             display_mode, cut_coords, dpi, kwargs)
+        for batch in batches)
+    timings = np.concatenate(timings)
+    if verbose > 0:
+        print('[plot_batch] %i images plotted in %.1fs (%.2fs per image)'
+              % (len(timings), timings.sum(), timings.mean()))
+    return timings
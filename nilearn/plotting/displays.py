@@ -7,9 +7,10 @@ the data with different layout of cuts.
 
 import collections
 import numbers
+import warnings
 
 import numpy as np
-from scipy import sparse, stats
+from scipy import sparse, stats, ndimage
 
 from ..image import new_img_like
 from .._utils.compat import _basestring
@@ -19,14 +20,15 @@ import matplotlib.pyplot as plt
 from matplotlib import transforms, colors
 from matplotlib.colorbar import ColorbarBase
 from matplotlib import cm as mpl_cm
-from matplotlib import lines
+from matplotlib.collections import LineCollection
 
 # Local imports
 from . import glass_brain, cm
 from .find_cuts import find_xyz_cut_coords, find_cut_slices
 from .edge_detect import _edge_map
 from ..image.resampling import (get_bounds, reorder_img, coord_transform,
-                                get_mask_bounds)
+                                get_mask_bounds, _get_reordered_grid)
+from .._utils.numpy_conversions import _get_float_dtype
 
 
 ###############################################################################
@@ -199,7 +201,207 @@ def _coords_3d_to_2d(coords_3d, direction):
             "Allowed values are 'x', 'y' and 'z'").format(direction)
         raise ValueError(message)
 
-    return coords_3d[:, index]
+    return coords_3d[..., index]
+
+
+def _threshold_2d(data_2d, threshold):
+    """Mask the values of a cut below threshold, in absolute value."""
+    if threshold == 0:
+        return np.ma.masked_equal(data_2d, 0, copy=False)
+    return np.ma.masked_inside(data_2d, -threshold, threshold, copy=False)
+
+
+def _composite_maps_2d(maps_2d, thresholds, colors, alpha):
+    """Composite the 2D cuts of several maps in a single RGBA image.
+
+    Parameters
+    ----------
+    maps_2d: 3D ndarray
+        The cuts of the maps, stacked along the last axis.
+    thresholds: array_like
+        The threshold of each map: its region is where it is above.
+    colors: array_like of shape (n_maps, 4)
+        The RGBA color of each map.
+    alpha: float
+        The transparency of the inside of the regions. Their contours are
+        opaque.
+
+    Returns
+    -------
+    rgba: 3D ndarray
+        Where several regions overlap, the color of the last map is used,
+        and contours are drawn on top of fillings.
+    """
+    regions = maps_2d > np.asarray(thresholds)
+    # A pixel is inside a region if its 4 neighbors are in the region. The
+    # border of the image is repeated (np.pad needs numpy >= 1.7), so that
+    # no contour is drawn along it
+    padded = np.zeros((regions.shape[0] + 2, regions.shape[1] + 2) +
+                      regions.shape[2:], dtype=bool)
+    padded[1:-1, 1:-1] = regions
+    padded[0, 1:-1] = regions[0]
+    padded[-1, 1:-1] = regions[-1]
+    padded[1:-1, 0] = regions[:, 0]
+    padded[1:-1, -1] = regions[:, -1]
+    inside = (regions & padded[:-2, 1:-1] & padded[2:, 1:-1] &
+              padded[1:-1, :-2] & padded[1:-1, 2:])
+    contours = regions & np.logical_not(inside)
+
+    colors = np.asarray(colors)
+    n_maps = maps_2d.shape[-1]
+    rgba = np.zeros(maps_2d.shape[:2] + (4, ))
+    for pixels, pixels_alpha in ((regions, alpha), (contours, 1.)):
+        covered = pixels.any(axis=-1)
+        # Index of the last map covering each pixel
+        last_map = n_maps - 1 - pixels[..., ::-1].argmax(axis=-1)
+        rgba[covered, :3] = colors[last_map[covered], :3]
+        rgba[covered, 3] = pixels_alpha
+    return rgba
+
+
+def _get_threshold_slices(data, threshold):
+    """Return the slices of the bounding box of the values of data above
+    threshold (in absolute value), or None if there is none.
+
+    The data is processed slab by slab, to avoid building a mask of the
+    size of the whole volume.
+    """
+    projections = [np.zeros(n, dtype=bool) for n in data.shape]
+    for i, slab in enumerate(data):
+        # Same selection as _threshold_2d
+        if threshold == 0:
+            mask = slab != 0
+        else:
+            mask = np.logical_not((slab >= -threshold) &
+                                  (slab <= threshold))
+        projections[0][i] = mask.any()
+        projections[1] |= mask.any(axis=1)
+        projections[2] |= mask.any(axis=0)
+    if not projections[0].any():
+        return None
+    slices = []
+    for projection in projections:
+        indices = np.where(projection)[0]
+        slices.append(slice(indices[0], indices[-1] + 1))
+    return slices
+
+
+def _get_cuts(img, display_axes, resampling_interpolation='continuous',
+              threshold=None):
+    """Extract the cuts of a 3D image shown in some CutAxes.
+
+    Only the cut planes are extracted, and interpolated if the affine of the
+    image contains rotations: the whole volume is never resampled.
+
+    Returns
+    -------
+    data_2d_list: list
+        The (thresholded) cuts, in the order of display_axes. Cuts out of
+        the image are None.
+    data_bounds, bounding_box: lists of 2-tuples
+        The world-space bounds of the (reordered) image, and of its values
+        above threshold.
+
+    Returns None if the cuts must be extracted from the whole reordered
+    image instead (eg if the image contains masked or non-finite values).
+    """
+    img = _utils.check_niimg(img)
+    if len(img.shape) != 3:
+        return None
+    affine = img.get_affine()
+    if np.all((np.abs(affine[:3, :3]) > 0.001).sum(axis=0) == 1):
+        # Reordering the axes only creates views of the data
+        img = reorder_img(img)
+        affine = img.get_affine()
+        data = img.get_data()
+        if isinstance(data, np.ma.MaskedArray):
+            return None
+        data_bounds = get_bounds(data.shape, affine)
+        data_2d_list = []
+        for display_ax in display_axes:
+            try:
+                data_2d = display_ax.transform_to_2d(data, affine)
+            except IndexError:
+                # We are cutting outside the indices of the data
+                data_2d = None
+            data_2d_list.append(data_2d)
+        resampled = False
+    else:
+        if resampling_interpolation is None:
+            # reorder_img raises an explicit error
+            return None
+        data = img.get_data()
+        if (isinstance(data, np.ma.MaskedArray) or
+                (data.dtype.kind == 'f' and not np.all(np.isfinite(data)))):
+            return None
+        # Interpolate the cuts on the grid used by reorder_img
+        target_affine, target_shape = _get_reordered_grid(affine, data.shape)
+        data_bounds = get_bounds(target_shape, target_affine)
+        if resampling_interpolation == 'continuous':
+            order = 3
+            if data.dtype.kind in 'iu':
+                # Same casting as resample_img
+                dtype = np.float32 if data.dtype.itemsize <= 4 else np.float64
+            else:
+                dtype = data.dtype
+            dtype = _get_float_dtype(dtype)
+            # The spline coefficients are computed once for all the cuts
+            coefs = ndimage.spline_filter(data, order=order,
+                                          output=np.float64)
+        else:
+            order = 0
+            dtype = data.dtype
+            coefs = data
+        transform = np.linalg.inv(affine).dot(target_affine)
+        inv_target_affine = np.linalg.inv(target_affine)
+        data_2d_list = []
+        for display_ax in display_axes:
+            axis = 'xyz'.index(display_ax.direction)
+            coords = [0, 0, 0]
+            coords[axis] = display_ax.coord
+            index = int(np.round(coord_transform(
+                coords[0], coords[1], coords[2], inv_target_affine)[axis]))
+            n = target_shape[axis]
+            if not -n <= index < n:
+                # We are cutting outside the indices of the data
+                data_2d_list.append(None)
+                continue
+            grid = [np.arange(n_) for n_ in target_shape]
+            grid[axis] = np.array([index % n])
+            voxels = np.array([g.ravel() for g in
+                               np.meshgrid(*grid, indexing='ij')])
+            voxels = np.dot(transform[:3, :3], voxels) + \
+                transform[:3, 3:]
+            plane = ndimage.map_coordinates(
+                coefs, voxels, order=order, output=dtype, prefilter=False)
+            plane = plane.reshape([len(g) for g in grid])
+            data_2d_list.append(np.rot90(np.take(plane, 0, axis=axis)))
+        resampled = True
+
+    bounding_box = data_bounds
+    if threshold is not None:
+        data_2d_list = [_threshold_2d(data_2d, threshold)
+                        if data_2d is not None else None
+                        for data_2d in data_2d_list]
+        slices = _get_threshold_slices(data, threshold)
+        if slices is None:
+            warnings.warn("empty mask", stacklevel=3)
+        elif not resampled:
+            # Same bounds as get_mask_bounds
+            bounding_box = []
+            for (min_, max_), slice_, width in zip(data_bounds, slices,
+                                                   data.shape):
+                bounding_box.append(
+                    (min_ + slice_.start * (max_ - min_) / width,
+                     min_ + slice_.stop * (max_ - min_) / width))
+        else:
+            # Bounds of the box of the source voxels above threshold
+            start = np.eye(4)
+            start[:3, 3] = [slice_.start for slice_ in slices]
+            bounding_box = get_bounds(
+                [slice_.stop - slice_.start for slice_ in slices],
+                np.dot(affine, start))
+    return data_2d_list, data_bounds, bounding_box
 
 
 class GlassBrainAxes(BaseAxes):
@@ -274,7 +476,7 @@ class GlassBrainAxes(BaseAxes):
 
             Parameters
             ----------
-            line_coords: list of numpy arrays of shape (2, 3)
+            line_coords: array_like of shape (n_lines, 2, 3)
                 3d coordinates of lines start points and end points.
             line_values: array_like
                 values of the lines.
@@ -288,8 +490,10 @@ class GlassBrainAxes(BaseAxes):
                 will be used as minimum (multiplied by -1) and maximum
                 coloring levels.
             kwargs: dict
-                additional arguments to pass to matplotlib Line2D.
+                additional arguments to pass to matplotlib LineCollection.
         """
+        line_coords = np.asarray(line_coords)
+        line_values = np.asarray(line_values)
         if vmin is None and vmax is None:
             abs_line_values_max = np.abs(line_values).max()
             vmin = -abs_line_values_max
@@ -316,25 +520,27 @@ class GlassBrainAxes(BaseAxes):
                                     vmax=vmax)
         value_to_color = plt.cm.ScalarMappable(norm=norm, cmap=cmap).to_rgba
 
-        for start_end_point_3d, line_value in zip(
-                line_coords, line_values):
-            start_end_point_2d = _coords_3d_to_2d(start_end_point_3d,
-                                                  self.direction)
-
-            color = value_to_color(line_value)
-            abs_line_value = abs(line_value)
-            linewidth = 1 + 2 * abs_norm(abs_line_value)
-            # Hacky way to put the strongest connections on top of the weakest
-            # note sign does not matter hence using 'abs'
-            zorder = 10 + 10 * abs_norm(abs_line_value)
-            this_kwargs = {'color': color, 'linewidth': linewidth,
-                           'zorder': zorder}
-            # kwargs should have priority over this_kwargs so that the
-            # user can override the default logic
-            this_kwargs.update(kwargs)
-            xdata, ydata = start_end_point_2d.T
-            line = lines.Line2D(xdata, ydata, **this_kwargs)
-            self.ax.add_line(line)
+        # All the lines are drawn as a single collection, in which the
+        # strongest connections come last, to be on top of the weakest.
+        # Note sign does not matter hence using 'abs'
+        abs_line_values = np.abs(line_values)
+        order = np.argsort(abs_line_values, kind='mergesort')
+        line_values = line_values[order]
+        abs_line_values = abs_line_values[order]
+        segments = _coords_3d_to_2d(line_coords[order], self.direction)
+
+        this_kwargs = {'colors': value_to_color(line_values),
+                       'linewidths': 1 + 2 * abs_norm(abs_line_values),
+                       'zorder': 10}
+        lines = LineCollection(segments, **this_kwargs)
+        if hasattr(lines, 'set_capstyle'):
+            # As the caps of Line2D. Collections have a cap style only in
+            # matplotlib >= 3.1
+            lines.set_capstyle('projecting')
+        # kwargs should have priority over this_kwargs so that the
+        # user can override the default logic
+        lines.update(kwargs)
+        self.ax.add_collection(lines)
 
 
 ###############################################################################
@@ -548,12 +754,59 @@ class BaseSlicer(object):
 
         plt.draw_if_interactive()
 
+    def _add_composite_maps(self, maps_img, thresholds, colors, alpha=.5,
+                            resampling_interpolation='continuous'):
+        """ Plot the regions of the maps of a 4D image in all the views,
+            composited in a single image per view.
+
+            The 4D image is reordered once, and the cuts of all the maps
+            are extracted together.
+
+            Parameters
+            -----------
+            maps_img: 4D Niimg-like object
+                See http://nilearn.github.io/manipulating_visualizing/manipulating_images.html#niimg.
+            thresholds: list of floats
+                The threshold of each map, defining its region.
+            colors: array_like of shape (n_maps, 4)
+                The color of each map.
+            alpha: float between 0 and 1, optional
+                The transparency of the inside of the regions.
+        """
+        maps_img = reorder_img(_utils.check_niimg_4d(maps_img),
+                               resample=resampling_interpolation)
+        affine = maps_img.get_affine()
+        data = maps_img.get_data()
+        data_bounds = get_bounds(data.shape[:3], affine)
+
+        for display_ax in self.axes.values():
+            try:
+                maps_2d = display_ax.transform_to_2d(data, affine)
+            except IndexError:
+                # We are cutting outside the indices of the data
+                continue
+            rgba = _composite_maps_2d(maps_2d, thresholds, colors, alpha)
+            display_ax.draw_2d(rgba, data_bounds, data_bounds,
+                               type='imshow', interpolation='nearest')
+
+        plt.draw_if_interactive()
+
     def _map_show(self, img, type='imshow',
                   resampling_interpolation='continuous',
                   threshold=None, **kwargs):
-        img = reorder_img(img, resample=resampling_interpolation)
         threshold = float(threshold) if threshold is not None else None
 
+        if all(isinstance(display_ax, CutAxes)
+               for display_ax in self.axes.values()):
+            # Only extract the cuts, without reordering the whole image
+            cuts = _get_cuts(img, self.axes.values(),
+                             resampling_interpolation=resampling_interpolation,
+                             threshold=threshold)
+            if cuts is not None:
+                return self._draw_cuts(*cuts, type=type, **kwargs)
+
+        img = reorder_img(img, resample=resampling_interpolation)
+
         if threshold is not None:
             data = img.get_data()
             if threshold == 0:
@@ -586,6 +839,14 @@ class BaseSlicer(object):
 
             data_2d_list.append(data_2d)
 
+        bounding_box = (xmin_, xmax_), (ymin_, ymax_), (zmin_, zmax_)
+        return self._draw_cuts(data_2d_list, data_bounds, bounding_box,
+                               type=type, **kwargs)
+
+    def _draw_cuts(self, data_2d_list, data_bounds, bounding_box,
+                   type='imshow', **kwargs):
+        """ Draw the cuts returned by the transform_to_2d method of the axes
+        """
         if kwargs.get('vmin') is None:
             kwargs['vmin'] = np.ma.min([d.min() for d in data_2d_list
                                         if d is not None])
@@ -593,8 +854,6 @@ class BaseSlicer(object):
             kwargs['vmax'] = np.ma.max([d.max() for d in data_2d_list
                                         if d is not None])
 
-        bounding_box = (xmin_, xmax_), (ymin_, ymax_), (zmin_, zmax_)
-
         ims = []
         to_iterate_over = zip(self.axes.values(), data_2d_list)
         for display_ax, data_2d in to_iterate_over:
@@ -1090,7 +1349,7 @@ class OrthoProjector(OrthoSlicer):
                   edge_cmap=cm.bwr,
                   edge_vmin=None, edge_vmax=None,
                   edge_threshold=None,
-                  edge_kwargs=None, node_kwargs=None):
+                  edge_kwargs=None, node_kwargs=None, max_edges=None):
         """Plot undirected graph on each of the axes
 
             Parameters
@@ -1120,10 +1379,15 @@ class OrthoProjector(OrthoSlicer):
                 e.g. "25.3%", and only the edges with a abs(value) above
                 the given percentile will be shown.
             edge_kwargs: dict
-                will be passed as kwargs for each edge matlotlib Line2D.
+                will be passed as kwargs to the matplotlib LineCollection
+                that draws all the edges of an axes in one go.
             node_kwargs: dict
                 will be passed as kwargs to the plt.scatter call that plots all
                 the nodes in one go.
+            max_edges: int, optional
+                If not None, only the max_edges edges with the highest
+                absolute values are drawn. Useful for quick previews of
+                large connectomes.
 
         """
         # set defaults
@@ -1206,14 +1470,24 @@ class OrthoProjector(OrthoSlicer):
 
         lower_triangular_adjacency_matrix = np.tril(adjacency_matrix, k=-1)
         non_zero_indices = lower_triangular_adjacency_matrix.nonzero()
+        adjacency_matrix_values = adjacency_matrix[non_zero_indices]
 
-        line_coords = [node_coords[list(index)]
-                       for index in zip(*non_zero_indices)]
+        if (max_edges is not None and
+                len(adjacency_matrix_values) > max_edges):
+            # Level of detail: keep the strongest edges only
+            strongest = np.argsort(np.abs(adjacency_matrix_values),
+                                   kind='mergesort')[::-1][:max_edges]
+            strongest.sort()
+            non_zero_indices = tuple(indices[strongest]
+                                     for indices in non_zero_indices)
+            adjacency_matrix_values = adjacency_matrix_values[strongest]
+
+        # shape (n_edges, 2, 3): start and end points of the edges
+        line_coords = node_coords[np.column_stack(non_zero_indices)]
 
-        adjacency_matrix_values = adjacency_matrix[non_zero_indices]
         for ax in self.axes.values():
             ax._add_markers(node_coords, node_color, node_size, **node_kwargs)
-            if line_coords:
+            if len(line_coords):
                 ax._add_lines(line_coords, adjacency_matrix_values, edge_cmap,
                               vmin=edge_vmin, vmax=edge_vmax,
                               **edge_kwargs)
@@ -11,10 +11,8 @@ import numpy as np
 from scipy import ndimage
 
 # Local imports
-from .._utils.ndimage import largest_connected_component
 from ..image import new_img_like
 from .._utils.extmath import fast_abs_percentile
-from .._utils.numpy_conversions import as_ndarray
 from ..image.resampling import get_mask_bounds, coord_transform
 from ..image.image import _smooth_array
 
@@ -23,6 +21,28 @@ from ..image.image import _smooth_array
 ################################################################################
 
 
+def _largest_component(mask):
+    """ Find the largest connected component of a 3D boolean mask.
+
+        Unlike largest_connected_component, the component is only built in
+        its bounding box, and not in the whole volume.
+
+        Returns
+        -------
+        slices: tuple of slices
+            The bounding box of the largest component.
+        component: 3D boolean ndarray
+            The largest component, in its bounding box.
+    """
+    labels, _ = ndimage.label(mask)
+    sizes = np.bincount(labels.ravel())
+    # discard the 0 label
+    sizes[0] = 0
+    label = sizes.argmax()
+    slices = ndimage.find_objects(labels, max_label=label)[label - 1]
+    return slices, labels[slices] == label
+
+
 def find_xyz_cut_coords(img, mask=None, activation_threshold=None):
     """ Find the center of the largest activation connected component.
 
@@ -48,7 +68,8 @@ def find_xyz_cut_coords(img, mask=None, activation_threshold=None):
     """
     data = img.get_data()
     # To speed up computations, we work with partial views of the array,
-    # and keep track of the offset
+    # and keep track of the offset: only the bounding box of the largest
+    # component is copied
     offset = np.zeros(3)
 
     # Deal with masked arrays:
@@ -57,12 +78,9 @@ def find_xyz_cut_coords(img, mask=None, activation_threshold=None):
         if mask is None:
             mask = not_mask
         else:
-            mask *= not_mask
-        data = np.asarray(data)
-
-    # Get rid of potential memmapping
-    data = as_ndarray(data)
-    my_map = data.copy()
+            mask = mask * not_mask
+    # Get rid of potential memmapping, without copy
+    my_map = np.asarray(data)
     if mask is not None:
         # check against empty mask
         if mask.sum() == 0.:
@@ -75,7 +93,7 @@ def find_xyz_cut_coords(img, mask=None, activation_threshold=None):
         slice_x, slice_y, slice_z = ndimage.find_objects(mask)[0]
         my_map = my_map[slice_x, slice_y, slice_z]
         mask = mask[slice_x, slice_y, slice_z]
-        my_map *= mask
+        my_map = my_map * mask
         offset += [slice_x.start, slice_y.start, slice_z.start]
 
     # Testing min and max is faster than np.all(my_map == 0)
@@ -88,19 +106,18 @@ def find_xyz_cut_coords(img, mask=None, activation_threshold=None):
     # mask may be zero everywhere in rare cases
     if mask.max() == 0:
         return .5 * np.array(data.shape)
-    mask = largest_connected_component(mask)
-    slice_x, slice_y, slice_z = ndimage.find_objects(mask)[0]
-    my_map = my_map[slice_x, slice_y, slice_z]
-    mask = mask[slice_x, slice_y, slice_z]
-    my_map *= mask
-    offset += [slice_x.start, slice_y.start, slice_z.start]
+    slices, mask = _largest_component(mask)
+    my_map = my_map[slices] * mask
+    offset += [s.start for s in slices]
 
     # For the second threshold, we use a mean, as it is much faster,
     # althought it is less robust
     second_threshold = np.abs(np.mean(my_map[mask]))
     second_mask = (np.abs(my_map) > second_threshold)
     if second_mask.sum() > 50:
-        my_map *= largest_connected_component(second_mask)
+        slices, second_mask = _largest_component(second_mask)
+        my_map = my_map[slices] * second_mask
+        offset += [s.start for s in slices]
     cut_coords = ndimage.center_of_mass(np.abs(my_map))
     x_map, y_map, z_map = cut_coords + offset
 
@@ -217,11 +234,20 @@ def find_cut_slices(img, direction='z', n_cuts=7, spacing='auto'):
                       'n_cuts=%i, data size=%i' % (n_cuts, this_shape))
         return _transform_cut_coords(np.arange(this_shape), direction, affine)
 
-    data = orig_data.copy()
+    # The weights of the slices, used below to add cuts (a tuple of axes
+    # needs numpy >= 1.7)
+    slice_weights = np.rollaxis(orig_data, axis).reshape(
+        this_shape, -1).sum(axis=1)
+
+    data = orig_data
     if data.dtype.kind == 'i':
         data = data.astype(np.float)
 
-    data = _smooth_array(data, affine, fwhm='fast')
+    # orig_data is not used anymore: it can be smoothed in place
+    data = _smooth_array(data, affine, fwhm='fast', copy=False)
+    if hasattr(data, 'mask'):
+        # Masked values are ignored by argmax, as with this fill value
+        data = data.filled(np.ma.maximum_fill_value(data))
 
     # to control floating point error problems
     # during given input value "n_cuts"
@@ -239,23 +265,33 @@ def find_cut_slices(img, direction='z', n_cuts=7, spacing='auto'):
     if spacing == 'auto':
         spacing = max(int(.5 / n_cuts * data.shape[axis]), 1)
 
-    slices = [slice(None, None), slice(None, None), slice(None, None)]
+    # The peaks are searched slice by slice: for each slice along the
+    # axis, we keep its maximum, and the index in the volume of its first
+    # maximum in C order, which breaks ties as np.argmax on the volume
+    slice_maxs = np.empty(this_shape, dtype=data.dtype)
+    first_maxs = []
+    for i, this_slice in enumerate(np.rollaxis(data, axis)):
+        position = this_slice.argmax()
+        slice_maxs[i] = this_slice.flat[position]
+        index = list(np.unravel_index(position, this_slice.shape))
+        index.insert(axis, i)
+        first_maxs.append(tuple(index))
 
     cut_coords = list()
 
     for _ in range(n_cuts):
         # Find a peak
-        max_along_axis = np.unravel_index(np.abs(data).argmax(),
-                                          data.shape)[axis]
+        peak_slices = np.where(slice_maxs == slice_maxs.max())[0]
+        max_along_axis = min(first_maxs[i] for i in peak_slices)[axis]
 
         # cancel out the surroundings of the peak
         start = max(0, max_along_axis - spacing)
         stop = max_along_axis + spacing
-        slices[axis] = slice(start, stop)
         # We don't actually fully zero the neighborhood, to avoid ending
         # up with fully zeros if n_cuts is too big: we can do multiple
-        # passes on the data
-        data[slices] *= 1.e-3
+        # passes on the data. All the values of the slices being scaled,
+        # so are their maximums
+        slice_maxs[start:stop] *= 1.e-3
 
         cut_coords.append(max_along_axis)
 
@@ -284,7 +320,7 @@ def find_cut_slices(img, direction='z', n_cuts=7, spacing='auto'):
             if candidate >= this_shape:
                 this_weight = 0
             else:
-                this_weight = np.sum(np.rollaxis(orig_data, axis)[candidate])
+                this_weight = slice_weights[candidate]
             if this_weight > best_weight:
                 best_candidate = candidate
                 best_weight = this_weight
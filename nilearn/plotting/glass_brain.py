@@ -5,6 +5,8 @@ Brain schematics plotting for glass brain functionality
 import json
 import os
 
+import numpy as np
+
 from matplotlib.path import Path
 from matplotlib import patches
 from matplotlib import colors
@@ -46,81 +48,125 @@ def _invert_color(color):
         return color
 
 
-def _get_mpl_patches(json_content, transform=None,
-                     invert_color=False, **kwargs):
-    """Walks over the json content and builds a list of matplotlib patches
-    """
-    mpl_patches = []
-    kwargs_edgecolor = kwargs.pop('edgecolor', None)
-    kwargs_linewidth = kwargs.pop('linewidth', None)
-    for path in json_content['paths']:
-        if kwargs_edgecolor is not None:
-            edgecolor = kwargs_edgecolor
-        else:
-            edgecolor = path['edgecolor']
-            if invert_color:
-                edgecolor = _invert_color(edgecolor)
-        linewidth = kwargs_linewidth or path['linewidth']
-        path_id = path['id']
+# Parameters of the affine transforms of the schematics, which have been
+# tweaked by hand to fit the MNI template
+_DIRECTION_TO_TRANSFORM_PARAMS = {
+    'x': (0.38, 0, 0, 0.38, -108, -70),
+    'y': (0.39, 0, 0, 0.39, -72, -73),
+    'z': (0.36, 0, 0, 0.37, -71, -107)}
 
-        for item in path['items']:
-            type = item['type']
-            pts = item['pts']
-            codes = _codes(type, pts)
-            path = Path(pts, codes)
-            patch = patches.PathPatch(path,
-                                      edgecolor=edgecolor,
-                                      linewidth=linewidth,
-                                      facecolor='none',
-                                      gid=path_id,
-                                      transform=transform,
-                                      **kwargs)
+_DIRECTION_TO_VIEW_NAME = {'x': 'side',
+                           'y': 'front',
+                           'z': 'top'}
 
-            mpl_patches.append(patch)
-
-    return mpl_patches
+# Process-wide cache of the schematics, transformed to MNI space, indexed
+# by (direction, transform parameters)
+_SCHEMATICS_CACHE = {}
 
 
 def _get_json_and_transform(direction):
     """Returns the json filename and and an affine transform, which has
     been tweaked by hand to fit the MNI template
     """
-    direction_to_view_name = {'x': 'side',
-                              'y': 'front',
-                              'z': 'top'}
-
-    direction_to_transform_params = {
-        'x': [0.38, 0, 0, 0.38, -108, -70],
-        'y': [0.39, 0, 0, 0.39, -72, -73],
-        'z': [0.36, 0, 0, 0.37, -71, -107]}
+    if direction not in _DIRECTION_TO_VIEW_NAME:
+        message = ("No glass brain view associated with direction '{0}'. "
+                   "Possible directions are {1}").format(
+                       direction,
+                       list(_DIRECTION_TO_VIEW_NAME.keys()))
+        raise ValueError(message)
 
     dirname = os.path.dirname(os.path.abspath(__file__))
     dirname = os.path.join(dirname, 'glass_brain_files')
-    direction_to_filename = dict([
-        (_direction, os.path.join(
-            dirname,
-            'brain_schematics_{0}.json'.format(view_name)))
-        for _direction, view_name in direction_to_view_name.items()])
+    json_filename = os.path.join(
+        dirname,
+        'brain_schematics_{0}.json'.format(_DIRECTION_TO_VIEW_NAME[direction]))
+    transform = transforms.Affine2D.from_values(
+        *_DIRECTION_TO_TRANSFORM_PARAMS[direction])
 
-    direction_to_transforms = dict([
-        (_direction, transforms.Affine2D.from_values(*params))
-        for _direction, params in direction_to_transform_params.items()])
+    return json_filename, transform
 
-    direction_to_json_and_transform = dict([
-        (_direction, (direction_to_filename[_direction],
-                      direction_to_transforms[_direction]))
-        for _direction in direction_to_filename])
 
-    filename_and_transform = direction_to_json_and_transform.get(direction)
+def _json_to_arrays(json_content):
+    """Packs the json content of the schematics in flat numpy arrays, that
+    can be saved in a npz file
+    """
+    vertices, codes, item_lengths, path_lengths = [], [], [], []
+    for path in json_content['paths']:
+        for item in path['items']:
+            vertices.extend(item['pts'])
+            codes.extend(_codes(item['type'], item['pts']))
+            item_lengths.append(len(item['pts']))
+        path_lengths.append(len(path['items']))
+    paths = json_content['paths']
+    return dict(
+        vertices=np.array(vertices, dtype=np.float64).reshape((-1, 2)),
+        codes=np.array(codes, dtype=np.uint8),
+        item_lengths=np.array(item_lengths, dtype=np.int64),
+        path_lengths=np.array(path_lengths, dtype=np.int64),
+        ids=np.array([path['id'] for path in paths]),
+        edgecolors=np.array([path['edgecolor'] for path in paths]),
+        linewidths=np.array([path['linewidth'] for path in paths],
+                            dtype=np.float64),
+        bounds=np.array(json_content['metadata']['bounds'],
+                        dtype=np.float64))
+
+
+def _compile_schematics(json_filename, npz_filename=None):
+    """Saves a json schematics file in the binary npz format, which is
+    faster to load. By default, the npz file is saved next to the json
+    file, where it is picked up by plot_brain_schematics.
+    """
+    if npz_filename is None:
+        npz_filename = os.path.splitext(json_filename)[0] + '.npz'
+    with open(json_filename) as json_file:
+        json_content = json.loads(json_file.read())
+    np.savez(npz_filename, **_json_to_arrays(json_content))
+    return npz_filename
 
-    if filename_and_transform is None:
-        message = ("No glass brain view associated with direction '{0}'. "
-                   "Possible directions are {1}").format(
-                       direction,
-                       list(direction_to_json_and_transform.keys()))
-        raise ValueError(message)
 
-    return filename_and_transform
+def _load_schematics_arrays(json_filename):
+    """Loads the schematics as flat arrays, from the precompiled npz file
+    if there is one, and from the json file otherwise
+    """
+    npz_filename = os.path.splitext(json_filename)[0] + '.npz'
+    if os.path.exists(npz_filename):
+        with np.load(npz_filename) as npz_file:
+            return dict((name, npz_file[name]) for name in npz_file.files)
+    with open(json_filename) as json_file:
+        json_content = json.loads(json_file.read())
+    return _json_to_arrays(json_content)
+
+
+def _get_schematics(direction):
+    """Returns the schematics of a direction, as a list of
+    (id, edgecolor, linewidth, matplotlib paths) tuples, and their bounds.
+
+    The paths are transformed to MNI space, and are cached for the
+    lifetime of the process: they must not be modified.
+    """
+    json_filename, transform = _get_json_and_transform(direction)
+    key = (direction, _DIRECTION_TO_TRANSFORM_PARAMS[direction])
+    if key in _SCHEMATICS_CACHE:
+        return _SCHEMATICS_CACHE[key]
+
+    arrays = _load_schematics_arrays(json_filename)
+    vertices = transform.transform(arrays['vertices'])
+    item_ends = np.cumsum(arrays['item_lengths'])
+    item_starts = item_ends - arrays['item_lengths']
+    items = [Path(vertices[start:end], arrays['codes'][start:end])
+             for start, end in zip(item_starts, item_ends)]
+    path_ends = np.cumsum(arrays['path_lengths'])
+    path_starts = path_ends - arrays['path_lengths']
+    paths = [(str(path_id), str(edgecolor), float(linewidth),
+              items[start:end])
+             for path_id, edgecolor, linewidth, start, end in zip(
+                 arrays['ids'], arrays['edgecolors'], arrays['linewidths'],
+                 path_starts, path_ends)]
+    object_bounds = _get_object_bounds(
+        {'metadata': {'bounds': arrays['bounds']}}, transform)
+
+    _SCHEMATICS_CACHE[key] = paths, object_bounds
+    return paths, object_bounds
 
 
 def _get_object_bounds(json_content, transform):
@@ -157,18 +203,24 @@ def plot_brain_schematics(ax, direction, **kwargs):
     """
     black_bg = ax.get_axis_bgcolor() == 'k'
 
-    json_filename, transform = _get_json_and_transform(direction)
-    with open(json_filename) as json_file:
-        json_content = json.loads(json_file.read())
-
-    mpl_patches = _get_mpl_patches(json_content,
-                                   transform=transform + ax.transData,
-                                   invert_color=black_bg,
-                                   **kwargs)
+    paths, object_bounds = _get_schematics(direction)
 
-    for mpl_patch in mpl_patches:
-        ax.add_patch(mpl_patch)
-
-    object_bounds = _get_object_bounds(json_content, transform)
+    edgecolor = kwargs.pop('edgecolor', None)
+    linewidth = kwargs.pop('linewidth', None)
+    for path_id, path_edgecolor, path_linewidth, items in paths:
+        if edgecolor is None:
+            path_edgecolor = (_invert_color(path_edgecolor) if black_bg
+                              else path_edgecolor)
+        else:
+            path_edgecolor = edgecolor
+        for item in items:
+            ax.add_patch(patches.PathPatch(
+                item,
+                edgecolor=path_edgecolor,
+                linewidth=linewidth or path_linewidth,
+                facecolor='none',
+                gid=path_id,
+                transform=ax.transData,
+                **kwargs))
 
     return object_bounds
@@ -11,6 +11,8 @@ Only matplotlib is required.
 # Standard library imports
 import functools
 import numbers
+import os
+import threading
 import warnings
 import collections
 
@@ -32,6 +34,7 @@ from .._utils.fixes.matplotlib_backports import (cbar_outline_get_xy,
                                                  cbar_outline_set_xy)
 from .._utils.ndimage import get_border_data
 from ..datasets import load_mni152_template
+from ..datasets.utils import _get_dataset_dir
 from ..image import iter_img
 from .displays import get_slicer, get_projector, check_threshold
 from . import cm
@@ -110,7 +113,7 @@ def _plot_img_with_bg(img, bg_img=None, cut_coords=None,
                       vmin=None, vmax=None,
                       bg_vmin=None, bg_vmax=None, interpolation="nearest",
                       display_factory=get_slicer,
-                      cbar_vmin=None, cbar_vmax=None,
+                      cbar_vmin=None, cbar_vmax=None, display=None,
                       **kwargs):
     """ Internal function, please refer to the docstring of plot_img for
         parameters not listed below.
@@ -125,6 +128,9 @@ def _plot_img_with_bg(img, bg_img=None, cut_coords=None,
             passed to the add_overlay calls
         display_factory: function
             takes a display_mode argument and return a display class
+        display: display object, optional
+            existing display to plot on. Its background is kept, and
+            bg_img is not plotted.
     """
     show_nan_msg = False
     if vmax is not None and np.isnan(vmax):
@@ -154,19 +160,20 @@ def _plot_img_with_bg(img, bg_img=None, cut_coords=None,
 
         img = new_img_like(img, as_ndarray(data), affine)
 
-    display = display_factory(display_mode)(
-        img,
-        threshold=threshold,
-        cut_coords=cut_coords,
-        figure=figure, axes=axes,
-        black_bg=black_bg,
-        colorbar=colorbar)
-
-    if bg_img is not None:
-        bg_img = _utils.check_niimg_3d(bg_img)
-        display.add_overlay(bg_img,
-                            vmin=bg_vmin, vmax=bg_vmax,
-                            cmap=plt.cm.gray, interpolation=interpolation)
+    if display is None:
+        display = display_factory(display_mode)(
+            img,
+            threshold=threshold,
+            cut_coords=cut_coords,
+            figure=figure, axes=axes,
+            black_bg=black_bg,
+            colorbar=colorbar)
+
+        if bg_img is not None:
+            bg_img = _utils.check_niimg_3d(bg_img)
+            display.add_overlay(bg_img,
+                                vmin=bg_vmin, vmax=bg_vmax,
+                                cmap=plt.cm.gray, interpolation=interpolation)
 
     if img is not None and img is not False:
         display.add_overlay(new_img_like(img, data, affine),
@@ -276,6 +283,74 @@ def plot_img(img, cut_coords=None, output_file=None, display_mode='ortho',
 ###############################################################################
 # Anatomy image for background
 
+def _process_mni152_template(anat_img):
+    """ Returns the data of the template as floats, the mask of its
+        background, its affine and the maximum of the brain
+    """
+    data = anat_img.get_data()
+    data = data.astype(np.float)
+    anat_mask = ndimage.morphology.binary_fill_holes(data > 0)
+    mask = np.logical_not(anat_mask)
+    vmax = np.ma.masked_array(data, mask).max()
+    return data, mask, anat_img.get_affine(), vmax
+
+
+def _load_mni152_template_arrays(cache_dir=None):
+    """ Returns the processed MNI152 template, see _process_mni152_template
+
+        The processing is done once: its result is saved in .npy files in
+        cache_dir (by default, in the nilearn data directory), that are
+        memory-mapped by later calls. All the processes plotting on the
+        template thus share its data.
+    """
+    anat_img = load_mni152_template()
+    try:
+        if cache_dir is None:
+            cache_dir = _get_dataset_dir('mni152_template', verbose=0)
+        stat = os.stat(anat_img.get_filename())
+    except (IOError, OSError):
+        return _process_mni152_template(anat_img)
+    # The cache is valid as long as the template file is the same
+    source = np.array([stat.st_size, stat.st_mtime])
+    info_path = os.path.join(cache_dir, 'info.npz')
+    array_paths = [os.path.join(cache_dir, name)
+                   for name in ('data.npy', 'mask.npy')]
+    if os.path.exists(info_path):
+        try:
+            with np.load(info_path) as info:
+                if np.all(info['source'] == source):
+                    # Copy-on-write: pages are shared until modified, and
+                    # never written back to the cache
+                    data, mask = [np.load(path, mmap_mode='c')
+                                  for path in array_paths]
+                    return data, mask, info['affine'], float(info['vmax'])
+        except Exception:
+            # Corrupted or incompatible cache: process the template again
+            pass
+
+    data, mask, affine, vmax = _process_mni152_template(anat_img)
+    suffix = '.%i.%i' % (os.getpid(), threading.current_thread().ident)
+    temp_paths = [path + suffix for path in array_paths + [info_path]]
+    try:
+        # np.save adds the extension to file names that have none
+        for temp_path, array in zip(temp_paths, (data, mask)):
+            with open(temp_path, 'wb') as f:
+                np.save(f, array)
+        with open(temp_paths[2], 'wb') as f:
+            np.savez(f, source=source, affine=affine, vmax=vmax)
+        # info.npz is written last: it marks the cache as complete
+        for temp_path, path in zip(temp_paths, array_paths + [info_path]):
+            if os.name == 'nt' and os.path.exists(path):
+                os.remove(path)
+            os.rename(temp_path, path)
+    except (IOError, OSError):
+        # The data directory may be read-only
+        for temp_path in temp_paths:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+    return data, mask, affine, vmax
+
+
 # A constant class to serve as a sentinel for the default MNI template
 class _MNI152Template(SpatialImage):
     """ This class is a constant pointing to the MNI152 Template
@@ -286,6 +361,10 @@ class _MNI152Template(SpatialImage):
     affine = None
     vmax = None
     _shape = None
+    # Directory of the processed template, see
+    # _load_mni152_template_arrays. If None, it is in the nilearn data
+    # directory.
+    cache_dir = None
 
     def __init__(self, data=None, affine=None, header=None):
         # Comply with spatial image requirements while allowing empty init
@@ -293,15 +372,12 @@ class _MNI152Template(SpatialImage):
 
     def load(self):
         if self.data is None:
-            anat_img = load_mni152_template()
-            data = anat_img.get_data()
-            data = data.astype(np.float)
-            anat_mask = ndimage.morphology.binary_fill_holes(data > 0)
-            data = np.ma.masked_array(data, np.logical_not(anat_mask))
-            self.affine = anat_img.get_affine()
-            self.data = data
-            self.vmax = data.max()
-            self._shape = anat_img.shape
+            data, mask, affine, vmax = _load_mni152_template_arrays(
+                self.cache_dir)
+            self.affine = affine
+            self.data = np.ma.masked_array(data, mask)
+            self.vmax = vmax
+            self._shape = data.shape
 
     def get_data(self):
         self.load()
@@ -648,7 +724,7 @@ def plot_prob_atlas(maps_img, anat_img=MNI152TEMPLATE, view_type='auto',
             See http://nilearn.github.io/manipulating_visualizing/manipulating_images.html#niimg.
             The anatomical image to be used as a background. If None is
             given, nilearn tries to find a T1 template.
-        view_type: {'auto', 'contours', 'filled_contours', 'continuous'}, optional
+        view_type: {'auto', 'contours', 'filled_contours', 'continuous', 'composite'}, optional
             By default view_type == 'auto', which means maps are overlayed as
             contours if number of maps to display are more or
             overlayed as continuous colors if number of maps are less.
@@ -657,6 +733,10 @@ def plot_prob_atlas(maps_img, anat_img=MNI152TEMPLATE, view_type='auto',
             along with color fillings inside the contours.
             If view_type == 'continuous', maps are overlayed as continous
             colors irrespective of the number maps.
+            If view_type == 'composite', the regions of all the maps, with
+            their color filling and their contours, are drawn on the voxel
+            grid in a single image per cut. This is much faster for atlases
+            with many maps.
         threshold: None, a str or a number, list of either str or number, optional
             If threshold is a string it must finish with a percent sign,
             e.g. "25.3%", and it is a percentile. Or if it is a number,
@@ -671,7 +751,7 @@ def plot_prob_atlas(maps_img, anat_img=MNI152TEMPLATE, view_type='auto',
             value.
         linewidths: float, optional
             This option can be used to set the boundary thickness of the
-            contours.
+            contours. It is ignored if view_type == 'composite'.
         cut_coords: None, a tuple of floats, or an integer
             The MNI coordinates of the point where the cut is performed
             If display_mode is 'ortho', this should be a 3-tuple: (x, y, z)
@@ -730,7 +810,8 @@ def plot_prob_atlas(maps_img, anat_img=MNI152TEMPLATE, view_type='auto',
     maps_img = _utils.check_niimg_4d(maps_img)
     n_maps = maps_img.shape[3]
 
-    valid_view_types = ['auto', 'contours', 'filled_contours', 'continuous']
+    valid_view_types = ['auto', 'contours', 'filled_contours', 'continuous',
+                        'composite']
     if view_type not in valid_view_types:
         raise ValueError(
             'Unknown view type: %s. Valid view types are %s' %
@@ -753,7 +834,7 @@ def plot_prob_atlas(maps_img, anat_img=MNI152TEMPLATE, view_type='auto',
         # strategy is to avoid maximum overlaps as possible
         if view_type == 'contours':
             correction_factor = 1
-        elif view_type == 'filled_contours':
+        elif view_type in ('filled_contours', 'composite'):
             correction_factor = .8
         else:
             correction_factor = .5
@@ -770,23 +851,32 @@ def plot_prob_atlas(maps_img, anat_img=MNI152TEMPLATE, view_type='auto',
 
     filled = view_type.startswith('filled')
 
-    for (map_img, color, thr) in zip(iter_img(maps_img), color_list,
-                                     threshold):
-        data = map_img.get_data()
-        # To threshold or choose the level of the contours
-        thr = check_threshold(thr, data,
-                              percentile_calculate=fast_abs_percentile,
-                              name='threshold')
-        # Get rid of background values in all cases
-        thr = max(thr, 1e-6)
-        if view_type == 'continuous':
-            display.add_overlay(map_img, threshold=thr,
-                                cmap=cm.alpha_cmap(color))
-        else:
-            display.add_contours(map_img, levels=[thr],
-                                 linewidths=linewidths,
-                                 colors=[color], filled=filled,
-                                 alpha=alpha, linestyles='solid')
+    if view_type == 'composite':
+        # All the maps are cut at once
+        maps_data = maps_img.get_data()
+        thresholds = [max(check_threshold(
+            thr, maps_data[..., i], percentile_calculate=fast_abs_percentile,
+            name='threshold'), 1e-6) for i, thr in enumerate(threshold)]
+        display._add_composite_maps(maps_img, thresholds, color_list,
+                                    alpha=alpha)
+    else:
+        for (map_img, color, thr) in zip(iter_img(maps_img), color_list,
+                                         threshold):
+            data = map_img.get_data()
+            # To threshold or choose the level of the contours
+            thr = check_threshold(thr, data,
+                                  percentile_calculate=fast_abs_percentile,
+                                  name='threshold')
+            # Get rid of background values in all cases
+            thr = max(thr, 1e-6)
+            if view_type == 'continuous':
+                display.add_overlay(map_img, threshold=thr,
+                                    cmap=cm.alpha_cmap(color))
+            else:
+                display.add_contours(map_img, levels=[thr],
+                                     linewidths=linewidths,
+                                     colors=[color], filled=filled,
+                                     alpha=alpha, linestyles='solid')
 
     if output_file is not None:
         display.savefig(output_file)
@@ -1030,7 +1120,7 @@ def plot_connectome(adjacency_matrix, node_coords,
                     figure=None, axes=None, title=None,
                     annotate=True, black_bg=False,
                     alpha=0.7,
-                    edge_kwargs=None, node_kwargs=None):
+                    edge_kwargs=None, node_kwargs=None, max_edges=None):
     """Plot connectome on top of the brain glass schematics.
 
         Parameters
@@ -1087,10 +1177,15 @@ def plot_connectome(adjacency_matrix, node_coords,
         alpha: float between 0 and 1
             Alpha transparency for the brain schematics.
         edge_kwargs: dict
-            will be passed as kwargs for each edge matlotlib Line2D.
+            will be passed as kwargs to the matplotlib LineCollection that
+            draws all the edges of an axes in one go.
         node_kwargs: dict
             will be passed as kwargs to the plt.scatter call that plots all
             the nodes in one go
+        max_edges: int, optional
+            If not None, only the max_edges edges with the highest absolute
+            values are drawn. Useful for quick previews of large
+            connectomes.
 
     """
     display = plot_glass_brain(None,
@@ -1104,7 +1199,8 @@ def plot_connectome(adjacency_matrix, node_coords,
                       edge_cmap=edge_cmap,
                       edge_vmin=edge_vmin, edge_vmax=edge_vmax,
                       edge_threshold=edge_threshold,
-                      edge_kwargs=edge_kwargs, node_kwargs=node_kwargs)
+                      edge_kwargs=edge_kwargs, node_kwargs=node_kwargs,
+                      max_edges=max_edges)
 
     if output_file is not None:
         display.savefig(output_file)
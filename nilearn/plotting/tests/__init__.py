@@ -0,0 +1,18 @@
+import shutil
+import tempfile
+
+from nilearn.plotting.img_plotting import _MNI152Template, MNI152TEMPLATE
+
+
+# The plotting tests must not write the processed MNI152 template in the
+# nilearn data directory of the user. The cache directory is set on the
+# class, as images built from the template are also instances of it.
+def setup_package():
+    _MNI152Template.cache_dir = tempfile.mkdtemp()
+    MNI152TEMPLATE.data = None
+
+
+def teardown_package():
+    shutil.rmtree(_MNI152Template.cache_dir, ignore_errors=True)
+    _MNI152Template.cache_dir = None
+    MNI152TEMPLATE.data = None
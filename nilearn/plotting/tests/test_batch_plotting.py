@@ -0,0 +1,82 @@
+# emacs: -*- mode: python; py-indent-offset: 4; indent-tabs-mode: nil -*-
+# vi: set ft=python sts=4 ts=4 sw=4 et:
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from nose.tools import assert_true, assert_equal
+
+import nibabel
+
+from nilearn.plotting import (plot_batch, plot_stat_map, plot_glass_brain,
+                              plot_roi, plot_anat)
+from nilearn.plotting.batch_plotting import (_make_display_template,
+                                             _get_display_state,
+                                             _restore_display_state)
+from nilearn._utils.testing import assert_raises_regex
+
+mni_affine = np.array([[-2.,    0.,    0.,   90.],
+                       [0.,    2.,    0., -126.],
+                       [0.,    0.,    2.,  -72.],
+                       [0.,    0.,    0.,    1.]])
+
+
+def _generate_imgs(n_imgs=3):
+    rng = np.random.RandomState(42)
+    imgs = []
+    for _ in range(n_imgs):
+        data = np.zeros((7, 7, 3))
+        data[1:-1, 2:-1, 1:] = rng.randn(5, 4, 2)
+        imgs.append(nibabel.Nifti1Image(data, mni_affine))
+    return imgs
+
+
+def test_plot_batch():
+    imgs = _generate_imgs()
+    temp_dir = tempfile.mkdtemp()
+    try:
+        for plot_func in (plot_stat_map, plot_glass_brain):
+            output_files = [os.path.join(temp_dir, '%s_%i.png'
+                                         % (plot_func.__name__, i))
+                            for i in range(len(imgs))]
+            timings = plot_batch(imgs, output_files, plot_func=plot_func,
+                                 titles=['a', 'b', 'c'])
+            assert_equal(timings.shape, (len(imgs), ))
+            for output_file in output_files:
+                assert_true(os.path.getsize(output_file) > 0)
+        # Same figure as with plot_stat_map
+        reference_file = os.path.join(temp_dir, 'reference.png')
+        plot_stat_map(imgs[0], title='a', output_file=reference_file)
+        plot_batch(imgs[:1], [output_files[0]], titles=['a'])
+        with open(reference_file, 'rb') as f1:
+            with open(output_files[0], 'rb') as f2:
+                assert_equal(f1.read(), f2.read())
+    finally:
+        shutil.rmtree(temp_dir)
+
+    assert_raises_regex(ValueError, 'does not support', plot_batch,
+                        imgs, ['a.png'] * 3, plot_func=plot_anat)
+    assert_raises_regex(ValueError, '3 images but 2 output files',
+                        plot_batch, imgs, ['a.png'] * 2)
+    assert_raises_regex(ValueError, 'does not accept a "figure"',
+                        plot_batch, imgs, ['a.png'] * 3, figure=1)
+
+
+def test_restore_display_state():
+    img = _generate_imgs(1)[0]
+    display, kwargs = _make_display_template(plot_roi, 'ortho',
+                                             (84, -118, -69),
+                                             {'colorbar': True})
+    figure = display.frame_axes.figure
+    state = _get_display_state(display)
+    n_artists = [len(ax.get_children()) for ax in figure.axes]
+    for _ in range(2):
+        plot_roi(img, display=display, title='title', **kwargs)
+        assert_true(len(figure.axes) > len(n_artists))
+        _restore_display_state(display, state)
+        assert_equal([len(ax.get_children()) for ax in figure.axes],
+                     n_artists)
+        assert_true(not display._colorbar)
+    display.close()
@@ -4,12 +4,17 @@ import tempfile
 
 import numpy as np
 
-from nose.tools import assert_true
+from nose.tools import assert_true, assert_equal
 
 import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
+import nibabel
 
 from nilearn.plotting.displays import OrthoSlicer, XSlicer, OrthoProjector
-from nilearn.plotting.displays import check_threshold
+from nilearn.plotting.displays import (check_threshold, _get_cuts,
+                                       _composite_maps_2d)
+from nilearn.image import reorder_img
+from nilearn.image.resampling import get_bounds
 from nilearn.datasets import load_mni152_template
 from nilearn._utils.testing import assert_raises_regex
 from nilearn._utils.extmath import fast_abs_percentile
@@ -47,6 +52,85 @@ def test_demo_ortho_projector():
     oprojector.close()
 
 
+def test_add_graph():
+    rng = np.random.RandomState(0)
+    n_nodes = 20
+    adjacency_matrix = rng.randn(n_nodes, n_nodes)
+    adjacency_matrix += adjacency_matrix.T
+    node_coords = rng.uniform(-50, 50, size=(n_nodes, 3))
+    n_edges = n_nodes * (n_nodes - 1) // 2
+    for max_edges, n_drawn in [(None, n_edges), (10, 10), (1000, n_edges)]:
+        oprojector = OrthoProjector.init_with_figure(img=None)
+        oprojector.add_graph(adjacency_matrix, node_coords,
+                             edge_kwargs={'linestyle': '--'},
+                             max_edges=max_edges)
+        for display_ax in oprojector.axes.values():
+            # All the edges of an axes are in a single collection
+            lines, = [collection for collection in display_ax.ax.collections
+                      if isinstance(collection, LineCollection)]
+            segments = lines.get_segments()
+            assert_equal(len(segments), n_drawn)
+            # The strongest edges are drawn last
+            linewidths = lines.get_linewidths()
+            assert_true(np.all(np.diff(linewidths) >= 0))
+            assert_equal(linewidths[-1], 3)
+        oprojector.close()
+
+
+def test_composite_maps_2d():
+    maps_2d = np.zeros((5, 6, 2))
+    maps_2d[:4, :4, 0] = 1
+    maps_2d[2:, 2:, 1] = 1
+    colors = np.array([[1, 0, 0, 1], [0, 0, 1, 1]])
+    rgba = _composite_maps_2d(maps_2d, [.5, .5], colors, alpha=.3)
+    assert_equal(rgba.shape, (5, 6, 4))
+    # Outside of the regions
+    np.testing.assert_array_equal(rgba[0, 5], [0, 0, 0, 0])
+    # Contours are opaque, and are not drawn on the border of the image
+    np.testing.assert_array_equal(rgba[3, 0], [1, 0, 0, 1])
+    np.testing.assert_array_equal(rgba[0, 0], [1, 0, 0, .3])
+    # The last map is on top, but contours are on top of fillings
+    np.testing.assert_array_equal(rgba[2, 2], [0, 0, 1, 1])
+    np.testing.assert_array_equal(rgba[3, 3], [1, 0, 0, 1])
+    np.testing.assert_array_equal(rgba[4, 4], [0, 0, 1, .3])
+
+
+def test_get_cuts():
+    # The cuts extracted from the image must be those of the reordered
+    # image
+    rng = np.random.RandomState(42)
+    data = rng.randn(10, 12, 11)
+    data[:3] = 0
+    permuted_affine = np.array([[0., 2., 0., -10.],
+                                [-3., 0., 0., 15.],
+                                [0., 0., 2., -8.],
+                                [0., 0., 0., 1.]])
+    rotated_affine = np.array([[1.8, .5, 0., -10.],
+                               [-.5, 1.8, .3, -12.],
+                               [0., -.3, 2., -8.],
+                               [0., 0., 0., 1.]])
+    for affine in (permuted_affine, rotated_affine):
+        img = nibabel.Nifti1Image(data, affine)
+        reordered_img = reorder_img(img, resample='continuous')
+        reordered_data = reordered_img.get_data()
+        reordered_affine = reordered_img.get_affine()
+        slicer = OrthoSlicer(cut_coords=(1, 2, 3))
+        data_2d_list, data_bounds, _ = _get_cuts(img, slicer.axes.values())
+        np.testing.assert_array_almost_equal(
+            data_bounds, get_bounds(reordered_data.shape, reordered_affine))
+        for display_ax, data_2d in zip(slicer.axes.values(), data_2d_list):
+            np.testing.assert_array_almost_equal(
+                data_2d,
+                display_ax.transform_to_2d(reordered_data, reordered_affine))
+        # Thresholded cuts
+        data_2d_list, _, _ = _get_cuts(img, slicer.axes.values(),
+                                       threshold=.5)
+        for data_2d in data_2d_list:
+            assert_true(np.all(np.abs(data_2d.compressed()) > .5))
+            assert_true(np.all(np.abs(data_2d.data[data_2d.mask]) <= .5))
+        slicer.close()
+
+
 def test_check_threshold():
     adjacency_matrix = np.array([[1., 2.],
                                  [2., 1.]])
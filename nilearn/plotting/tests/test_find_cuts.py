@@ -2,7 +2,9 @@ import numpy as np
 from nose.tools import assert_equal, assert_true
 import nibabel
 from nilearn.plotting.find_cuts import (find_xyz_cut_coords, find_cut_slices,
-                                        _transform_cut_coords)
+                                        _transform_cut_coords,
+                                        _largest_component)
+from nilearn._utils.ndimage import largest_connected_component
 from nilearn._utils.testing import assert_raises_regex, assert_warns
 from nilearn.plotting.find_cuts import find_xyz_cut_coords
 
@@ -74,6 +76,28 @@ def test_find_cut_slices():
                                n_cuts=n_cuts, spacing=2)
 
 
+def test_find_cut_slices_ties():
+    # Several slices have the same maximum: the first maximum of the
+    # volume in C order is used, as with np.argmax
+    data = np.zeros((10, 12, 14))
+    data[6, 2, 3] = data[2, 5, 9] = data[4, 2, 11] = 1
+    img = nibabel.Nifti1Image(data, np.eye(4))
+    for direction, expected in zip('xyz', (2, 5, 9)):
+        cut, = find_cut_slices(img, direction=direction, n_cuts=1)
+        assert_equal(cut, expected)
+    # The input image is not modified
+    assert_equal(data.sum(), 3)
+
+
+def test_largest_component():
+    rng = np.random.RandomState(0)
+    mask = rng.rand(20, 30, 25) > .7
+    slices, component = _largest_component(mask)
+    expected = largest_connected_component(mask)
+    np.testing.assert_array_equal(component, expected[slices])
+    assert_equal(component.sum(), expected.sum())
+
+
 def test_validity_of_ncuts_error_in_find_cut_slices():
     data = np.zeros((50, 50, 50))
     affine = np.eye(4)
@@ -0,0 +1,41 @@
+import os
+import shutil
+import tempfile
+
+import numpy as np
+from nose.tools import assert_true, assert_equal
+
+from nilearn.plotting import glass_brain
+
+
+def test_get_schematics():
+    glass_brain._SCHEMATICS_CACHE.clear()
+    for direction in 'xyz':
+        paths, object_bounds = glass_brain._get_schematics(direction)
+        # The schematics are parsed only once
+        assert_true(glass_brain._get_schematics(direction)[0] is paths)
+        assert_equal(len(object_bounds), 4)
+        for path_id, edgecolor, linewidth, items in paths:
+            for item in items:
+                # The paths are in MNI space
+                assert_true(np.all(np.abs(item.vertices) < 150))
+
+
+def test_compile_schematics():
+    temp_dir = tempfile.mkdtemp()
+    try:
+        json_filename, _ = glass_brain._get_json_and_transform('x')
+        temp_json_filename = os.path.join(temp_dir,
+                                          os.path.basename(json_filename))
+        shutil.copy(json_filename, temp_json_filename)
+        from_json = glass_brain._load_schematics_arrays(temp_json_filename)
+        npz_filename = glass_brain._compile_schematics(temp_json_filename)
+        assert_equal(os.path.dirname(npz_filename), temp_dir)
+        # The npz file is used instead of the json file when it exists
+        os.remove(temp_json_filename)
+        from_npz = glass_brain._load_schematics_arrays(temp_json_filename)
+        assert_equal(sorted(from_json.keys()), sorted(from_npz.keys()))
+        for name in from_json:
+            np.testing.assert_array_equal(from_json[name], from_npz[name])
+    finally:
+        shutil.rmtree(temp_dir)
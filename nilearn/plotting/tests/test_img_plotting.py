@@ -3,6 +3,7 @@
 # vi: set ft=python sts=4 ts=4 sw=4 et:
 import tempfile
 import os
+import shutil
 from functools import partial
 
 import numpy as np
@@ -20,7 +21,9 @@ from nilearn.plotting.img_plotting import (MNI152TEMPLATE, plot_anat, plot_img,
                                            plot_roi, plot_stat_map, plot_epi,
                                            plot_glass_brain, plot_connectome,
                                            plot_prob_atlas,
-                                           _get_colorbar_and_data_ranges)
+                                           _get_colorbar_and_data_ranges,
+                                           _load_mni152_template_arrays,
+                                           _MNI152Template)
 from nilearn._utils.testing import assert_raises_regex
 
 mni_affine = np.array([[-2.,    0.,    0.,   90.],
@@ -88,6 +91,49 @@ def test_plot_anat():
     finally:
         os.remove(filename)
 
+
+def test_load_mni152_template_arrays():
+    cache_dir = tempfile.mkdtemp()
+    try:
+        data, mask, affine, vmax = _load_mni152_template_arrays(cache_dir)
+        assert_equal(sorted(os.listdir(cache_dir)),
+                     ['data.npy', 'info.npz', 'mask.npy'])
+        # The cached template is memory-mapped
+        cached = _load_mni152_template_arrays(cache_dir)
+        assert_true(isinstance(cached[0], np.memmap))
+        for array, cached_array in zip((data, mask, affine), cached[:3]):
+            np.testing.assert_array_equal(array, cached_array)
+        # Modifications are not written to the cache
+        cached[0][0, 0, 0] = -1
+        np.testing.assert_array_equal(
+            data, _load_mni152_template_arrays(cache_dir)[0])
+        assert_equal(vmax, cached[3])
+        # The template is loaded from its cache directory
+        template_cache_dir = _MNI152Template.cache_dir
+        _MNI152Template.cache_dir = cache_dir
+        MNI152TEMPLATE.data = None
+        try:
+            template = MNI152TEMPLATE.get_data()
+            assert_true(isinstance(template.data, np.memmap))
+            np.testing.assert_array_equal(data, template.data)
+            np.testing.assert_array_equal(mask, template.mask)
+            assert_equal(vmax, MNI152TEMPLATE.vmax)
+        finally:
+            _MNI152Template.cache_dir = template_cache_dir
+            MNI152TEMPLATE.data = None
+        # A corrupted cache is replaced
+        with open(os.path.join(cache_dir, 'info.npz'), 'w') as f:
+            f.write('corrupted')
+        _load_mni152_template_arrays(cache_dir)
+        assert_true(isinstance(_load_mni152_template_arrays(cache_dir)[0],
+                               np.memmap))
+    finally:
+        shutil.rmtree(cache_dir)
+    # Without cache directory, the template is processed in memory
+    data = _load_mni152_template_arrays(cache_dir)[0]
+    assert_true(not isinstance(data, np.memmap))
+
+
 def test_plot_functions():
     img = _generate_img()
 
@@ -497,6 +543,10 @@ def test_plot_prob_atlas():
                     threshold=0.2)
     # Testing the 4D plot prob atlas with contours
     plot_prob_atlas(img, view_type='continuous')
+    # Testing the 4D plot prob atlas with all the maps in one image
+    plot_prob_atlas(img, view_type='composite')
+    plot_prob_atlas(img, view_type='composite', threshold=[0.2] * 5,
+                    display_mode='z', cut_coords=[-100, 4])
 
 
 def test_get_colorbar_and_data_ranges_with_vmin():
@@ -8,7 +8,7 @@ or as weights in one image per region (maps).
 # License: simplified BSD
 
 import numpy as np
-from scipy import linalg, ndimage
+from scipy import linalg, ndimage, sparse
 
 from . import _utils
 from . import masking
@@ -195,7 +195,100 @@ def signals_to_img_labels(signals, labels_img, mask_img=None,
     return new_img_like(labels_img, data, target_affine)
 
 
-def img_to_signals_maps(imgs, maps_img, mask_img=None):
+class _MapsProjector(object):
+    """Least-squares projection of voxel signals on a set of maps.
+
+    The pseudo-inverse of the maps is computed once, on the voxels where at
+    least one map is non-zero, so that extracting the signals of an image
+    is a single matrix product.
+
+    Parameters
+    ==========
+    maps_data: numpy.ndarray
+        Set of maps. shape: (x, y, z, number of maps)
+
+    mask_data: numpy.ndarray, optional
+        Mask to apply to the maps. shape: (x, y, z)
+
+    sparse_maps: boolean or 'auto', optional
+        If True, the maps are stored as a sparse matrix, and the signals
+        are computed with the pseudo-inverse of their Gram matrix, which
+        is faster for maps with a compact support. 'auto' (the default)
+        chooses it when less than 10% of the values of the maps on their
+        support are non-zero, eg for atlases of non-overlapping regions.
+
+    Attributes
+    ==========
+    labels: numpy.ndarray
+        Index in maps_data of the maps of the projected signals.
+    """
+
+    def __init__(self, maps_data, mask_data=None, sparse_maps='auto'):
+        if mask_data is not None:
+            maps_data, maps_mask, labels = _trim_maps(maps_data, mask_data,
+                                                      keep_empty=True)
+            maps_mask = _utils.as_ndarray(maps_mask, dtype=np.bool)
+        else:
+            maps_mask = np.ones(maps_data.shape[:3], dtype=np.bool)
+            labels = np.arange(maps_data.shape[-1], dtype=np.int)
+        self.labels = labels
+
+        # The voxels where all the maps are zero do not change the
+        # least-squares solution
+        support = np.logical_and(maps_mask, np.any(maps_data != 0, axis=3))
+        # Flat indices of the support in images flattened in F order, the
+        # layout of nibabel data, and in C order
+        support_indices = np.nonzero(support)
+        self._indices = dict(
+            (order, np.ravel_multi_index(support_indices, support.shape,
+                                         order=order))
+            for order in ('F', 'C'))
+        maps = maps_data[support].astype(np.float64)
+        n_voxels, n_maps = maps.shape
+
+        if sparse_maps == 'auto':
+            sparse_maps = np.count_nonzero(maps) < .1 * maps.size
+        self._maps_t = self._gram_pinv = self._projector = None
+        if n_voxels == 0:
+            self._projector = np.zeros((n_maps, 0))
+        elif sparse_maps:
+            # pinv(maps) == pinv(maps.T maps) maps.T
+            self._maps_t = sparse.csr_matrix(maps.T)
+            gram = self._maps_t.dot(self._maps_t.T).toarray()
+            self._gram_pinv = linalg.pinv(gram)
+        else:
+            # SVD-based pseudo-inverse: scipy's linalg.pinv solves a
+            # least-squares problem against an identity of size n_voxels
+            self._projector = np.linalg.pinv(maps)
+
+    def project(self, data):
+        """Return the signals of the maps in data.
+
+        Parameters
+        ==========
+        data: numpy.ndarray
+            Images, of shape (x, y, z, number of scans).
+
+        Returns
+        =======
+        region_signals: numpy.ndarray
+            shape: (number of scans, number of maps)
+        """
+        n_scans = data.shape[3]
+        # The reshapes are views: only the voxels of the support of the maps
+        # are copied
+        if data.flags['C_CONTIGUOUS']:
+            voxel_signals = data.reshape((-1, n_scans))[self._indices['C']].T
+        else:
+            voxel_signals = data.T.reshape((n_scans, -1))[
+                :, self._indices['F']]
+        if self._projector is not None:
+            return np.dot(voxel_signals, self._projector.T)
+        # The pseudo-inverse of the Gram matrix is symmetric
+        return np.dot(self._maps_t.dot(voxel_signals.T).T, self._gram_pinv)
+
+
+def img_to_signals_maps(imgs, maps_img, mask_img=None, projector=None):
     """Extract region signals from image.
 
     This function is applicable to regions defined by maps.
@@ -220,6 +313,10 @@ def img_to_signals_maps(imgs, maps_img, mask_img=None):
     order: str
         ordering of output array ("C" or "F"). Defaults to "F".
 
+    projector: _MapsProjector, optional
+        The projector computed for maps_img and mask_img. Passing it
+        avoids computing the pseudo-inverse of the maps on each call.
+
     Returns
     =======
     region_signals: numpy.ndarray
@@ -247,24 +344,19 @@ def img_to_signals_maps(imgs, maps_img, mask_img=None):
     if abs(maps_img.get_affine() - affine).max() > 1e-9:
         raise ValueError("maps_img and imgs affines must be identical")
 
-    maps_data = maps_img.get_data()
-
     if mask_img is not None:
         mask_img = _utils.check_niimg_3d(mask_img)
         if mask_img.shape != shape:
             raise ValueError("mask_img and imgs shapes must be identical.")
         if abs(mask_img.get_affine() - affine).max() > 1e-9:
             raise ValueError("mask_img and imgs affines must be identical")
-        maps_data, maps_mask, labels = \
-                   _trim_maps(maps_data, mask_img.get_data(), keep_empty=True)
-        maps_mask = _utils.as_ndarray(maps_mask, dtype=np.bool)
-    else:
-        maps_mask = np.ones(maps_data.shape[:3], dtype=np.bool)
-        labels = np.arange(maps_data.shape[-1], dtype=np.int)
 
-    data = imgs.get_data()
-    region_signals = linalg.lstsq(maps_data[maps_mask, :],
-                                  data[maps_mask, :])[0].T
+    if projector is None:
+        projector = _MapsProjector(
+            maps_img.get_data(),
+            mask_img.get_data() if mask_img is not None else None)
+    region_signals = projector.project(imgs.get_data())
+    labels = projector.labels
 
     return region_signals, list(labels)
 
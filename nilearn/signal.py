@@ -12,17 +12,18 @@ import warnings
 
 import numpy as np
 import scipy
-from scipy import signal, stats, linalg
+from scipy import linalg
 from sklearn.utils import gen_even_slices
 from distutils.version import LooseVersion
 
 from ._utils.compat import _basestring
-from ._utils.numpy_conversions import csv_to_array
+from ._utils.numpy_conversions import csv_to_array, _get_float_dtype
 
 NP_VERSION = distutils.version.LooseVersion(np.version.short_version).version
 
 
-def _standardize(signals, detrend=False, normalize=True):
+def _standardize(signals, detrend=False, normalize=True,
+                 float_precision=None):
     """ Center and norm a given signal (time is along first axis)
 
     Parameters
@@ -37,6 +38,9 @@ def _standardize(signals, detrend=False, normalize=True):
         if True, shift timeseries to zero mean value and scale
         to unit energy (sum of squares).
 
+    float_precision: {'single', 'double'}, optional
+        Precision of the computations. Defaults to nilearn.FLOAT_PRECISION.
+
     Returns
     =======
     std_signals: numpy.ndarray
@@ -58,7 +62,9 @@ def _standardize(signals, detrend=False, normalize=True):
             signals = signals - signals.mean(axis=0)
 
         std = np.sqrt((signals ** 2).sum(axis=0))
-        std[std < np.finfo(np.float).eps] = 1.  # avoid numerical problems
+        # avoid numerical problems
+        std[std < np.finfo(_get_float_dtype(np.float,
+                                            float_precision)).eps] = 1.
         signals /= std
     return signals
 
@@ -217,9 +223,9 @@ def butterworth(signals, sampling_rate, low_pass=None, high_pass=None,
     """
     if low_pass is None and high_pass is None:
         if copy:
-            return signal.copy()
+            return signals.copy()
         else:
-            return signal
+            return signals
 
     if low_pass is not None and high_pass is not None \
             and high_pass >= low_pass:
@@ -245,12 +251,14 @@ def butterworth(signals, sampling_rate, low_pass=None, high_pass=None,
     else:
         critical_freq = critical_freq[0]
 
+    from scipy import signal  # slow to import
     b, a = signal.butter(order, critical_freq, btype=btype)
     if signals.ndim == 1:
         # 1D case
         output = signal.filtfilt(b, a, signals)
         if copy:  # filtfilt does a copy in all cases.
-            signals = output
+            # filtfilt returns double precision arrays
+            signals = _ensure_float(output)
         else:
             signals[...] = output
     else:
@@ -263,7 +271,8 @@ def butterworth(signals, sampling_rate, low_pass=None, high_pass=None,
             else:
                 # No way to save memory when a copy has been requested,
                 # because filtfilt does out-of-place processing
-                signals = signal.filtfilt(b, a, signals, axis=0)
+                signals = _ensure_float(
+                    signal.filtfilt(b, a, signals, axis=0))
         else:
             # Lesser memory consumption, slower.
             for timeseries in signals.T:
@@ -324,6 +333,7 @@ def high_variance_confounds(series, n_confounds=5, percentile=2.,
     # Compute variance without mean removal.
     var = _mean_of_squares(series)
 
+    from scipy import stats  # slow to import
     var_thr = stats.scoreatpercentile(var, 100. - percentile)
     series = series[:, var > var_thr]  # extract columns (i.e. features)
     # Return the singular vectors with largest singular values
@@ -334,18 +344,22 @@ def high_variance_confounds(series, n_confounds=5, percentile=2.,
     return u
 
 
-def _ensure_float(data):
+def _ensure_float(data, float_precision=None):
     "Make sure that data is a float type"
     if not data.dtype.kind == 'f':
         if data.dtype.itemsize == '8':
             data = data.astype(np.float64)
         else:
             data = data.astype(np.float32)
+    elif _get_float_dtype(data.dtype, float_precision) != data.dtype:
+        # Single precision mode
+        data = data.astype(np.float32)
     return data
 
 
 def clean(signals, sessions=None, detrend=True, standardize=True,
-          confounds=None, low_pass=None, high_pass=None, t_r=2.5):
+          confounds=None, low_pass=None, high_pass=None, t_r=2.5,
+          float_precision=None):
     """Improve SNR on masked fMRI signals.
 
        This function can do several things on the input signals, in
@@ -395,6 +409,10 @@ def clean(signals, sessions=None, detrend=True, standardize=True,
        standardize: bool
            If True, returned signals are set to unit variance.
 
+       float_precision: {'single', 'double'}, optional
+           Precision of the computations. If 'single', the output is
+           float32. Defaults to nilearn.FLOAT_PRECISION.
+
        Returns
        =======
        cleaned_signals: numpy.ndarray
@@ -465,25 +483,29 @@ def clean(signals, sessions=None, detrend=True, standardize=True,
                 clean(signals[sessions == s],
                       detrend=detrend, standardize=standardize,
                       confounds=session_confounds, low_pass=low_pass,
-                      high_pass=high_pass, t_r=2.5)
+                      high_pass=high_pass, t_r=2.5,
+                      float_precision=float_precision)
 
     # detrend
-    signals = _ensure_float(signals)
-    signals = _standardize(signals, normalize=False, detrend=detrend)
+    signals = _ensure_float(signals, float_precision)
+    signals = _standardize(signals, normalize=False, detrend=detrend,
+                           float_precision=float_precision)
 
     # Remove confounds
     if confounds is not None:
-        confounds = _ensure_float(confounds)
-        confounds = _standardize(confounds, normalize=True, detrend=detrend)
+        confounds = _ensure_float(confounds, float_precision)
+        confounds = _standardize(confounds, normalize=True, detrend=detrend,
+                                 float_precision=float_precision)
+        eps = np.finfo(_get_float_dtype(np.float, float_precision)).eps
 
         if (LooseVersion(scipy.__version__) > LooseVersion('0.9.0')):
             # Pivoting in qr decomposition was added in scipy 0.10
             Q, R, _ = linalg.qr(confounds, mode='economic', pivoting=True)
-            Q = Q[:, np.abs(np.diag(R)) > np.finfo(np.float).eps * 100.]
+            Q = Q[:, np.abs(np.diag(R)) > eps * 100.]
             signals -= Q.dot(Q.T).dot(signals)
         else:
             Q, R = linalg.qr(confounds, mode='economic')
-            non_null_diag = np.abs(np.diag(R)) > np.finfo(np.float).eps * 100.
+            non_null_diag = np.abs(np.diag(R)) > eps * 100.
             if np.all(non_null_diag):
                 signals -= Q.dot(Q.T).dot(signals)
             elif np.any(non_null_diag):
@@ -495,9 +517,12 @@ def clean(signals, sessions=None, detrend=True, standardize=True,
     if low_pass is not None or high_pass is not None:
         signals = butterworth(signals, sampling_rate=1. / t_r,
                               low_pass=low_pass, high_pass=high_pass)
+        # filtfilt returns double precision arrays
+        signals = _ensure_float(signals, float_precision)
 
     if standardize:
-        signals = _standardize(signals, normalize=True, detrend=False)
+        signals = _standardize(signals, normalize=True, detrend=False,
+                               float_precision=float_precision)
         signals *= np.sqrt(signals.shape[0])  # for unit variance
 
     return signals
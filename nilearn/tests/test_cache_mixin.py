@@ -6,13 +6,20 @@ import shutil
 import tempfile
 import json
 import glob
+import copy
+import pickle
 
 from nose.tools import assert_false, assert_true, assert_equal
 
-from sklearn.externals.joblib import Memory
+import numpy as np
+import nibabel
+from sklearn.externals.joblib import Memory, Parallel, delayed
+from sklearn.externals.joblib import hash as joblib_hash
 
 import nilearn
 from nilearn._utils import cache_mixin
+from nilearn._utils.niimg import _get_unloaded_proxy
+from nilearn.input_data import NiftiMasker
 
 
 def f(x):
@@ -87,3 +94,153 @@ def test_cache_memory_level():
     assert_equal(len(glob.glob(job_glob)), 2)
     cache_mixin.cache(f, mem)(3)
     assert_equal(len(glob.glob(job_glob)), 3)
+
+
+def test_fingerprints():
+    hash = cache_mixin._hash
+    img = nibabel.Nifti1Image(np.arange(24.).reshape((2, 3, 4)), np.eye(4))
+    temp_dir = tempfile.mkdtemp()
+    try:
+        filename = os.path.join(temp_dir, 'img.nii')
+        nibabel.save(img, filename)
+        file_img = nibabel.load(filename)
+        file_hash = hash(file_img)
+        # Images from the same file have the same hash, computed without
+        # loading their data
+        assert_equal(hash(nibabel.load(filename)), file_hash)
+        assert_true(_get_unloaded_proxy(file_img) is not None)
+        # The joblib hashers are not modified
+        assert_false(joblib_hash(file_img) == file_hash)
+        # Once loaded, the data is hashed
+        file_img.get_data()
+        assert_false(hash(file_img) == file_hash)
+        file_img.get_data()[0, 0, 0] = 1
+        assert_false(hash(file_img) == hash(nibabel.load(filename)))
+
+        # Modifying the file changes the hash
+        nibabel.save(nibabel.Nifti1Image(np.zeros((2, 3, 4, 5)), np.eye(4)),
+                     filename)
+        assert_false(hash(nibabel.load(filename)) == file_hash)
+    finally:
+        shutil.rmtree(temp_dir)
+
+    # In-memory images are hashed by their content
+    assert_equal(hash(img),
+                 hash(nibabel.Nifti1Image(np.arange(24.).reshape((2, 3, 4)),
+                                          np.eye(4))))
+    assert_false(hash(img) == hash(nibabel.Nifti1Image(
+        np.arange(24.).reshape((2, 3, 4)), 2 * np.eye(4))))
+
+    # Maskers are hashed by their parameters, ignoring verbosity and caching
+    mask_img = nibabel.Nifti1Image(np.ones((2, 3, 4), dtype=np.int8),
+                                   np.eye(4))
+    masker = NiftiMasker(mask_img=mask_img).fit()
+    assert_equal(hash(masker),
+                 hash(NiftiMasker(mask_img=mask_img, verbose=1,
+                                  memory=temp_dir).fit()))
+    assert_false(hash(masker) == hash(NiftiMasker(mask_img=mask_img,
+                                                  smoothing_fwhm=2).fit()))
+
+    # Cached functions hash their arguments with the fingerprints
+    temp_dir = tempfile.mkdtemp()
+    try:
+        cached = cache_mixin.cache(f, Memory(cachedir=temp_dir, verbose=0))
+        assert_equal(cached._get_argument_hash(masker),
+                     hash({'x': masker}))
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def ones(n):
+    # A test function with outputs of increasing size
+    return np.ones(n)
+
+
+def test_managed_memory():
+    temp_dir = tempfile.mkdtemp()
+    try:
+        mem = cache_mixin.ManagedMemory(cachedir=temp_dir, verbose=0)
+        cached_ones = cache_mixin.cache(ones, mem)
+        for n in (10, 10, 20, 10):
+            assert_equal(cached_ones(n).shape, (n, ))
+        stats = mem.cache_stats()
+        assert_equal(len(stats), 1)
+        stats = list(stats.values())[0]
+        assert_equal(stats['hits'], 2)
+        assert_equal(stats['misses'], 2)
+        assert_equal(stats['evictions'], 0)
+        assert_true(stats['size'] > 0)
+
+        # With a budget, the least recently used results are evicted.
+        # Statistics are shared by the memories using the same directory.
+        # The result for 30 is 80 bytes larger than the one for 20.
+        mem = cache_mixin.ManagedMemory(cachedir=temp_dir, verbose=0,
+                                        func_bytes_limit=stats['size'] + 100)
+        cached_ones = cache_mixin.cache(ones, mem)
+        cached_ones(10)
+        cached_ones(30)
+        stats = list(mem.cache_stats().values())[0]
+        assert_equal(stats['evictions'], 1)
+        assert_true(stats['size'] <= mem.func_bytes_limit)
+        # 20 has been evicted, 10 has been used recently
+        cached_ones(10)
+        assert_equal(list(mem.cache_stats().values())[0]['hits'], 4)
+        cached_ones(20)
+        assert_equal(list(mem.cache_stats().values())[0]['misses'], 4)
+
+        # Maskers can use it
+        mask_img = nibabel.Nifti1Image(np.ones((2, 3, 4), dtype=np.int8),
+                                       np.eye(4))
+        img = nibabel.Nifti1Image(np.random.RandomState(0).randn(2, 3, 4, 5),
+                                  np.eye(4))
+        masker = NiftiMasker(mask_img=mask_img, memory=mem).fit()
+        masker.transform(img)
+        masker.transform(img)
+        assert_true(any(stats['hits'] == 1
+                        for stats in mem.cache_stats().values()))
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+def test_managed_memory_hashes_once():
+    # The arguments of a call are hashed once, for the statistics and by
+    # joblib
+    temp_dir = tempfile.mkdtemp()
+    hash_ = cache_mixin._hash
+    n_hashes = []
+
+    def counting_hash(*args, **kwargs):
+        n_hashes.append(1)
+        return hash_(*args, **kwargs)
+
+    cache_mixin._hash = counting_hash
+    try:
+        mem = cache_mixin.ManagedMemory(cachedir=temp_dir, verbose=0)
+        cached_ones = mem.cache(ones)
+        cached_ones(3)
+        assert_equal(len(n_hashes), 1)
+        cached_ones(3)
+        assert_equal(len(n_hashes), 2)
+    finally:
+        cache_mixin._hash = hash_
+        shutil.rmtree(temp_dir)
+
+
+def test_managed_memory_pickling():
+    temp_dir = tempfile.mkdtemp()
+    try:
+        mem = cache_mixin.ManagedMemory(cachedir=temp_dir, verbose=0)
+        cached_ones = mem.cache(ones)
+        for this_copy in (pickle.loads(pickle.dumps(cached_ones)),
+                          copy.copy(cached_ones),
+                          copy.deepcopy(cached_ones)):
+            assert_equal(this_copy.func_bytes_limit,
+                         cached_ones.func_bytes_limit)
+            assert_equal(this_copy(3).shape, (3, ))
+        # Cached functions can be run in other processes
+        outputs = Parallel(n_jobs=2)(delayed(cached_ones)(n)
+                                     for n in (3, 4, 3))
+        assert_equal([output.shape for output in outputs],
+                      [(3, ), (4, ), (3, )])
+    finally:
+        shutil.rmtree(temp_dir)
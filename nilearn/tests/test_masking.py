@@ -9,8 +9,10 @@ from numpy.testing import assert_array_equal
 from nose.tools import assert_true, assert_false, assert_equal, \
     assert_raises
 
+import nibabel
 from nibabel import Nifti1Image
 
+import nilearn
 from nilearn import masking
 from nilearn.masking import (compute_epi_mask, compute_multi_epi_mask,
                              compute_background_mask, unmask, _unmask_3d,
@@ -163,6 +165,37 @@ def test_apply_mask():
                   Nifti1Image(data, affine), mask_img)
 
 
+def test_apply_mask_by_blocks():
+    # Masking images stored in uncompressed files, by blocks of volumes
+    rng = np.random.RandomState(0)
+    mask = np.zeros((5, 6, 7), dtype=np.int8)
+    mask[1:4, 2:5, 3:6] = 1
+    mask_img = Nifti1Image(mask, np.eye(4))
+    data_float = rng.randn(5, 6, 7, 11)
+    data_float[2, 3, 4, 5] = np.nan
+    data_int = rng.randint(0, 100, size=(5, 6, 7, 11)).astype(np.int16)
+    for data in (data_float, data_int):
+        data_img = Nifti1Image(data, np.eye(4))
+        expected = masking.apply_mask(data_img, mask_img)
+        with write_tmp_imgs(data_img) as filename:
+            assert_array_equal(masking.apply_mask(filename, mask_img),
+                               expected)
+            img = nibabel.load(filename)
+            # Blocks of 2 volumes
+            series = masking._apply_mask_fmri_by_blocks(
+                img, mask.astype(bool),
+                block_size=2 * mask.size * data.dtype.itemsize)
+            assert_array_equal(series, expected)
+            assert_equal(series.dtype, expected.dtype)
+            assert_true(np.all(np.isfinite(series)))
+            # Without dtype, the data is not converted
+            series = masking._apply_mask_fmri_by_blocks(
+                img, mask.astype(bool), dtype=None,
+                block_size=2 * mask.size * data.dtype.itemsize)
+            assert_equal(series.dtype, img.get_data_dtype())
+            assert_array_equal(series, expected)
+
+
 def test_unmask():
     # A delta in 3D
     shape = (10, 20, 30, 40)
@@ -231,6 +264,45 @@ def test_unmask():
                         unmask, transposed_vector, mask_img)
 
 
+def test_unmask_out():
+    shape = (6, 7, 8, 5)
+    generator = np.random.RandomState(0)
+    data4D = generator.rand(*shape)
+    mask = generator.randint(2, size=shape[:3])
+    mask_img = Nifti1Image(mask, np.eye(4))
+    mask = mask.astype(bool)
+    masked4D = data4D[mask, :].T
+    expected = data4D * mask[..., np.newaxis]
+
+    for order in ('C', 'F'):
+        indices = masking._unmask_indices(mask, order=order)
+        assert_array_equal(_unmask_4d(masked4D, mask, order=order,
+                                      indices=indices), expected)
+        assert_array_equal(_unmask_3d(masked4D[1], mask, order=order,
+                                      indices=indices), expected[..., 1])
+
+        # Preallocated buffers are filled and reused
+        out = np.zeros(shape, order=order)
+        for _ in range(2):
+            img = unmask(masked4D, mask_img, order=order, out=out)
+            assert_true(img.get_data() is out)
+            assert_array_equal(out, expected)
+        outs = [np.zeros(shape[:3], order=order) for _ in range(2)]
+        imgs = unmask([masked4D[0], masked4D[3]], mask_img, order=order,
+                      out=outs)
+        assert_array_equal(imgs[0].get_data(), expected[..., 0])
+        assert_array_equal(outs[1], expected[..., 3])
+
+    assert_raises_regex(ValueError, 'out must be of shape',
+                        unmask, masked4D, mask_img,
+                        out=np.zeros(shape[:3]))
+    assert_raises_regex(ValueError, 'out must be a F-contiguous array',
+                        unmask, masked4D, mask_img,
+                        out=np.zeros(shape, order='C'))
+    assert_raises_regex(ValueError, 'out must be a list of the same length',
+                        unmask, [masked4D], mask_img, out=[])
+
+
 def test_intersect_masks_filename():
     # Create dummy masks
     mask_a = np.zeros((4, 4, 1), dtype=np.bool)
@@ -397,3 +469,21 @@ def test_nifti_masker_empty_mask_warning():
         ValueError,
         "The mask is invalid as it is empty: it masks all data",
         NiftiMasker(mask_strategy="epi").fit_transform, X)
+
+
+def test_apply_mask_single_precision():
+    rng = np.random.RandomState(42)
+    data_img = Nifti1Image(rng.randn(9, 9, 9, 4), np.eye(4))
+    mask_img = Nifti1Image(np.ones((9, 9, 9), dtype=np.int8), np.eye(4))
+    masked_double = masking.apply_mask(data_img, mask_img, smoothing_fwhm=3)
+    nilearn.FLOAT_PRECISION = 'single'
+    try:
+        masked_single = masking.apply_mask(data_img, mask_img,
+                                           smoothing_fwhm=3)
+    finally:
+        nilearn.FLOAT_PRECISION = 'double'
+    assert_equal(masked_double.dtype, np.float64)
+    assert_equal(masked_single.dtype, np.float32)
+    # Documented tolerance of the single precision mode
+    np.testing.assert_allclose(masked_single, masked_double, rtol=1e-4,
+                               atol=1e-4)
@@ -10,6 +10,7 @@ whose name starts with an underscore
 import os
 import re
 import tempfile
+import threading
 
 from nose.tools import assert_equal, assert_true
 
@@ -25,6 +26,7 @@ from nilearn._utils.exceptions import DimensionError
 from nilearn._utils import testing, niimg_conversions
 from nilearn._utils.testing import assert_raises_regex
 from nilearn._utils.niimg_conversions import _iter_check_niimg
+from nilearn._utils.niimg import _get_unloaded_proxy
 
 
 class PhonyNiimage(nibabel.spatialimages.SpatialImage):
@@ -425,6 +427,100 @@ def test_concat_niimgs():
                         [img5d, img5d])
 
 
+def test_concat_niimgs_files_header_only():
+    # The first pass on a list of files should only read their headers
+    affine = np.eye(4)
+    img3d = Nifti1Image(np.arange(60).reshape((3, 4, 5)), affine)
+    # A 4D image with a single scan is considered 3D
+    img4d = Nifti1Image(np.arange(60).reshape((3, 4, 5, 1)), affine)
+    img4d_2 = Nifti1Image(np.ones((3, 4, 5, 2)), affine)
+    filenames = [tempfile.mktemp(suffix='.nii') for _ in range(3)]
+    try:
+        for img, filename in zip((img3d, img4d, img4d_2), filenames):
+            nibabel.save(img, filename)
+
+        shape, img_affine = niimg_conversions._check_niimg_header(
+            filenames[1], ensure_ndim=3)
+        assert_equal(shape, (3, 4, 5))
+        assert_array_equal(img_affine, affine)
+        assert_true(niimg_conversions._check_fov(filenames[2], affine,
+                                                 (3, 4, 5)))
+        assert_true(not niimg_conversions._check_fov(filenames[2],
+                                                     2 * affine, (3, 4, 5)))
+
+        concatenated = _utils.concat_niimgs(filenames[:2])
+        assert_equal(concatenated.shape, (3, 4, 5, 2))
+        assert_array_equal(concatenated.get_data()[..., 1],
+                           img3d.get_data())
+
+        assert_raises_regex(DimensionError, 'Data must be a 4D Niimg-like '
+                            'object but you provided a list of 4D images',
+                            _utils.concat_niimgs, filenames)
+    finally:
+        for filename in filenames:
+            _remove_if_exists(filename)
+
+
+def test_prefetch_niimgs():
+    affine = np.eye(4)
+    imgs = [Nifti1Image(i * np.ones((3, 4, 5)), affine) for i in range(4)]
+    filenames = [tempfile.mktemp(suffix=suffix)
+                 for suffix in ('.nii.gz', '.nii', '.nii', '.nii.gz')]
+    try:
+        for img, filename in zip(imgs, filenames):
+            nibabel.save(img, filename)
+        # Files are loaded, other objects are passed unchanged
+        niimgs = [filenames[0], imgs[1], filenames[2], filenames[3]]
+        prefetched = list(niimg_conversions._prefetch_niimgs(niimgs,
+                                                             n_prefetch=2))
+        assert_equal(len(prefetched), 4)
+        assert_true(prefetched[1] is imgs[1])
+        # Compressed files are decompressed, the data of other files is not
+        # loaded in the images
+        assert_true(_get_unloaded_proxy(prefetched[0]) is None)
+        assert_true(_get_unloaded_proxy(prefetched[2]) is not None)
+        assert_true(_get_unloaded_proxy(prefetched[3]) is None)
+        for img, prefetched_img in zip(imgs, prefetched):
+            assert_array_equal(prefetched_img.get_data(), img.get_data())
+
+        # Stopping the iteration early
+        for niimg in niimg_conversions._prefetch_niimgs(filenames,
+                                                        n_prefetch=1):
+            break
+
+        iterated = list(_iter_check_niimg(filenames, n_prefetch=2))
+        assert_equal(len(iterated), 4)
+        assert_array_equal(iterated[3].get_data(), imgs[3].get_data())
+
+        # Errors are raised in the iterating thread
+        assert_raises_regex(ValueError, "File not found",
+                            list, _iter_check_niimg(filenames + ['foo.nii'],
+                                                    n_prefetch=1))
+    finally:
+        for filename in filenames:
+            _remove_if_exists(filename)
+
+    # Iterators are consumed in the calling thread, and no thread is
+    # started without image files
+    threads = []
+
+    def generator():
+        for img in imgs:
+            threads.append(threading.current_thread())
+            yield img
+    n_threads = threading.active_count()
+    for img in niimg_conversions._prefetch_niimgs(generator()):
+        assert_equal(threading.active_count(), n_threads)
+    assert_equal(threads, [threading.current_thread()] * len(imgs))
+
+    def failing_generator():
+        yield imgs[0]
+        raise ValueError('Failed')
+    assert_raises_regex(ValueError, 'Failed', list,
+                        niimg_conversions._prefetch_niimgs(
+                            failing_generator()))
+
+
 def nifti_generator(buffer):
     for i in range(10):
         buffer.append(Nifti1Image(np.random.random((10, 10, 10)), np.eye(4)))
@@ -10,7 +10,9 @@ import tempfile
 
 from nose.tools import assert_true, assert_raises
 
-from nilearn._utils.numpy_conversions import as_ndarray, csv_to_array
+import nilearn as ni
+from nilearn._utils.numpy_conversions import (as_ndarray, csv_to_array,
+                                              _get_float_dtype)
 
 
 def are_arrays_identical(arr1, arr2):
@@ -244,3 +246,16 @@ def test_csv_to_array():
         assert_raises(TypeError, csv_to_array, filename, delimiters='?!')
     finally:
         os.remove(filename)
+
+
+def test_get_float_dtype():
+    assert_true(_get_float_dtype() == np.float64)
+    assert_true(_get_float_dtype(np.float32) == np.float32)
+    try:
+        ni.FLOAT_PRECISION = 'single'
+        assert_true(_get_float_dtype() == np.float32)
+        assert_true(_get_float_dtype(np.float64) == np.float32)
+        ni.FLOAT_PRECISION = 'half'
+        assert_raises(ValueError, _get_float_dtype)
+    finally:
+        ni.FLOAT_PRECISION = 'double'
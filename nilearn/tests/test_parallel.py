@@ -0,0 +1,29 @@
+"""
+Test the _utils.parallel module
+"""
+import numpy as np
+from numpy.testing import assert_array_equal
+from nose.tools import assert_equal
+
+from sklearn.externals.joblib import cpu_count
+
+from nilearn._utils.parallel import _effective_n_jobs, _split_batches
+
+
+def test_effective_n_jobs():
+    assert_equal(_effective_n_jobs(1), 1)
+    assert_equal(_effective_n_jobs(3), 3)
+    assert_equal(_effective_n_jobs(-1), cpu_count())
+    assert_equal(_effective_n_jobs(-2), max(1, cpu_count() - 1))
+    assert_equal(_effective_n_jobs(-cpu_count() - 5), 1)
+    assert_equal(_effective_n_jobs(0), 1)
+
+
+def test_split_batches():
+    batches = _split_batches(10, 3)
+    assert_equal([len(batch) for batch in batches], [4, 3, 3])
+    assert_array_equal(np.concatenate(batches), np.arange(10))
+    # No more batches than items
+    assert_equal(len(_split_batches(2, 4)), 2)
+    assert_equal(len(_split_batches(5, -1)), min(5, cpu_count()))
+    assert_equal(_split_batches(0, 2), [])
@@ -5,6 +5,7 @@ Test for "region" module.
 # License: simplified BSD
 
 import numpy as np
+from scipy import linalg
 from nose.tools import assert_raises, assert_true
 
 import nibabel
@@ -272,6 +273,64 @@ def test_signal_extraction_with_maps():
                   good_maps_img, mask_img=bad_mask2_img)
 
 
+def test_maps_projector():
+    shape = (10, 11, 12)
+    n_regions = 12
+    rand_gen = np.random.RandomState(0)
+    data = rand_gen.randn(*(shape + (7,)))
+    labels_img = generate_labeled_regions(shape, n_regions,
+                                          rand_gen=rand_gen)
+    labels_data = labels_img.get_data()
+    # Non-overlapping regions, and overlapping smooth maps
+    atlas_maps = np.zeros(shape + (n_regions,))
+    for n in range(n_regions):
+        region_mask = labels_data == n + 1
+        atlas_maps[region_mask, n] = rand_gen.rand(region_mask.sum())
+    smooth_maps = generate_maps(shape, 5, border=1)[0].get_data()
+    mask = rand_gen.rand(*shape) > .2
+    # The last map is outside of the mask
+    smooth_maps[..., -1] = 0
+    smooth_maps[0, 0, 0, -1] = 1
+    mask[0, 0, 0] = False
+
+    for maps_data in (atlas_maps, smooth_maps):
+        for mask_data in (None, mask):
+            maps_mask = np.ones(shape, dtype=bool)
+            if mask_data is not None:
+                maps_mask = mask_data
+            expected = linalg.lstsq(maps_data[maps_mask] * 1.,
+                                    data[maps_mask])[0].T
+            for sparse_maps in (True, False, 'auto'):
+                projector = region._MapsProjector(maps_data, mask_data,
+                                                  sparse_maps=sparse_maps)
+                np.testing.assert_almost_equal(projector.project(data),
+                                               expected)
+                np.testing.assert_array_equal(
+                    projector.labels, np.arange(maps_data.shape[-1]))
+    # Compact maps are stored as a sparse matrix
+    assert_true(region._MapsProjector(atlas_maps)._maps_t is not None)
+    assert_true(region._MapsProjector(smooth_maps)._maps_t is None)
+
+    # Maps of a realistic size, whose pseudo-inverse must not need
+    # memory quadratic in the number of voxels
+    big_shape = (30, 36, 30)
+    big_maps = rand_gen.randn(*(big_shape + (10,)))
+    big_data = rand_gen.randn(*(big_shape + (3,)))
+    projector = region._MapsProjector(big_maps, sparse_maps=False)
+    np.testing.assert_almost_equal(
+        projector.project(big_data),
+        linalg.lstsq(big_maps.reshape(-1, 10),
+                     big_data.reshape(-1, 3))[0].T)
+
+    # A projector can be given to img_to_signals_maps
+    img = nibabel.Nifti1Image(data, np.eye(4))
+    maps_img = nibabel.Nifti1Image(smooth_maps, np.eye(4))
+    projector = region._MapsProjector(smooth_maps)
+    np.testing.assert_almost_equal(
+        region.img_to_signals_maps(img, maps_img, projector=projector)[0],
+        region.img_to_signals_maps(img, maps_img)[0])
+
+
 def test_signal_extraction_with_maps_and_labels():
     shape = (4, 5, 6)
     n_regions = 7
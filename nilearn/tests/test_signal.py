@@ -9,6 +9,7 @@ import os.path
 import numpy as np
 from nose.tools import assert_true, assert_false, assert_raises
 
+import nilearn as ni
 # Use nisignal here to avoid name collisions (using nilearn.signal is
 # not possible)
 from nilearn import signal as nisignal
@@ -148,6 +149,15 @@ def test_butterworth():
     np.testing.assert_almost_equal(out1, out2)
 
 
+def test_butterworth_no_filtering():
+    # Without cutoff frequencies, the signals are returned unchanged
+    data = np.random.RandomState(0).randn(10, 3)
+    out = nisignal.butterworth(data, 1., copy=True)
+    np.testing.assert_array_equal(out, data)
+    assert_true(out is not data)
+    assert_true(nisignal.butterworth(data, 1., copy=False) is data)
+
+
 def test_standardize():
     rand_gen = np.random.RandomState(0)
     n_features = 10
@@ -351,6 +361,32 @@ def test_clean_confounds():
                   confounds=[None])
 
 
+def test_clean_single_precision():
+    signals, noises, confounds = generate_signals(n_features=41,
+                                                  n_confounds=5, length=45)
+    kwargs = dict(confounds=confounds, detrend=True, standardize=True,
+                  low_pass=.2, high_pass=.01, t_r=2.)
+    cleaned_double = nisignal.clean(signals + noises, **kwargs)
+    assert_true(cleaned_double.dtype == np.float64)
+
+    ni.FLOAT_PRECISION = 'single'
+    try:
+        cleaned_single = nisignal.clean(signals + noises, **kwargs)
+        assert_true(cleaned_single.dtype == np.float32)
+        cleaned_single = nisignal.clean(
+            (signals + noises).astype(np.float32), **kwargs)
+        assert_true(cleaned_single.dtype == np.float32)
+    finally:
+        ni.FLOAT_PRECISION = 'double'
+    # Documented tolerance of the single precision mode
+    np.testing.assert_allclose(cleaned_single, cleaned_double,
+                               rtol=1e-4, atol=1e-4)
+    # The precision can be given explicitly
+    cleaned_single = nisignal.clean(signals + noises, float_precision='single',
+                                    **kwargs)
+    assert_true(cleaned_single.dtype == np.float32)
+
+
 def test_high_variance_confounds():
     # C and F order might take different paths in the function. Check that the
     # result is identical.
@@ -86,7 +86,7 @@ if __name__ == "__main__":
           ],
           packages=find_packages(),
           package_data={'nilearn.datasets.data': ['*.nii.gz', '*.csv'],
-                        'nilearn.plotting.glass_brain_files': ['*.json'],
+                        'nilearn.plotting.glass_brain_files': ['*.json', '*.npz'],
                         'nilearn.tests.data': ['*'],
                         'nilearn.image.tests.data': ['*.mgz'],
                         'nilearn.datasets.tests.data': ['*.*'],